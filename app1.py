@@ -6,19 +6,22 @@ from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 from io import BytesIO
 import os
-import json
 import re
 
 from pptx.enum.shapes import MSO_SHAPE
 
 import base64
-from pypdf import PdfReader
-import fitz
 import re
 from datetime import datetime
 
 from datetime import datetime
 import re
+
+from ingestion import ingest, KIND_PDF
+from pdf_engine import OCR_AVAILABLE, METHOD_EMPTY
+from canonical import extract_canonical, reextract_section, to_offre
+from llm_backend import DEFAULT_MODEL, get_backend
+
 def main():
     def calculer_annees_experience(experiences_text):
         """
@@ -57,6 +60,8 @@ def main():
 
     if 'cv_data' not in st.session_state:
         st.session_state.cv_data = None
+    if 'cv_canonical' not in st.session_state:
+        st.session_state.cv_canonical = None
 
     # --- Logo ---
     logo_b64 = ""
@@ -96,7 +101,7 @@ def main():
 
     # --- Configuration de l'API Gemini ---
     api_key = st.secrets.get("GEMINI_API_KEY", None)
-    MODEL = "gemini-2.5-flash"
+    MODEL = DEFAULT_MODEL  # GT_LLM_MODEL (ré-extractions ciblées ; l'analyse complète passe par la cascade)
 
     if api_key:
         genai.configure(api_key=api_key)
@@ -121,157 +126,72 @@ def main():
     def extract_text(file):
         """
         Lit n'importe quel CV : PDF (texte/tableau/scanné), DOCX, PPTX
-        Retourne toujours du texte propre, même sur les pires fichiers pourris
+        via le moteur commun (ingestion.py) — cache disque partagé, OCR parallèle
         """
         text = ""
-        file_name = file.name.lower()
-        file_bytes = file.read()
-        file.seek(0)  # très important
-
-        # ====================== DOCX ======================
-        if file.type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"] or file_name.endswith(".docx"):
-            try:
-                from docx import Document
-                doc = Document(file)
-                for para in doc.paragraphs:
-                    if para.text.strip():
-                        text += para.text + "\n"
-                for table in doc.tables:
-                    for row in table.rows:
-                        row_text = " | ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
-                        if row_text:
-                            text += row_text + "\n"
-                return text.strip()
-            except Exception as e:
-                st.warning(f"Erreur lecture DOCX : {e}")
-
-        # ====================== PPTX ======================
-        elif file.type in ["application/vnd.openxmlformats-officedocument.presentationml.presentation"] or file_name.endswith(".pptx"):
-            try:
-                from pptx import Presentation
-                prs = Presentation(file)
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text") and shape.text.strip():
-                            text += shape.text + "\n"
-                        if hasattr(shape, "table"):
-                            for row in shape.table.rows:
-                                row_text = " | ".join([cell.text.strip() for cell in row.cells])
-                                if row_text.strip():
-                                    text += row_text + "\n"
-                return text.strip() if text else "CV vide détecté dans le PPTX"
-            except Exception as e:
-                st.warning(f"Erreur lecture PPTX : {e}")
-
-        # ====================== PDF – LA MÉGA BOMBE ======================
-        else:  # PDF ou inconnu
-            # Méthode 1 : PyMuPDF → le roi absolu (gère 95% des PDF même scannés avec OCR intégré)
-            try:
-                import fitz  # pymupdf
-                doc = fitz.open(stream=file_bytes, filetype="pdf")
-                for page in doc:
-                    # Essai 1 : texte natif
-                    page_text = page.get_text("text")
-                    if len(page_text.strip()) > 50:
-                        text += page_text + "\n"
-                    else:
-                        # Essai 2 : si texte faible → on active l'OCR (même sur image !)
-                        pix = page.get_pixmap(dpi=300)
-                        img_bytes = pix.tobytes("png")
-                        import pytesseract
-                        from PIL import Image
-                        import io
-                        ocr_text = pytesseract.image_to_string(Image.open(io.BytesIO(img_bytes)), lang='fra')
-                        text += ocr_text + "\n"
-                doc.close()
-                if len(text) > 100:
-                    return text.strip()
-            except ImportError:
+        try:
+            result = ingest(file.getvalue(), file.name)
+            text = result.text
+            if result.kind == KIND_PDF and not OCR_AVAILABLE and any(b.method == METHOD_EMPTY for b in result.blocks):
                 st.error("Installe pymupdf et pytesseract pour lire TOUS les PDF : pip install pymupdf pytesseract pillow")
-            except Exception as e:
-                pass
-
-            # Méthode 2 : pdfplumber → excellent sur les tableaux
-            try:
-                import pdfplumber
-                with pdfplumber.open(file) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                        # Si pas de texte → on force les tableaux
-                        for table in page.extract_tables():
-                            for row in table:
-                                clean_row = [cell.replace("\n", " ").strip() if cell else "" for cell in row]
-                                text += " | ".join(clean_row) + "\n"
-                if len(text) > 100:
-                    return text.strip()
-            except:
-                pass
-
-            # Méthode 3 : pypdf en dernier recours
-            try:
-                from pypdf import PdfReader
-                reader = PdfReader(file)
-                for page in reader.pages:
-                    t = page.extract_text()
-                    if t:
-                        text += t + "\n"
-                return text.strip()
-            except:
-                pass
+        except ImportError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.warning(f"Erreur lecture CV : {e}")
 
         # Si tout a échoué
         return text.strip() if text else "AUCUN TEXTE EXTRAIT – Le fichier est probablement une image pure ou corrompu."
 
-    def analyze_cv(cv_text):
-        """Analyse le CV avec Gemini et retourne les données en JSON."""
-        if not api_key:
+
+    def analyze_cv(cv_text, refresh=False, on_field=None):
+        """Analyse le CV avec Gemini et retourne les données au format de l'offre.
+        L'extraction canonique (canonical.py) est partagée avec les autres outils et mise
+        en cache par document (sauf refresh=True). Réponse en streaming : on_field(clé, valeur)
+        est appelé dès qu'un champ canonique est complet."""
+        if not api_key and get_backend().name == "gemini":
             st.warning("Clé API Gemini non trouvée. Utilisation des données par défaut.")
             return DEFAULT_DATA.copy()
 
-        prompt = f"""
-        Tu es expert RH chez GT Technologies Sénégal.
-        Analyse le CV et retourne STRICTEMENT un JSON avec les champs suivants :
-
-        {{
-        "NOM": "Prénom NOM",
-        "Poste": "Titre du poste ou Dernier poste",
-        "email": "email@example.com",
-        "DOMAINE_EXPERIENCE": "Liste des domaines d'expertise, un par ligne, formatée avec • au début. Exemple: •Domaine1\\n•Domaine2",
-        "SECTEURS_EXPERIENCE": "Liste des secteurs d'activité, un par ligne, formatée avec • au début. Exemple: •Secteur1\\n•Secteur2",
-        "PROFIL": "Un résumé synthétique du profil en 4 à 6 phrases complètes. Utilise \\n pour séparer les phrases pour la lisibilité.",
-        "EXPERIENCES_PERTINENTES": "Liste chronologique de TOUTES les expériences professionnelles, une par ligne, formatée avec • au début. Exemple: •Date : Poste - Entreprise\\n•Date : Poste - Entreprise",
-        "REFERENCES_PERTINENTES": "Liste de TOUTES les références professionnelles ou organisations mentionnées dans le CV.
-        - Si une mission ou un rôle associé est mentionné, ajoute-la après un double point.
-        - Chaque ligne doit respecter le format exact : 'Référence : Mission(Année ou Période)'.
-        - Extrais la période (Année, Années, ou Période Complète) si elle est associée à la référence et ajoute-la entre parenthèses à la fin.
-        - Si aucune mission n'est mentionnée pour une référence, mets seulement le nom de la référence.
-        Exemple: •CORAF : Audit du système d'information (2025)\\n•Banque de Dakar (BDK) : Audit de la plateforme technique (2024)",
-        "DIPLOMES_TEXTUELS": "Liste de TOUS les diplômes, formations et certifications (CISA, ISO, etc.), une par ligne, formatée avec • au début. Exemple: •Master 2 - Université X\\n•Certification CISA"
-        }}
-
-        CV à analyser : {cv_text[:40000]}
-        """
-
         try:
-            model = genai.GenerativeModel(MODEL)
-            resp = model.generate_content(prompt)
-            raw = resp.text.strip().replace("```json", "").replace("```", "")
-
-            json_match = re.search(r"\{.*\}", raw, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group(0))
-                for k, v in DEFAULT_DATA.items():
-                    if k not in data or not data[k]:
-                        data[k] = v
-                return data
-            else:
-                raise ValueError("Aucun JSON valide trouvé.")
+            canonical = extract_canonical(cv_text, refresh=refresh, on_field=on_field)
+            st.session_state.cv_canonical = canonical
+            data = to_offre(canonical)
+            for k, v in DEFAULT_DATA.items():
+                if k not in data or not data[k]:
+                    data[k] = v
+            return data
         except Exception as e:
             st.error(f"Erreur Gemini: {e}. Retour aux données par défaut.")
             return DEFAULT_DATA.copy()
 
+    # Ré-extraction ciblée : section proposée → (groupe canonique, champs de cv_data mis à jour)
+    SECTION_FIXES = {
+        "Nom / Poste / Email": ("identite", ["NOM", "Poste", "email"]),
+        "Domaines & Secteurs": ("competences", ["DOMAINE_EXPERIENCE", "SECTEURS_EXPERIENCE"]),
+        "Profil": ("profil", ["PROFIL"]),
+        "Expériences pertinentes": ("experience", ["EXPERIENCES_PERTINENTES"]),
+        "Références pertinentes": ("references", ["REFERENCES_PERTINENTES"]),
+        "Diplômes": ("formation", ["DIPLOMES_TEXTUELS"]),
+    }
+
+    def reanalyze_section(label, refresh=False):
+        """Ré-extrait une seule section (extrait du CV + sous-schéma) au lieu de tout le CV ;
+        seuls les champs de cette section sont remplacés dans cv_data."""
+        group, fields = SECTION_FIXES[label]
+        try:
+            canonical = reextract_section(st.session_state.cv_text, st.session_state.cv_canonical,
+                                          group, MODEL, refresh=refresh)
+        except Exception as e:
+            st.error(f"Erreur Gemini: {e}")
+            return False
+        st.session_state.cv_canonical = canonical
+        fresh = to_offre(canonical)
+        data = dict(st.session_state.cv_data)
+        for field in fields:
+            data[field] = fresh[field] or DEFAULT_DATA[field]
+        st.session_state.cv_data = data
+        return True
+
     # --- Couleur mauve ---
     MAUVE = RGBColor(92, 45, 145)
 
@@ -506,11 +426,25 @@ def main():
     with c2:
         diplomas = st.file_uploader("Diplômes (images/PDF)", type=["png", "jpg", "jpeg", "pdf"], accept_multiple_files=True)
 
+    force_refresh = st.checkbox("🔄 Forcer une nouvelle analyse (ignorer le cache Gemini)", value=False)
     if cv_file and st.button("Analyser avec Gemini", type="primary"):
         with st.spinner("Analyse en cours..."):
             text = extract_text(cv_file)
+            st.session_state.cv_text = text
             if text:
-                result = analyze_cv(text)
+                # Aperçu progressif : chaque champ s'affiche dès que Gemini l'a terminé
+                live = st.empty()
+                streamed = {}
+
+                live_labels = {"nom_employe": "NOM", "poste": "Poste", "email": "email", "profil": "PROFIL"}
+
+                def show_field(key, value):
+                    if key in live_labels and value:
+                        streamed[live_labels[key]] = " ".join(value) if isinstance(value, list) else value
+                        live.markdown("\n\n".join(f"**{k} :** {v}" for k, v in streamed.items()))
+
+                result = analyze_cv(text, refresh=force_refresh, on_field=show_field)
+                live.empty()
                 st.session_state.cv_data = result
                 st.success("Analyse terminée avec succès !")
                 st.balloons()
@@ -522,6 +456,16 @@ def main():
 
         st.subheader("🛠️ Vérification et Ajustement des Données")
 
+        # Correction d'une seule section sans relancer toute l'analyse
+        if st.session_state.cv_canonical and st.session_state.get("cv_text"):
+            with st.expander("🎯 Corriger une section (ré-extraction ciblée)"):
+                section_label = st.selectbox("Section à ré-extraire", list(SECTION_FIXES), key="section_fix")
+                if st.button("Ré-extraire cette section"):
+                    with st.spinner(f"Ré-extraction de la section « {section_label} »..."):
+                        ok = reanalyze_section(section_label, refresh=force_refresh)
+                    if ok:
+                        st.rerun()
+
         # Champs modifiables
         col1, col2, col3 = st.columns(3)
         with col1:
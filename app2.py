@@ -6,11 +6,338 @@ from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 from io import BytesIO
 import os
-import json
 import re
 import base64
-from pypdf import PdfReader
 from pptx.enum.shapes import MSO_SHAPE
+
+from ingestion import ingest, KIND_PDF
+from pdf_engine import OCR_AVAILABLE, METHOD_EMPTY
+from canonical import extract_canonical, reextract_section, to_offre
+from llm_backend import DEFAULT_MODEL, get_backend
+from pptx_batch import generate_batch
+from template_plan import template_bytes
+from pptx_media import prepare_media
+from pptx_optimize import save_pptx
+
+# --- Template de l'offre ---
+TEMPLATE = "CV Papa Malick GUEYE Offre.pptx"
+
+# --- Emplacement d'un diplôme dans les slides 4+ ---
+DIPLOMA_WIDTH = Inches(3.0)
+DIPLOMA_HEIGHT = Inches(2.2)
+
+# --- Données par défaut ---
+DEFAULT_DATA = {
+    "NOM": "Prénom NOM",
+    "Poste": "",
+    "email": "",
+    "DOMAINE_EXPERIENCE": "",
+    "SECTEURS_EXPERIENCE": "",
+    "PROFIL": "",
+    "EXPERIENCES_PERTINENTES": "",
+    "REFERENCES_PERTINENTES": "",
+    "DIPLOMES_TEXTUELS": ""
+}
+
+
+def calculer_annees_experience(experiences_text):
+    """
+    GT Technologies 2025 – Calcul EXACT, sans arrondi bidon
+    Retourne : année actuelle - première année trouvée dans les expériences
+    """
+    if not experiences_text or len(experiences_text.strip()) < 10:
+        return 10  # valeur par défaut si rien
+
+    import re
+    from datetime import datetime
+
+    # On extrait toutes les années 19xx ou 20xx
+    annees = re.findall(r'\b(19\d{2}|20\d{2})\b', experiences_text)
+
+    annees_valides = []
+    for a in annees:
+        try:
+            year = int(a)
+            if 1990 <= year <= datetime.now().year + 5:
+                annees_valides.append(year)
+        except:
+            pass
+
+    if not annees_valides:
+        return 10
+
+    # On prend la PLUS ANCIENNE année
+    premiere_annee = min(annees_valides)
+    annees_reelles = datetime.now().year - premiere_annee
+
+    # ON NE FAIT AUCUN ARRONDIS → on retourne le chiffre exact
+    return annees_reelles
+
+
+def fill_ppt_smart(prs, data, diploma_files, slide_elements, selected_domaines, selected_secteurs):
+    MAUVE = RGBColor(92, 45, 145)
+
+    # ===================================================================
+    # 1. NOM + EMAIL + POSTE → partout, avec icônes
+    # ===================================================================
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            tf = shape.text_frame
+            for p in tf.paragraphs:
+                text = p.text
+                text_upper = text.upper()
+
+                if "NOM" in text_upper:
+                    p.clear()
+                    run = p.add_run()
+                    run.text = f"NOM: {data['NOM']}"
+                    run.font.bold = True
+                    run.font.size = Pt(12)
+                    run.font.color.rgb = MAUVE
+                    run.font.name = "Calibri"
+
+                if "@" in text or "email" in text.lower():
+                    p.clear()
+                    run = p.add_run()
+                    run.text = data['email']
+                    run.font.size = Pt(11)
+                    run.font.color.rgb = MAUVE
+                    run.font.name = "Calibri"
+
+                if "POSTE" in text_upper:
+                    p.clear()
+                    run = p.add_run()
+                    run.text = f"Poste: {data['Poste']}"
+                    run.font.bold = True
+                    run.font.size = Pt(12)
+                    run.font.color.rgb = MAUVE
+
+    # ===================================================================
+    # 2. PROFIL + EXPERIENCES + DIPLÔMES (par slide)
+    # ===================================================================
+    for slide_idx in range(3):
+        if slide_idx >= len(prs.slides):
+            continue
+        slide = prs.slides[slide_idx]
+        sel = slide_elements[slide_idx]
+
+        for shape in slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            tf = shape.text_frame
+            text_upper = tf.text.upper()
+
+            # PROFIL
+            if "PROFIL" in text_upper:
+                tf.clear()
+                p_title = tf.add_paragraph()
+                p_title.text = "PROFIL"
+                p_title.font.bold = True
+                p_title.font.size = Pt(14)
+                p_title.font.color.rgb = MAUVE
+                for line in data["PROFIL"].split('\n'):
+                    if line.strip():
+                        p = tf.add_paragraph()
+                        p.text = line.strip()
+                        p.font.size = Pt(10)
+                        p.font.name = "Calibri"
+
+            # EXPERIENCES PERTINENTES + DIPLÔMES
+            if "EXPERIENCE" in text_upper and "PERTINENTE" in text_upper and len(tf.paragraphs) >= 5:
+                tf.clear()
+                p = tf.add_paragraph()
+                p.text = "EXPERIENCES PERTINENTES"
+                p.font.bold = True
+                p.font.size = Pt(14)
+                p.font.color.rgb = MAUVE
+                p.font.name = "Calibri"
+
+                for exp in sel["EXPERIENCES_PERTINENTES"]:
+                    p = tf.add_paragraph()
+                    p.text = exp.strip()
+                    p.font.size = Pt(10)
+                    p.font.name = "Calibri"
+
+                if sel["DIPLOMES_TEXTUELS"]:
+                    p = tf.add_paragraph()
+                    p.text = "Diplômes :"
+                    p.font.bold = True
+                    p.font.size = Pt(11)
+                    p.font.color.rgb = MAUVE
+                    for dip in sel["DIPLOMES_TEXTUELS"]:
+                        p = tf.add_paragraph()
+                        p.text = dip.strip()
+                        p.font.size = Pt(10)
+                        p.font.name = "Calibri"
+            # RÉFÉRENCES PERTINENTES (dans la même boucle que les autres)
+            if any(word in text_upper for word in ["RÉFÉRENCE", "REFERENCE", "RÉFÉRENCES", "REFERENCES"]):
+                tf.clear()
+
+                # Titre
+                p_title = tf.add_paragraph()
+                p_title.text = "REFERENCES PERTINENTES"
+                p_title.font.bold = True
+                p_title.font.size = Pt(14)
+                p_title.font.color.rgb = MAUVE
+                p_title.font.name = "Calibri"
+
+                # Les références cochées pour CETTE slide
+                for ref in sel["REFERENCES_PERTINENTES"]:
+                    if ref.strip():
+                        p = tf.add_paragraph()
+                        p.text = ref.strip()
+                        p.font.size = Pt(10)
+                        p.font.name = "Calibri"
+    # ===================================================================
+    # 3. DOMAINES & SECTEURS → GLOBAUX, affichés sur TOUTES les slides
+    # ===================================================================
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            tf = shape.text_frame
+            text_upper = tf.text.upper()
+
+            # DOMAINES D'EXPERIENCE
+            if "DOMAINE" in text_upper and "EXPERIENCE" in text_upper:
+                tf.clear()
+                p_title = tf.add_paragraph()
+                p_title.text = "DOMAINE D'EXPERIENCE"
+                p_title.font.bold = True
+                p_title.font.color.rgb = MAUVE
+                for dom in selected_domaines:
+                    p = tf.add_paragraph()
+                    p.text = dom.strip()
+                    p.font.size = Pt(9)
+                    p.font.name = "Calibri"
+
+            # SECTEURS D'EXPERIENCES
+            if "SECTEUR" in text_upper and "EXPERIENCE" in text_upper:
+                tf.clear()
+                p_title = tf.add_paragraph()
+                p_title.text = "SECTEURS D'EXPERIENCES"
+                p_title.font.bold = True
+                p_title.font.color.rgb = MAUVE
+                for sec in selected_secteurs:
+                    p = tf.add_paragraph()
+                    p.text = sec.strip()
+                    p.font.size = Pt(9)
+                    p.font.name = "Calibri"
+
+    # ===================================================================
+    # 4. Images diplômes
+    # ===================================================================
+    errors = []
+    if diploma_files:
+        images, errors = prepare_diplomas(diploma_files)
+        img_idx = 0
+        for i in range(3, len(prs.slides)):
+            slide = prs.slides[i]
+            positions = [(Inches(0.6), Inches(6.4)), (Inches(3.8), Inches(6.4)),
+                        (Inches(7.0), Inches(6.4)), (Inches(10.2), Inches(6.4))]
+            for left, top in positions:
+                if img_idx >= len(images):
+                    break
+                number, image = images[img_idx]
+                try:
+                    slide.shapes.add_picture(BytesIO(image.data),
+                                            left, top, width=DIPLOMA_WIDTH, height=DIPLOMA_HEIGHT)
+                except Exception:
+                    errors.append(f"Diplôme {number} non inséré : format d'image non reconnu")
+                img_idx += 1
+    return errors
+
+
+def prepare_diplomas(diploma_files):
+    """
+    Diplômes (octets image ou PDF) ramenés à l'emplacement 3.0×2.2" : première page des
+    PDF rendue par PyMuPDF, photos réduites et ré-encodées (pptx_media, cache par hash).
+    Retourne ([(numéro du fichier, image préparée)], erreurs) ; un PDF illisible est signalé et ignoré.
+    """
+    images, errors = [], []
+    for n, data in enumerate(diploma_files, 1):
+        try:
+            images.append((n, prepare_media(data, DIPLOMA_WIDTH, DIPLOMA_HEIGHT)))
+        except ValueError as e:
+            errors.append(f"Diplôme {n} non inséré : {e}")
+    return images, errors
+
+
+def add_experience_badge(prs, texte_rond):
+    """ROND +XX ANS – cercle orange derrière, cercle mauve devant avec le texte, sur chaque slide."""
+    for slide in prs.slides:
+
+        # position
+        left_violet = Inches(9.2)
+        top = Inches(0.2)
+        width = Inches(1.5)
+        height = Inches(1.5)
+
+        # 📌 1 — Cercle ORANGE derrière (créé en premier)
+        left_orange = left_violet - Inches(0.42)  # léger décalage à gauche
+
+        orange = slide.shapes.add_shape(
+            MSO_SHAPE.OVAL, left_orange, top, width, height
+        )
+        orange.fill.solid()
+        orange.fill.fore_color.rgb = RGBColor(242, 101, 34)     # orange
+        orange.line.color.rgb = RGBColor(242, 101, 34)
+
+        # 📌 2 — Cercle VIOLET devant
+        violet = slide.shapes.add_shape(
+            MSO_SHAPE.OVAL, left_violet, top, width, height
+        )
+        violet.fill.solid()
+        violet.fill.fore_color.rgb = RGBColor(92, 45, 145)      # violet
+        violet.line.color.rgb = RGBColor(92, 45, 145)
+
+        # 📌 texte sur le cercle violet
+        tf = violet.text_frame
+        tf.clear()
+        p = tf.paragraphs[0]
+        p.text = texte_rond
+        p.font.name = "Calibri"
+        p.font.size = Pt(14)
+        p.font.bold = True
+        p.font.color.rgb = RGBColor(255, 255, 255)
+        p.alignment = PP_ALIGN.CENTER
+
+        tf.margin_top = 0
+        tf.margin_bottom = 0
+
+
+def render_offre_pptx(data, slide_elements, selected_domaines, selected_secteurs, diploma_files=(), template_path=TEMPLATE):
+    """Génère le CV de l'offre : rond « + XX ans », textes, domaines/secteurs, diplômes.
+    Retourne (octets du PPTX, erreurs des diplômes). Le template est lu une fois par
+    processus (template_plan.template_bytes) ; le fichier est allégé à la sauvegarde
+    (pptx_optimize.save_pptx)."""
+    prs = Presentation(BytesIO(template_bytes(template_path)))
+    annees_final = calculer_annees_experience(data["EXPERIENCES_PERTINENTES"])
+    add_experience_badge(prs, f"+ {annees_final} ans\nd’expériences")
+    errors = fill_ppt_smart(prs, data, list(diploma_files), slide_elements, selected_domaines, selected_secteurs)
+    return save_pptx(prs), errors
+
+
+def default_selection(data):
+    """Sélection par défaut de l'interface (tout coché) : (éléments des 3 slides, domaines, secteurs)."""
+    lines = lambda key: [l for l in data[key].split('\n') if l.strip()]
+    slide_elements = [{
+        "EXPERIENCES_PERTINENTES": lines("EXPERIENCES_PERTINENTES"),
+        "REFERENCES_PERTINENTES": lines("REFERENCES_PERTINENTES"),
+        "DIPLOMES_TEXTUELS": lines("DIPLOMES_TEXTUELS"),
+    } for _ in range(3)]
+    domaines = [l.strip() for l in lines("DOMAINE_EXPERIENCE")]
+    secteurs = [l.strip() for l in lines("SECTEURS_EXPERIENCE")]
+    return slide_elements, domaines, secteurs
+
+
+def render_batch_job(data):
+    """Rendu d'un CV de la génération en lot (dans un worker de pptx_batch), avec la sélection par défaut."""
+    return render_offre_pptx(data, *default_selection(data))[0]
+
+
 def main():
     # === AJOUTE ÇA APRÈS TES IMPORTS (juste après les imports) ===
     def checkbox_group_with_select_all(title, items, key_prefix):
@@ -48,44 +375,13 @@ def main():
 
         return selected
 
-    def calculer_annees_experience(experiences_text):
-        """
-        GT Technologies 2025 – Calcul EXACT, sans arrondi bidon
-        Retourne : année actuelle - première année trouvée dans les expériences
-        """
-        if not experiences_text or len(experiences_text.strip()) < 10:
-            return 10  # valeur par défaut si rien
-
-        import re
-        from datetime import datetime
-
-        # On extrait toutes les années 19xx ou 20xx
-        annees = re.findall(r'\b(19\d{2}|20\d{2})\b', experiences_text)
-        
-        annees_valides = []
-        for a in annees:
-            try:
-                year = int(a)
-                if 1990 <= year <= datetime.now().year + 5:
-                    annees_valides.append(year)
-            except:
-                pass
-
-        if not annees_valides:
-            return 10
-
-        # On prend la PLUS ANCIENNE année
-        premiere_annee = min(annees_valides)
-        annees_reelles = datetime.now().year - premiere_annee
-
-        # ON NE FAIT AUCUN ARRONDIS → on retourne le chiffre exact
-        return annees_reelles
-
     # --- Configuration de la page Streamlit ---
     st.set_page_config(page_title="GT Technologies CV Builder",page_icon="image.png", layout="wide")
 
     if 'cv_data' not in st.session_state:
         st.session_state.cv_data = None
+    if 'cv_canonical' not in st.session_state:
+        st.session_state.cv_canonical = None
 
     # --- Logo ---
     logo_b64 = ""
@@ -125,181 +421,99 @@ def main():
 
     # --- Configuration de l'API Gemini ---
     api_key = st.secrets.get("GEMINI_API_KEY", None)
-    MODEL = "gemini-2.5-flash"
+    MODEL = DEFAULT_MODEL  # GT_LLM_MODEL (ré-extractions ciblées ; l'analyse complète passe par la cascade)
 
     if api_key:
         genai.configure(api_key=api_key)
 
-    # --- Données par défaut ---
-    DEFAULT_DATA = {
-        "NOM": "Prénom NOM",
-        "Poste": "",
-        "email": "",
-        "DOMAINE_EXPERIENCE": "",
-        "SECTEURS_EXPERIENCE": "",
-        "PROFIL": "",
-        "EXPERIENCES_PERTINENTES": "",
-        "REFERENCES_PERTINENTES": "",
-        "DIPLOMES_TEXTUELS": ""
-    }
     # ============================================================
     # FONCTION ULTIME : LIT TOUS LES CV (PDF, DOCX, PPTX) MÊME AVEC TABLEAUX
     # ============================================================
     def extract_text(file):
         """
         Lit n'importe quel CV : PDF (texte/tableau/scanné), DOCX, PPTX
-        Retourne toujours du texte propre, même sur les pires fichiers pourris
+        via le moteur commun (ingestion.py) — cache disque partagé, OCR parallèle
         """
         text = ""
-        file_name = file.name.lower()
-        file_bytes = file.read()
-        file.seek(0)  # très important
-
-        # ====================== DOCX ======================
-        if file.type in ["application/vnd.openxmlformats-officedocument.wordprocessingml.document", "application/msword"] or file_name.endswith(".docx"):
-            try:
-                from docx import Document
-                doc = Document(file)
-                for para in doc.paragraphs:
-                    if para.text.strip():
-                        text += para.text + "\n"
-                for table in doc.tables:
-                    for row in table.rows:
-                        row_text = " | ".join([cell.text.strip() for cell in row.cells if cell.text.strip()])
-                        if row_text:
-                            text += row_text + "\n"
-                return text.strip()
-            except Exception as e:
-                st.warning(f"Erreur lecture DOCX : {e}")
-
-        # ====================== PPTX ======================
-        elif file.type in ["application/vnd.openxmlformats-officedocument.presentationml.presentation"] or file_name.endswith(".pptx"):
-            try:
-                from pptx import Presentation
-                prs = Presentation(file)
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text") and shape.text.strip():
-                            text += shape.text + "\n"
-                        if hasattr(shape, "table"):
-                            for row in shape.table.rows:
-                                row_text = " | ".join([cell.text.strip() for cell in row.cells])
-                                if row_text.strip():
-                                    text += row_text + "\n"
-                return text.strip() if text else "CV vide détecté dans le PPTX"
-            except Exception as e:
-                st.warning(f"Erreur lecture PPTX : {e}")
-
-        # ====================== PDF – LA MÉGA BOMBE ======================
-        else:  # PDF ou inconnu
-            # Méthode 1 : PyMuPDF → le roi absolu (gère 95% des PDF même scannés avec OCR intégré)
-            try:
-                import fitz  # pymupdf
-                doc = fitz.open(stream=file_bytes, filetype="pdf")
-                for page in doc:
-                    # Essai 1 : texte natif
-                    page_text = page.get_text("text")
-                    if len(page_text.strip()) > 50:
-                        text += page_text + "\n"
-                    else:
-                        # Essai 2 : si texte faible → on active l'OCR (même sur image !)
-                        pix = page.get_pixmap(dpi=300)
-                        img_bytes = pix.tobytes("png")
-                        import pytesseract
-                        from PIL import Image
-                        import io
-                        ocr_text = pytesseract.image_to_string(Image.open(io.BytesIO(img_bytes)), lang='fra')
-                        text += ocr_text + "\n"
-                doc.close()
-                if len(text) > 100:
-                    return text.strip()
-            except ImportError:
+        try:
+            result = ingest(file.getvalue(), file.name)
+            text = result.text
+            if result.kind == KIND_PDF and not OCR_AVAILABLE and any(b.method == METHOD_EMPTY for b in result.blocks):
                 st.error("Installe pymupdf et pytesseract pour lire TOUS les PDF : pip install pymupdf pytesseract pillow")
-            except Exception as e:
-                pass
-
-            # Méthode 2 : pdfplumber → excellent sur les tableaux
-            try:
-                import pdfplumber
-                with pdfplumber.open(file) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                        # Si pas de texte → on force les tableaux
-                        for table in page.extract_tables():
-                            for row in table:
-                                clean_row = [cell.replace("\n", " ").strip() if cell else "" for cell in row]
-                                text += " | ".join(clean_row) + "\n"
-                if len(text) > 100:
-                    return text.strip()
-            except:
-                pass
-
-            # Méthode 3 : pypdf en dernier recours
-            try:
-                from pypdf import PdfReader
-                reader = PdfReader(file)
-                for page in reader.pages:
-                    t = page.extract_text()
-                    if t:
-                        text += t + "\n"
-                return text.strip()
-            except:
-                pass
+        except ImportError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.warning(f"Erreur lecture CV : {e}")
 
         # Si tout a échoué
         return text.strip() if text else "AUCUN TEXTE EXTRAIT – Le fichier est probablement une image pure ou corrompu."
 
 
-    def analyze_cv(cv_text):
-        """Analyse le CV avec Gemini et retourne les données en JSON."""
-        if not api_key:
+    def analyze_cv(cv_text, refresh=False, on_field=None):
+        """Analyse le CV avec Gemini et retourne les données au format de l'offre.
+        L'extraction canonique (canonical.py) est partagée avec les autres outils et mise
+        en cache par document (sauf refresh=True). Réponse en streaming : on_field(clé, valeur)
+        est appelé dès qu'un champ canonique est complet."""
+        if not api_key and get_backend().name == "gemini":
             st.warning("Clé API Gemini non trouvée. Utilisation des données par défaut.")
             return DEFAULT_DATA.copy()
 
-        prompt = f"""
-        Tu es expert RH chez GT Technologies Sénégal.
-        Analyse le CV et retourne STRICTEMENT un JSON avec les champs suivants :
-
-        {{
-        "NOM": "Prénom NOM",
-        "Poste": "Titre du poste ou Dernier poste",
-        "email": "email@example.com",
-        "DOMAINE_EXPERIENCE": "Liste des domaines d'expertise, un par ligne, formatée avec • au début. Exemple: •Domaine1\\n•Domaine2",
-        "SECTEURS_EXPERIENCE": "Liste des secteurs d'activité, un par ligne, formatée avec • au début. Exemple: •Secteur1\\n•Secteur2",
-        "PROFIL": "Un résumé synthétique du profil en 4 à 6 phrases complètes. Utilise \\n pour séparer les phrases pour la lisibilité.",
-        "EXPERIENCES_PERTINENTES": "Liste chronologique de TOUTES les expériences professionnelles, une par ligne, formatée avec • au début. Exemple: •Date : Poste - Entreprise\\n•Date : Poste - Entreprise",
-        "REFERENCES_PERTINENTES": "Liste de TOUTES les références professionnelles ou organisations mentionnées dans le CV.
-        - Si une mission ou un rôle associé est mentionné, ajoute-la après un double point.
-        - Chaque ligne doit respecter le format exact : 'Référence : Mission(Année ou Période)'.
-        - Extrais la période (Année, Années, ou Période Complète) si elle est associée à la référence et ajoute-la entre parenthèses à la fin.
-        - Si aucune mission n'est mentionnée pour une référence, mets seulement le nom de la référence.
-        Exemple: •CORAF : Audit du système d'information (2025)\\n•Banque de Dakar (BDK) : Audit de la plateforme technique (2024)",
-        "DIPLOMES_TEXTUELS": "Liste de TOUS les diplômes, formations et certifications (CISA, ISO, etc.), une par ligne, formatée avec • au début. Exemple: •Master 2 - Université X\\n•Certification CISA"
-        }}
-
-        CV à analyser : {cv_text[:40000]}
-        """
-
         try:
-            model = genai.GenerativeModel(MODEL)
-            resp = model.generate_content(prompt)
-            raw = resp.text.strip().replace("```json", "").replace("```", "")
-
-            json_match = re.search(r"\{.*\}", raw, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group(0))
-                for k, v in DEFAULT_DATA.items():
-                    if k not in data or not data[k]:
-                        data[k] = v
-                return data
-            else:
-                raise ValueError("Aucun JSON valide trouvé.")
+            canonical = extract_canonical(cv_text, refresh=refresh, on_field=on_field)
+            st.session_state.cv_canonical = canonical
+            data = to_offre(canonical)
+            for k, v in DEFAULT_DATA.items():
+                if k not in data or not data[k]:
+                    data[k] = v
+            return data
         except Exception as e:
             st.error(f"Erreur Gemini: {e}. Retour aux données par défaut.")
             return DEFAULT_DATA.copy()
 
+    # Ré-extraction ciblée : section proposée → (groupe canonique, champs de cv_data mis à jour)
+    SECTION_FIXES = {
+        "Nom / Poste / Email": ("identite", ["NOM", "Poste", "email"]),
+        "Domaines & Secteurs": ("competences", ["DOMAINE_EXPERIENCE", "SECTEURS_EXPERIENCE"]),
+        "Profil": ("profil", ["PROFIL"]),
+        "Expériences pertinentes": ("experience", ["EXPERIENCES_PERTINENTES"]),
+        "Références pertinentes": ("references", ["REFERENCES_PERTINENTES"]),
+        "Diplômes": ("formation", ["DIPLOMES_TEXTUELS"]),
+    }
+
+    def reanalyze_section(label, refresh=False):
+        """Ré-extrait une seule section (extrait du CV + sous-schéma) au lieu de tout le CV ;
+        seuls les champs de cette section sont remplacés dans cv_data."""
+        group, fields = SECTION_FIXES[label]
+        try:
+            canonical = reextract_section(st.session_state.cv_text, st.session_state.cv_canonical,
+                                          group, MODEL, refresh=refresh)
+        except Exception as e:
+            st.error(f"Erreur Gemini: {e}")
+            return False
+        st.session_state.cv_canonical = canonical
+        fresh = to_offre(canonical)
+        data = dict(st.session_state.cv_data)
+        for field in fields:
+            data[field] = fresh[field] or DEFAULT_DATA[field]
+        st.session_state.cv_data = data
+        return True
+
+    # --- Génération en lot (équipe d'une offre) ---
+    def analyze_for_batch(file):
+        """Texte + extraction canonique d'un CV du lot (exécuté dans un thread : aucun appel Streamlit)."""
+        data = to_offre(extract_canonical(ingest(file.getvalue(), file.name).text))
+        for k, v in DEFAULT_DATA.items():
+            if k not in data or not data[k]:
+                data[k] = v
+        return data
+
+    def run_batch(files):
+        """Analyse et rendu de tous les CV (pptx_batch.generate_batch), sélection par défaut."""
+        st.session_state.batch_zip, st.session_state.batch_summary = generate_batch(
+            files, analyze_for_batch, render_batch_job, TEMPLATE,
+            output_name=lambda data: f"CV_{data['NOM'].replace(' ', '_')}_GT_Technologies.pptx",
+        )
+
     # --- Couleur mauve ---
     MAUVE = RGBColor(92, 45, 145)
 
@@ -349,179 +563,7 @@ def main():
         st.markdown("</div>", unsafe_allow_html=True)
         return selected_elements
 
-    def fill_ppt_smart(prs, data, diploma_files, slide_elements, selected_domaines, selected_secteurs):
-        MAUVE = RGBColor(92, 45, 145)
-
-        # ===================================================================
-        # 1. NOM + EMAIL + POSTE → partout, avec icônes
-        # ===================================================================
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if not shape.has_text_frame:
-                    continue
-                tf = shape.text_frame
-                for p in tf.paragraphs:
-                    text = p.text
-                    text_upper = text.upper()
-
-                    if "NOM" in text_upper:
-                        p.clear()
-                        run = p.add_run()
-                        run.text = f"NOM: {data['NOM']}"
-                        run.font.bold = True
-                        run.font.size = Pt(12)
-                        run.font.color.rgb = MAUVE
-                        run.font.name = "Calibri"
-
-                    if "@" in text or "email" in text.lower():
-                        p.clear()
-                        run = p.add_run()
-                        run.text = data['email']
-                        run.font.size = Pt(11)
-                        run.font.color.rgb = MAUVE
-                        run.font.name = "Calibri"
-
-                    if "POSTE" in text_upper:
-                        p.clear()
-                        run = p.add_run()
-                        run.text = f"Poste: {data['Poste']}"
-                        run.font.bold = True
-                        run.font.size = Pt(12)
-                        run.font.color.rgb = MAUVE
-
-        # ===================================================================
-        # 2. PROFIL + EXPERIENCES + DIPLÔMES (par slide)
-        # ===================================================================
-        for slide_idx in range(3):
-            if slide_idx >= len(prs.slides):
-                continue
-            slide = prs.slides[slide_idx]
-            sel = slide_elements[slide_idx]
-
-            for shape in slide.shapes:
-                if not shape.has_text_frame:
-                    continue
-                tf = shape.text_frame
-                text_upper = tf.text.upper()
-
-                # PROFIL
-                if "PROFIL" in text_upper:
-                    tf.clear()
-                    p_title = tf.add_paragraph()
-                    p_title.text = "PROFIL"
-                    p_title.font.bold = True
-                    p_title.font.size = Pt(14)
-                    p_title.font.color.rgb = MAUVE
-                    for line in data["PROFIL"].split('\n'):
-                        if line.strip():
-                            p = tf.add_paragraph()
-                            p.text = line.strip()
-                            p.font.size = Pt(10)
-                            p.font.name = "Calibri"
-
-                # EXPERIENCES PERTINENTES + DIPLÔMES
-                if "EXPERIENCE" in text_upper and "PERTINENTE" in text_upper and len(tf.paragraphs) >= 5:
-                    tf.clear()
-                    p = tf.add_paragraph()
-                    p.text = "EXPERIENCES PERTINENTES"
-                    p.font.bold = True
-                    p.font.size = Pt(14)
-                    p.font.color.rgb = MAUVE
-                    p.font.name = "Calibri"
-
-                    for exp in sel["EXPERIENCES_PERTINENTES"]:
-                        p = tf.add_paragraph()
-                        p.text = exp.strip()
-                        p.font.size = Pt(10)
-                        p.font.name = "Calibri"
-
-                    if sel["DIPLOMES_TEXTUELS"]:
-                        p = tf.add_paragraph()
-                        p.text = "Diplômes :"
-                        p.font.bold = True
-                        p.font.size = Pt(11)
-                        p.font.color.rgb = MAUVE
-                        for dip in sel["DIPLOMES_TEXTUELS"]:
-                            p = tf.add_paragraph()
-                            p.text = dip.strip()
-                            p.font.size = Pt(10)
-                            p.font.name = "Calibri"
-                # RÉFÉRENCES PERTINENTES (dans la même boucle que les autres)
-                if any(word in text_upper for word in ["RÉFÉRENCE", "REFERENCE", "RÉFÉRENCES", "REFERENCES"]):
-                    tf.clear()
-
-                    # Titre
-                    p_title = tf.add_paragraph()
-                    p_title.text = "REFERENCES PERTINENTES"
-                    p_title.font.bold = True
-                    p_title.font.size = Pt(14)
-                    p_title.font.color.rgb = MAUVE
-                    p_title.font.name = "Calibri"
-
-                    # Les références cochées pour CETTE slide
-                    for ref in sel["REFERENCES_PERTINENTES"]:
-                        if ref.strip():
-                            p = tf.add_paragraph()
-                            p.text = ref.strip()
-                            p.font.size = Pt(10)
-                            p.font.name = "Calibri"
-        # ===================================================================
-        # 3. DOMAINES & SECTEURS → GLOBAUX, affichés sur TOUTES les slides
-        # ===================================================================
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if not shape.has_text_frame:
-                    continue
-                tf = shape.text_frame
-                text_upper = tf.text.upper()
-
-                # DOMAINES D'EXPERIENCE
-                if "DOMAINE" in text_upper and "EXPERIENCE" in text_upper:
-                    tf.clear()
-                    p_title = tf.add_paragraph()
-                    p_title.text = "DOMAINE D'EXPERIENCE"
-                    p_title.font.bold = True
-                    p_title.font.color.rgb = MAUVE
-                    for dom in selected_domaines:
-                        p = tf.add_paragraph()
-                        p.text = dom.strip()
-                        p.font.size = Pt(9)
-                        p.font.name = "Calibri"
-
-                # SECTEURS D'EXPERIENCES
-                if "SECTEUR" in text_upper and "EXPERIENCE" in text_upper:
-                    tf.clear()
-                    p_title = tf.add_paragraph()
-                    p_title.text = "SECTEURS D'EXPERIENCES"
-                    p_title.font.bold = True
-                    p_title.font.color.rgb = MAUVE
-                    for sec in selected_secteurs:
-                        p = tf.add_paragraph()
-                        p.text = sec.strip()
-                        p.font.size = Pt(9)
-                        p.font.name = "Calibri"
-
-        # ===================================================================
-        # 4. Images diplômes
-        # ===================================================================
-        if diploma_files:
-            img_idx = 0
-            for i in range(3, len(prs.slides)):
-                slide = prs.slides[i]
-                positions = [(Inches(0.6), Inches(6.4)), (Inches(3.8), Inches(6.4)),
-                            (Inches(7.0), Inches(6.4)), (Inches(10.2), Inches(6.4))]
-                for left, top in positions:
-                    if img_idx >= len(diploma_files):
-                        break
-                    try:
-                        slide.shapes.add_picture(BytesIO(diploma_files[img_idx].getvalue()),
-                                                left, top, width=Inches(3.0), height=Inches(2.2))
-                    except:
-                        pass
-                    img_idx += 1
     # --- Interface Streamlit ---
-    TEMPLATE = "CV Papa Malick GUEYE Offre.pptx"
-
     if not os.path.exists(TEMPLATE):
         st.error("Template manquant → **CV Papa Malick GUEYE Offre.pptx** doit être dans le dossier !")
     else:
@@ -533,11 +575,25 @@ def main():
     with c2:
         diplomas = st.file_uploader("Diplômes (images/PDF)", type=["png", "jpg", "jpeg", "pdf"], accept_multiple_files=True)
 
+    force_refresh = st.checkbox("🔄 Forcer une nouvelle analyse (ignorer le cache Gemini)", value=False)
     if cv_file and st.button("Analyser avec Gemini", type="primary"):
         with st.spinner("Analyse en cours..."):
             text = extract_text(cv_file)
+            st.session_state.cv_text = text
             if text:
-                result = analyze_cv(text)
+                # Aperçu progressif : chaque champ s'affiche dès que Gemini l'a terminé
+                live = st.empty()
+                streamed = {}
+
+                live_labels = {"nom_employe": "NOM", "poste": "Poste", "email": "email", "profil": "PROFIL"}
+
+                def show_field(key, value):
+                    if key in live_labels and value:
+                        streamed[live_labels[key]] = " ".join(value) if isinstance(value, list) else value
+                        live.markdown("\n\n".join(f"**{k} :** {v}" for k, v in streamed.items()))
+
+                result = analyze_cv(text, refresh=force_refresh, on_field=show_field)
+                live.empty()
                 st.session_state.cv_data = result
                 st.success("Analyse terminée avec succès !")
                 st.balloons()
@@ -550,6 +606,16 @@ def main():
 
         st.subheader("🛠️ Vérification et Ajustement des Données")
 
+        # Correction d'une seule section sans relancer toute l'analyse
+        if st.session_state.cv_canonical and st.session_state.get("cv_text"):
+            with st.expander("🎯 Corriger une section (ré-extraction ciblée)"):
+                section_label = st.selectbox("Section à ré-extraire", list(SECTION_FIXES), key="section_fix")
+                if st.button("Ré-extraire cette section"):
+                    with st.spinner(f"Ré-extraction de la section « {section_label} »..."):
+                        ok = reanalyze_section(section_label, refresh=force_refresh)
+                    if ok:
+                        st.rerun()
+
         # Champs modifiables
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -620,58 +686,16 @@ def main():
             if not os.path.exists(TEMPLATE):
                 st.error("Template manquant. Impossible de générer.")
             else:
-                prs = Presentation(TEMPLATE)
-                # ROND +XX ANS – VERSION ULTRA-SIMPLE & INDÉSTRUCTIBLE (aucune erreur possible)
+                # ROND +XX ANS, textes, domaines/secteurs et diplômes (render_offre_pptx)
                 annees_final = calculer_annees_experience(d["EXPERIENCES_PERTINENTES"])
                 texte_rond = f"+ {annees_final} ans\nd’expériences"
 
-                for slide in prs.slides:
-
-                    # position
-                    left_violet = Inches(9.2)
-                    top = Inches(0.2)
-                    width = Inches(1.5)
-                    height = Inches(1.5)
-
-                    # 📌 1 — Cercle ORANGE derrière (créé en premier)
-                    left_orange = left_violet - Inches(0.42)  # léger décalage à gauche
-
-                    orange = slide.shapes.add_shape(
-                        MSO_SHAPE.OVAL, left_orange, top, width, height
-                    )
-                    orange.fill.solid()
-                    orange.fill.fore_color.rgb = RGBColor(242, 101, 34)     # orange
-                    orange.line.color.rgb = RGBColor(242, 101, 34)
-
-                    # 📌 2 — Cercle VIOLET devant
-                    violet = slide.shapes.add_shape(
-                        MSO_SHAPE.OVAL, left_violet, top, width, height
-                    )
-                    violet.fill.solid()
-                    violet.fill.fore_color.rgb = RGBColor(92, 45, 145)      # violet
-                    violet.line.color.rgb = RGBColor(92, 45, 145)
-
-                    # 📌 texte sur le cercle violet
-                    tf = violet.text_frame
-                    tf.clear()
-                    p = tf.paragraphs[0]
-                    p.text = texte_rond
-                    p.font.name = "Calibri"
-                    p.font.size = Pt(14)
-                    p.font.bold = True
-                    p.font.color.rgb = RGBColor(255, 255, 255)
-                    p.alignment = PP_ALIGN.CENTER
-
-                    tf.margin_top = 0
-                    tf.margin_bottom = 0
-                
                 st.success("Rond orange en haut / mauve en bas parfait → {texte_rond}")
-                fill_ppt_smart(prs, d, diplomas or [], slide_elements, selected_domaines, selected_secteurs)
-
-                # Sauvegarde
-                out = BytesIO()
-                prs.save(out)
-                out.seek(0)
+                pptx_bytes, diploma_errors = render_offre_pptx(d, slide_elements, selected_domaines, selected_secteurs,
+                                                               [f.getvalue() for f in diplomas or []])
+                for error in diploma_errors:
+                    st.warning(error)
+                out = BytesIO(pptx_bytes)
 
                 st.success("CV généré avec succès !")
 
@@ -684,5 +708,27 @@ def main():
                     mime="application/vnd.openxmlformats-officedocument.presentationml.presentation"
                 )
                 st.balloons()
+
+    # --- Génération en lot ---
+    st.divider()
+    with st.expander("📦 Génération en lot (tous les CV de l'équipe)"):
+        st.caption("Chaque CV est analysé puis rendu en parallèle avec la sélection par défaut "
+                   "(tous les éléments cochés, sans diplômes). Les PPTX sont regroupés dans un ZIP.")
+        batch_files = st.file_uploader("CV de l'équipe (PDF/DOCX)", type=["pdf", "docx"],
+                                       accept_multiple_files=True, key="batch_uploader")
+        if batch_files and st.button("Générer tous les CV"):
+            if not os.path.exists(TEMPLATE):
+                st.error("Template manquant. Impossible de générer.")
+            else:
+                run_batch(batch_files)
+        if st.session_state.get("batch_zip"):
+            st.success(st.session_state.batch_summary)
+            st.download_button(
+                "Télécharger le ZIP des CV",
+                data=st.session_state.batch_zip,
+                file_name="CV_equipe_GT_Technologies.zip",
+                mime="application/zip",
+                key="download_batch_zip"
+            )
 if __name__ == "__main__":
     pass  # laisse vide si tout ton code est déjà en haut
@@ -4,6 +4,8 @@ import re
 import json
 import datetime
 import base64
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, Any
 import streamlit as st
 
@@ -17,11 +19,6 @@ from docx.oxml import parse_xml
 from docx.oxml.ns import nsdecls
 
 # --- Modules optionnels (Vérification des dépendances)
-try:
-    import pdfplumber
-except ImportError:
-    pdfplumber = None
-
 try:
     # Nécessaire pour la génération PPTX
     from pptx import Presentation
@@ -32,17 +29,21 @@ except ImportError:
     PptxRGBColor = None 
 
 
-# --- Remplacement d'OpenAI par Google GenAI
-try:
-    from google import genai
-    from google.genai import types
-    GEMINI_AVAILABLE = True
-except ImportError:
-    genai = None
-    types = None
-    GEMINI_AVAILABLE = False
-
+# --- Google Gemini (les appels passent par llm.py / canonical.py)
 import google.generativeai as genai
+
+from ingestion import ingest
+from canonical import TIER_STATS, cached_canonical, document_id, extract_canonical, to_banque
+from fingerprint import find_batch_duplicates, get_history, minhash
+from cv_cache import DiskCache, hash_bytes
+
+# Nombre d'appels Gemini simultanés par défaut pour "Analyser tout"
+BATCH_CONCURRENCY = 4
+
+# DOCX déjà rendus, par contenu du résultat : à incrémenter si build_standard_docx change
+DOCX_RENDERER_VERSION = "1"
+_DOCX_CACHE = DiskCache("docx", max_bytes=50 * 1024 * 1024)
+
 def main():
     # Configuration unique et définitive (identique aux autres apps)
     try:
@@ -104,210 +105,143 @@ def main():
 
 
 
-    # =====================================================
-    # ========== EXTRACTION DU TEXTE ======================
-    # =====================================================
-
-    def extract_from_docx_bytes(b: bytes) -> str:
-        """Extrait le texte et les tables d'un fichier DOCX en bytes."""
-        doc = Document(io.BytesIO(b))
-        parts = []
-        for p in doc.paragraphs:
-            if p.text.strip():
-                parts.append(p.text)
-        for t in doc.tables:
-            for r in t.rows:
-                row_text = " | ".join(c.text for c in r.cells)
-                if row_text.strip():
-                    parts.append(row_text)
-        return "\n".join(parts)
-
-    def extract_from_pdf_bytes(b: bytes) -> str:
-        """Extrait le texte d'un fichier PDF en bytes (nécessite pdfplumber)."""
-        if not pdfplumber:
-            raise RuntimeError("Installe pdfplumber : pip install pdfplumber")
-        parts = []
-        with pdfplumber.open(io.BytesIO(b)) as pdf:
-            for page in pdf.pages:
-                parts.append(page.extract_text() or "")
-        return "\n".join(parts)
-
-    def extract_from_pptx_bytes(b: bytes) -> str:
-        """Extrait le texte d'un fichier PPTX en bytes (nécessite python-pptx)."""
-        if not Presentation:
-            raise RuntimeError("Installe python-pptx : pip install python-pptx")
-        prs = Presentation(io.BytesIO(b))
-        texts = []
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text") and shape.text.strip():
-                    texts.append(shape.text)
-        return "\n".join(texts)
-
-
     # =====================================================
     # ========== PROMPT ET APPEL À L’IA (GEMINI) ==========
     # =====================================================
 
-    def build_prompt(text: str) -> str:
-        """Construit le prompt pour Gemini avec consignes précises pour tout extraire."""
-        short = text[:40000] if len(text) > 40000 else text
-
-        return f"""
-    Tu es un expert RH chargé d'extraire les informations détaillées d'un CV.
-
-    ⚠️ Instructions importantes :
-    - Pour la section 'experience' (expérience professionnelle), extrais uniquement les champs 'date', 'entreprise' et 'poste'.
-    - Pour la section 'taches_detaillees' et les 'activites' dans les 'projets', **tu dois inclure toutes les tâches et activités présentes dans le CV**, même si elles semblent redondantes ou longues.
-    - Ne résume pas et ne reformule pas les phrases : conserve la formulation originale des tâches dans la mesure du possible.
-    - Si le CV contient plusieurs projets ou expériences détaillées, liste-les toutes dans la section 'projets' avec leurs activités respectives.
-    - Le 'nom_candidat' correspond à la firme ou société qui présente le CV.
-    - Le 'nom_employe' correspond au nom de la personne physique.
-
-    Réponds UNIQUEMENT avec un JSON valide, sans texte explicatif, dans cette structure exacte :
-    {{
-        "poste": "",
-        "nom_candidat": "",
-        "nom_employe": "",
-        "naissance": "",
-        "nationalite": "",
-        "pays_travailles": ["", ""],
-        "education": [
-            {{"date": "", "detail": "", "lieu": ""}}
-        ],
-        "autres_formations": [
-            {{"date": "", "detail": "", "lieu": ""}}
-        ],
-        "langues": [
-            {{"langue": "", "oral": "", "lu": "", "ecrit": ""}}
-        ],
-        "experience": [
-            {{"date": "", "entreprise": "", "poste": ""}}
-        ],
-        "taches_detaillees": ["", ""],
-        "projets": [
-            {{
-                "nom": "",
-                "annee": "",
-                "lieu": "",
-                "poste": "",
-                "caracteristiques": "",
-                "activites": ["", ""]
-            }}
-        ]
-    }}
-
-    Voici le texte du CV :
-    {short}
-    """
-
-    def parse_with_llm(text: str, api_key: str) -> Dict[str, Any]:
-        """Appelle Gemini pour extraire les données en format JSON selon le schéma corrigé."""
-        if not GEMINI_AVAILABLE:
-            return {"_error": "Module google-genai non installé. Installez-le avec : pip install google-genai"}
-        if not api_key:
-            return {"_error": "Clé API Gemini manquante. Veuillez la configurer dans .streamlit/secrets.toml"}
-        
-        # Définition du schéma JSON (complet)
-        schema = types.Schema(
-            type=types.Type.OBJECT,
-            properties={
-                "poste": types.Schema(type=types.Type.STRING),
-                "nom_candidat": types.Schema(type=types.Type.STRING),
-                "nom_employe": types.Schema(type=types.Type.STRING),
-                "naissance": types.Schema(type=types.Type.STRING),
-                "nationalite": types.Schema(type=types.Type.STRING),
-                "pays_travailles": types.Schema(
-                    type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)
-                ),
-                "education": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={"date": types.Schema(type=types.Type.STRING), "detail": types.Schema(type=types.Type.STRING), "lieu": types.Schema(type=types.Type.STRING)},
-                    ),
-                ),
-                "autres_formations": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={"date": types.Schema(type=types.Type.STRING), "detail": types.Schema(type=types.Type.STRING), "lieu": types.Schema(type=types.Type.STRING)},
-                    ),
-                ),
-                "langues": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={"langue": types.Schema(type=types.Type.STRING), "oral": types.Schema(type=types.Type.STRING), "lu": types.Schema(type=types.Type.STRING), "ecrit": types.Schema(type=types.Type.STRING)},
-                    ),
-                ),
-                "experience": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={"date": types.Schema(type=types.Type.STRING), "entreprise": types.Schema(type=types.Type.STRING), "poste": types.Schema(type=types.Type.STRING)},
-                    ),
-                ),
-                "taches_detaillees": types.Schema(
-                    type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)
-                ),
-                "projets": types.Schema(
-                    type=types.Type.ARRAY,
-                    items=types.Schema(
-                        type=types.Type.OBJECT,
-                        properties={"nom": types.Schema(type=types.Type.STRING), "annee": types.Schema(type=types.Type.STRING), "lieu": types.Schema(type=types.Type.STRING), "poste": types.Schema(type=types.Type.STRING), "caracteristiques": types.Schema(type=types.Type.STRING), "activites": types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING))},
-                    ),
-                ),
-            },
-            required=["poste", "nom_candidat", "nom_employe", "education", "experience", "projets"],
-        )
-
-        # Configuration unique (une seule fois dans tout le fichier, juste après les imports)
     try:
         genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
     except:
         pass
 
-    GEMINI_MODEL = "gemini-2.5-flash"   # ou "gemini-1.5-flash" si tu veux encore plus de quota gratuit
+    # L'analyse passe par la cascade de modèles GT_LLM_MODEL_TIERS (rapide d'abord, GT_LLM_MODEL si besoin)
 
 
-    def parse_with_llm(text: str) -> dict:
-        """Version ultra-légère, identique à tes autres apps qui marchent parfaitement"""
+    def parse_with_llm(text: str, refresh: bool = False, on_field=None) -> dict:
+        """Version ultra-légère, identique à tes autres apps qui marchent parfaitement.
+        L'extraction canonique est servie depuis le cache partagé sauf si refresh=True.
+        Avec on_field, la réponse arrive en streaming et chaque champ complet est signalé."""
         
         if not text.strip():
             return {"_error": "Aucun texte extrait"}
 
-        prompt = build_prompt(text[:40000])   # garde ta fonction build_prompt existante
-
         try:
-            model = genai.GenerativeModel(
-                model_name=GEMINI_MODEL,
-                generation_config={
-                    "temperature": 0.0,
-                    "response_mime_type": "application/json"
-                }
-            )
-
-            response = model.generate_content(prompt)
-            raw = response.text.strip()
-
-            # Nettoie les ```json que Gemini ajoute parfois Gemini
-            if raw.startswith("```json"):
-                raw = raw[7:]
-            if raw.endswith("```"):
-                raw = raw[:-3]
-
-            return json.loads(raw)
+            # Extraction canonique partagée avec les autres outils (canonical.py), puis projection Banque
+            canonical = extract_canonical(text, refresh=refresh, on_field=on_field)
+            return to_banque(canonical)
 
         except Exception as e:
             msg = str(e).lower()
             if "quota" in msg or "429" in msg:
-                return {"_error": "Quota Gemini dépassé (attends ou passe en payant)"}
+                return {"_error": "Quota Gemini dépassé malgré les nouvelles tentatives automatiques (attends ou passe en payant)"}
             elif "10053" in msg:
                 return {"_error": "Connexion coupée par ton antivirus/firewall → désactive Windows Defender 2 min"}
             else:
                 return {"_error": f"Erreur Gemini : {e}"}
 
+    def store_result(name: str, result: Dict[str, Any]):
+        """Remplace (ou ajoute) le résultat d'analyse d'un fichier dans la session."""
+        new_results = [(fname, data) for fname, data in st.session_state["results"] if fname != name]
+        new_results.append((name, result))
+        st.session_state["results"] = new_results
+
+    def remember_fingerprint(name: str, text: str, sig=None):
+        """Ajoute un CV analysé à l'historique des empreintes (détection des quasi-doublons)."""
+        get_history().add(document_id(text), name, sig or minhash(text))
+
+    def history_duplicate(text: str, sig=None):
+        """(résultat, Match) si un quasi-doublon de ce CV a déjà été analysé, sinon (None, None).
+        Sans appel Streamlit : utilisable depuis les threads de l'analyse groupée."""
+        match = get_history().find(sig or minhash(text), exclude=document_id(text))
+        canonical = cached_canonical(match.doc_id) if match else None
+        if canonical is None:
+            return None, None
+        return to_banque(canonical), match
+
+    def analyze_all(files, max_workers: int, refresh: bool = False):
+        """Analyse tous les CV en parallèle (au plus max_workers appels Gemini à la fois),
+        avec un tableau de progression mis à jour en direct."""
+        texts, status, durations = {}, {}, {}
+        for f in files:
+            try:
+                texts[f.name] = ingest(f.getvalue(), f.name).text
+                status[f.name] = "⏳ En attente"
+            except Exception as e:
+                status[f.name] = f"❌ Extraction : {e}"
+
+        # Quasi-doublons dans le lot : seul le premier de chaque groupe est analysé
+        duplicates = {} if refresh else find_batch_duplicates(texts)
+        for name, match in duplicates.items():
+            status[name] = f"♻️ Doublon de {match.name} ({match.similarity:.0%})"
+        reused = {}
+
+        progress = st.progress(0.0, text="Analyse groupée en cours…")
+        table = st.empty()
+
+        def render():
+            table.dataframe(
+                [{"Fichier": n, "Statut": s, "Durée (s)": durations.get(n, "")} for n, s in status.items()],
+                hide_index=True, use_container_width=True,
+            )
+
+        def job(name, text):
+            # Exécuté dans un thread : aucun appel Streamlit ici
+            start = time.perf_counter()
+            sig = minhash(text)
+            if not refresh:
+                result, match = history_duplicate(text, sig)
+                if match:
+                    reused[name] = match
+                    durations[name] = round(time.perf_counter() - start, 1)
+                    return result
+            status[name] = "🔄 Analyse Gemini…"
+            result = parse_with_llm(text, refresh=refresh)
+            if "_error" not in result:
+                remember_fingerprint(name, text, sig)
+            durations[name] = round(time.perf_counter() - start, 1)
+            return result
+
+        render()
+        total = max(len(texts), 1)
+        done = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(job, name, text): name for name, text in texts.items() if name not in duplicates}
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    name = futures[fut]
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        # Un CV en échec ne doit pas interrompre le reste du lot
+                        result = {"_error": f"Analyse : {e}"}
+                    if "_error" in result:
+                        status[name] = f"❌ {result['_error']}"
+                    else:
+                        store_result(name, result)
+                        if name in reused:
+                            st.session_state["duplicates"][name] = (reused[name].name, reused[name].similarity)
+                            status[name] = f"♻️ Réutilisé : {reused[name].name} ({reused[name].similarity:.0%})"
+                        else:
+                            st.session_state["duplicates"].pop(name, None)
+                            status[name] = "✅ Terminé"
+                    done += 1
+                progress.progress(done / total, text=f"Analyse groupée : {done}/{len(texts)}")
+                render()
+
+        # Les doublons du lot reprennent le résultat du fichier analysé
+        results = dict(st.session_state["results"])
+        for name, match in duplicates.items():
+            if match.name in results:
+                store_result(name, results[match.name])
+                st.session_state["duplicates"][name] = (match.name, match.similarity)
+            else:
+                status[name] = f"❌ Doublon de {match.name}, dont l'analyse a échoué"
+            done += 1
+        render()
+        progress.progress(1.0, text=f"Analyse groupée terminée : {done}/{len(texts)}")
+
     # =====================================================
     # ========== GÉNÉRATION DU DOCX STANDARD =============
     # =====================================================
@@ -521,6 +455,24 @@ def main():
         doc.save(buffer)
         buffer.seek(0)
 
+    def render_docx(data: Dict[str, Any]) -> bytes:
+        """
+        Octets du DOCX standard de `data`, servis depuis le cache disque tant que le résultat
+        n'a pas changé : un rerun Streamlit (case cochée, clic…) ne relance pas python-docx.
+        La date du jour fait partie de la clé (date de l'attestation dans le document).
+        """
+        content = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        today = datetime.datetime.now().strftime("%d/%m/%Y")
+        key = f"{hash_bytes(content)}:{today}:{DOCX_RENDERER_VERSION}"
+        cached = _DOCX_CACHE.get(key)
+        if cached is not None:
+            return cached
+        buffer = io.BytesIO()
+        build_standard_docx(data, buffer)
+        docx_bytes = buffer.getvalue()
+        _DOCX_CACHE.set(key, docx_bytes)
+        return docx_bytes
+
 
 
     # =====================================================
@@ -675,6 +627,8 @@ def main():
         st.session_state["results"] = []
     if "extracted_texts" not in st.session_state:
         st.session_state["extracted_texts"] = {}
+    if "duplicates" not in st.session_state:
+        st.session_state["duplicates"] = {}  # fichier → (fichier d'origine, similarité)
 
     # --- TITRES PRINCIPAUX CENTRÉS ---
     st.markdown("<h1>Analyse & Standardisation CV</h1>", unsafe_allow_html=True)
@@ -694,9 +648,23 @@ def main():
                                     type=["docx", "pdf", "pptx"], 
                                     accept_multiple_files=True,
                                     label_visibility="visible") 
+    force_refresh = st.checkbox("🔄 Forcer une nouvelle analyse (ignorer le cache Gemini)", value=False)
 
 
     if uploaded_files:
+
+        # --- ANALYSE GROUPÉE ---
+        col_batch, col_concurrency = st.columns([0.3, 0.7])
+        with col_concurrency:
+            max_concurrency = st.slider("Appels Gemini simultanés", min_value=1, max_value=10, value=BATCH_CONCURRENCY)
+        with col_batch:
+            run_batch = st.button(f"🧠 Analyser tout ({len(uploaded_files)})", key="analyze_all")
+        if run_batch:
+            analyze_all(uploaded_files, max_concurrency, refresh=force_refresh)
+        tier_stats = TIER_STATS.summary()
+        if tier_stats:
+            with st.expander("📊 Cascade de modèles (escalades par modèle)"):
+                st.dataframe(tier_stats, use_container_width=True, hide_index=True)
         
         st.markdown("<h3>Résultats de l'Analyse</h3>", unsafe_allow_html=True)
         
@@ -708,30 +676,24 @@ def main():
             
             with col_file:
                 st.markdown(f"**📄 {uploaded.name}**")
+                if uploaded.name in st.session_state["duplicates"]:
+                    original, score = st.session_state["duplicates"][uploaded.name]
+                    st.caption(f"♻️ Quasi-doublon de « {original} » ({score:.0%}) : analyse réutilisée. "
+                               "Cochez « Forcer une nouvelle analyse » pour la relancer.")
                 
-            # --- Extraction du texte ---
+            # --- Extraction du texte (moteur commun ingestion.py, cache disque partagé) ---
             b = uploaded.read()
             text = ""
             extraction_error = None
+            if not uploaded.name.lower().endswith((".docx", ".pdf", ".pptx")):
+                st.error(f"Fichier non pris en charge : {uploaded.name}")
+                continue
             try:
-                if uploaded.name.lower().endswith(".docx"):
-                    text = extract_from_docx_bytes(b)
-                elif uploaded.name.lower().endswith(".pdf"):
-                    if not pdfplumber:
-                        st.warning(f"Pour analyser {uploaded.name} (PDF), installez : `pip install pdfplumber`")
-                        continue
-                    text = extract_from_pdf_bytes(b)
-                elif uploaded.name.lower().endswith(".pptx"):
-                    if not Presentation:
-                        st.warning(f"Pour analyser {uploaded.name} (PPTX), installez : `pip install python-pptx`")
-                        continue
-                    text = extract_from_pptx_bytes(b)
-                else:
-                    st.error(f"Fichier non pris en charge : {uploaded.name}")
-                    continue
-                
+                text = ingest(b, uploaded.name).text
                 st.session_state["extracted_texts"][uploaded.name] = text
-                
+            except ImportError as e:
+                st.warning(f"Pour analyser {uploaded.name} : {e}")
+                continue
             except Exception as e:
                 extraction_error = f"Erreur d'extraction du texte pour {uploaded.name}: {e}"
                 st.error(extraction_error)
@@ -744,17 +706,34 @@ def main():
                     #elif not api_key:
                         #st.error("Impossible de lancer l'analyse. Configurez la clé API.")
                     else:
-                        with st.spinner(f"Analyse de {uploaded.name} en cours par Gemini..."):
-                            current_text = st.session_state["extracted_texts"].get(uploaded.name, text)
-                            result = parse_with_llm(current_text)
+                        # Aperçu progressif des premiers champs pendant le streaming Gemini
+                        live = st.empty()
+                        streamed = {}
+
+                        def show_field(key, value):
+                            if key in ("poste", "nom_employe", "nom_candidat", "nationalite") and isinstance(value, str) and value:
+                                streamed[key] = value
+                                live.markdown("  \n".join(f"**{k}** : {v}" for k, v in streamed.items()))
+
+                        current_text = st.session_state["extracted_texts"].get(uploaded.name, text)
+                        sig = minhash(current_text)
+                        result, match = (None, None) if force_refresh else history_duplicate(current_text, sig)
+                        if match:
+                            # Quasi-doublon d'un CV déjà analysé : pas de nouvel appel Gemini
+                            st.session_state["duplicates"][uploaded.name] = (match.name, match.similarity)
+                        else:
+                            st.session_state["duplicates"].pop(uploaded.name, None)
+                            with st.spinner(f"Analyse de {uploaded.name} en cours par Gemini..."):
+                                result = parse_with_llm(current_text, refresh=force_refresh, on_field=show_field)
+                        live.empty()
                         
                         if "_error" in result:
                             st.error(result["_error"])
                         else:
                             # Mise à jour des résultats de session
-                            new_results = [(fname, data) for fname, data in st.session_state["results"] if fname != uploaded.name]
-                            new_results.append((uploaded.name, result))
-                            st.session_state["results"] = new_results
+                            if not match:
+                                remember_fingerprint(uploaded.name, current_text, sig)
+                            store_result(uploaded.name, result)
                             st.success(f"✅ Analyse de {uploaded.name} réussie.")
                             st.rerun() # Rafraîchir pour afficher les boutons de téléchargement
 
@@ -766,15 +745,13 @@ def main():
                 
                 # --- BOUTON DOCX (Word) ---
                 with col_btn_docx:
-                    buffer_docx = io.BytesIO()
                     output_name_docx = os.path.splitext(fname)[0] + "_GT.docx"
                     
                     try:
-                        build_standard_docx(data, buffer_docx)
-                        
+                        # Rendu mis en cache par contenu du résultat (render_docx)
                         st.download_button(
                             f"⬇️ Word (DOCX)",
-                            data=buffer_docx.getvalue(),
+                            data=render_docx(data),
                             file_name=output_name_docx,
                             mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                             key=f"download_docx_{fname}"
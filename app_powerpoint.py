@@ -1,6 +1,5 @@
 import streamlit as st
 import google.generativeai as genai
-from pptx import Presentation
 from pptx.util import Pt, Inches
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
@@ -8,16 +7,334 @@ from pptx.enum.shapes import MSO_SHAPE
 # Importation spécifique pour gérer l'indentation
 from pptx.util import Inches 
 
-from docx import Document
-from pypdf import PdfReader
 from io import BytesIO
 import os
 import re
 import json
 from pydantic import BaseModel, Field
 from typing import List
-from copy import deepcopy
 import base64
+import time
+
+from ingestion import ingest
+from canonical import extract_canonical, reextract_section, to_cvdata
+from llm_backend import DEFAULT_MODEL
+from template_plan import load_template
+from pptx_batch import generate_batch
+from pptx_media import prepare_image
+from pptx_optimize import save_pptx
+from pptx_fill import ParagraphPrototype, RowPrototype, append_paragraphs, clear_rows, clone_slide, fill_table, run_properties
+
+# ---------- COULEURS PPTX ----------
+MAUVE_FONCE = RGBColor(102, 0, 153)
+MAUVE_CLAIR = RGBColor(230, 214, 245)
+NOIR = RGBColor(0, 0, 0)
+FONT_NAME = "Trebuchet MS"
+TEMPLATE_PATH = "CV PPT template.pptx"
+
+
+# ---------- SCHEMA Pydantic ----------
+class Experience(BaseModel):
+    company: str
+    position: str
+    period: str
+
+
+class Project(BaseModel):
+    period: str
+    organization: str
+    country: str
+    summary: str
+
+
+class CVData(BaseModel):
+    NOM: str
+    POSTE: str
+    DOMAINE_D_EXPERTISE_SPECIFIQUE: str = Field(alias="DOMAINE D’EXPERTISE SPECIFIQUE")
+    FORMATION: str
+    PROFIL: str
+    CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES: str
+
+    REFERENCES_PERTINENTES: str = Field(
+        description="Liste des références professionnelles ou des organisations/clients pertinents mentionnés dans le CV. Si cette section est absente ou vide, extraire la liste des clients ou des organisations mentionnés sur le CV (e.g. CNOSP, MEN, BAD, Commission UEMOA)."
+    )
+
+    experiences: List[Experience]
+    projects: List[Project]
+
+
+# ---------- FONCTIONS PPTX (Fonctions de support pour la génération PPTX) ----------
+
+# --- INSERTION LOGO PPTX (MODIFIÉE POUR 6 LOGOS) ---
+
+
+def insert_logos_on_first_slide(prs, logo_streams):
+    """Insère une liste de logos (streams d'octets) sur la première diapositive, réduits à leur
+    taille d'affichage et ré-encodés (pptx_media.py). Retourne (erreurs, images préparées)."""
+    if not prs.slides:
+        return ["Aucune diapositive trouvée pour insérer le logo."], []
+        
+    first_slide = prs.slides[0]
+    errors, prepared = [], []
+    
+    # Paramètres de positionnement et taille pour 6 logos
+    START_LEFT = Inches(0.4)
+    TOP = Inches(4.7) 
+    LOGO_WIDTH = Inches(0.8) # Taille réduite pour en faire tenir 6
+    SPACING = Inches(0.1)
+    
+    current_left = START_LEFT
+    
+    for i, logo_stream in enumerate(logo_streams):
+        try:
+            # Image réduite à 0.8" au DPI cible ; deux logos identiques partagent la même partie média
+            image = prepare_image(logo_stream.read(), LOGO_WIDTH)
+            first_slide.shapes.add_picture(BytesIO(image.data), current_left, TOP, width=LOGO_WIDTH)
+            prepared.append(image)
+            
+            # Calcule la position pour le logo suivant
+            current_left += LOGO_WIDTH + SPACING
+            
+            # Limite stricte à 6 logos (indices 0 à 5)
+            if i >= 5: 
+                break
+                
+        except Exception as e:
+            errors.append(f"Erreur lors de l'insertion du logo {i+1}: {e}")
+            
+    return errors, prepared
+# --- FIN INSERTION LOGO ---
+
+
+def get_template_info(template_path):
+    """Template prêt à remplir, via le plan de rendu précompilé (template_plan.py) :
+    analysé une seule fois par version du fichier, octets gardés en mémoire."""
+    return load_template(template_path)
+
+
+def fill_experiences(prs, template_slide, template_table, experiences):
+    if not template_slide or not experiences: return
+    # Trouver l'index de la diapositive d'expérience pour savoir où insérer les duplications
+    slide_id = next((i for i, slide in enumerate(prs.slides) if slide == template_slide), None)
+    if slide_id is None: return
+
+    # Pagination : 10 expériences par diapositive. Les suites sont des copies de la diapo
+    # template encore vierge (images comprises), insérées juste après elle.
+    pages = [experiences[i:i + 10] for i in range(0, len(experiences), 10)]
+    clear_rows(template_table)  # lignes d'exemple du template : inutile de les recopier
+    slides = [template_slide] + [clone_slide(prs, template_slide, after=slide_id + n) for n in range(len(pages) - 1)]
+
+    # Ligne modèle pré-formatée (fond mauve clair, 11pt, retraits nuls) construite une seule fois
+    prototype = RowPrototype(template_table, Inches(0.45), MAUVE_CLAIR, FONT_NAME, 11, NOIR)
+
+    for slide, batch in zip(slides, pages):
+        table = next((s.table for s in slide.shapes if s.has_table), None)
+        if table:
+            # Colonnes : Société, Poste, Période
+            fill_table(table, prototype, [[e.company or "", e.position or "", e.period or ""] for e in batch])
+
+
+def fill_projects(prs, slides, projects):
+    slides = [s for s in slides if any(sh.has_table for sh in s.shapes)]
+    if not slides or not projects:
+        return
+
+    # 3 projets par slide : si les slides du template ne suffisent pas, copier la dernière
+    # (encore vierge) autant de fois que nécessaire, à la suite
+    missing = -(-len(projects) // 3) - len(slides)
+    if missing > 0:
+        last = slides[-1]
+        last_id = prs.slides.index(last)
+        clear_rows(next(sh.table for sh in last.shapes if sh.has_table))
+        slides += [clone_slide(prs, last, after=last_id + n) for n in range(missing)]
+
+    for n, slide in enumerate(slides):
+        batch = projects[n * 3:(n + 1) * 3]
+        if not batch:
+            break
+        table = next(s.table for s in slide.shapes if s.has_table)
+        prototype = RowPrototype(table, Inches(0.60), MAUVE_CLAIR, FONT_NAME, 11, NOIR)
+        rows = []
+        for project in batch:
+            # SUMMARY : TOUT EN PUCES (découpé sur les points suivis d'un espace)
+            lines = [l.strip() for l in re.split(r'\.\s+', (project.summary or "").strip()) if l.strip()]
+            rows.append([project.period or "", project.organization or "", project.country or "",
+                         ["• " + l for l in lines]])
+        fill_table(table, prototype, rows)
+
+
+def apply_formatting(prs):
+    """
+    Applique le formatage final uniquement aux titres statiques spécifiques 
+    qui ne sont pas remplis par l'IA (pour ne pas écraser le formatage inséré).
+    """
+    STATIC_SPECIAL_TEXT = ["CV DÉTAILLÉ", "DIRECTEUR DE MISSION", "ÉQUIPE D’INTERVENTION"] 
+
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if not shape.has_text_frame: continue
+
+            text = " ".join(p.text for p in shape.text_frame.paragraphs).upper()
+
+            # Formatage SPÉCIAL pour les TITRES STATIQUES (ceux qui ne sont pas remplis par le CV)
+            if any(x in text for x in STATIC_SPECIAL_TEXT): 
+                for p in shape.text_frame.paragraphs:
+                    p.alignment = PP_ALIGN.CENTER
+                    for run in p.runs:
+                        run.font.name = FONT_NAME
+                        run.font.size = Pt(18)
+                        run.font.color.rgb = MAUVE_FONCE
+                continue
+
+
+def fill_placeholders(placeholders, mapping):
+    """Remplace les placeholders du template : titres (NOM, POSTE) et sections à puces."""
+    pydantic_to_pptx_token = {
+        "NOM": "NOM",
+        "POSTE": "POSTE",
+        "DOMAINE D’EXPERTISE SPECIFIQUE": "DOMAINE D’EXPERTISE SPECIFIQUE",
+        "FORMATION": "FORMATION",
+        "PROFIL": "PROFIL",
+        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": "CERTIFICATIONS PROFESSIONNELLES PERTINENTES",
+        "REFERENCES_PERTINENTES": "REFERENCES PERTINENTES"
+    }
+
+    MAIN_TITLES_KEYS = ["NOM", "POSTE"]
+    SECTION_HEADERS_KEYS = [
+        "PROFIL", 
+        "DOMAINE D’EXPERTISE SPECIFIQUE", 
+        "REFERENCES_PERTINENTES", 
+        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES",
+        "FORMATION" 
+    ]
+
+    DISPLAY_TITLES = {
+        "PROFIL": "PROFIL",
+        "DOMAINE D’EXPERTISE SPECIFIQUE": "DOMAINE D'EXPERTISE SPÉCIFIQUE",
+        "REFERENCES_PERTINENTES": "RÉFÉRENCES PERTINENTES",
+        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": "CERTIFICATIONS PROFESSIONNELLES PERTINENTES",
+        "FORMATION": "FORMATION",
+    }
+
+    # Paragraphe de contenu (11pt, noir, aligné à gauche, sans retrait) préparé une fois
+    content_paragraph = ParagraphPrototype(run_properties(FONT_NAME, 11, NOIR), align="l")
+
+    for ph_key, shapes in placeholders.items():
+        value = mapping.get(ph_key, "").strip()
+        token = pydantic_to_pptx_token.get(ph_key, ph_key)
+
+        for s in shapes:
+            if s.has_text_frame and token in s.text:
+
+                # 1. Gestion des Titres Principaux (NOM, POSTE)
+                if ph_key in MAIN_TITLES_KEYS:
+                    # Remplacer le token directement
+                    s.text = s.text.replace(token, str(value))
+
+                    # DÉTERMINATION DE LA TAILLE DE POLICE ADAPTATIVE
+                    font_size = Pt(12) # Taille par défaut pour le NOM (12pt)
+                    if ph_key == "POSTE":
+                        # Ajustement très léger pour le POSTE si très long
+                        if len(str(value)) > 35:
+                            font_size = Pt(12)
+                        else:
+                            font_size = Pt(12)
+
+                    # Appliquer le formatage aux paragraphes existants
+                    for p in s.text_frame.paragraphs:
+                        p.alignment = PP_ALIGN.CENTER
+                        if hasattr(p, 'paragraph_format'):
+                            p.paragraph_format.left_indent = Inches(0)
+                            p.paragraph_format.first_line_indent = Inches(0)
+
+                        for run in p.runs:
+                            run.font.name = FONT_NAME
+                            run.font.size = font_size
+                            run.font.color.rgb = NOIR
+                            run.font.bold = True
+
+                # 2. Gestion des En-têtes de Section (PROFIL, DOMAINE, FORMATION, etc.) 
+                elif ph_key in SECTION_HEADERS_KEYS:
+                    title_text = DISPLAY_TITLES.get(ph_key, ph_key).upper()
+                    tf = s.text_frame
+
+                    # a) Vider la zone de texte du placeholder (sauf le premier paragraphe qui devient le titre)
+                    for p in tf.paragraphs[1:]:
+                        p._p.getparent().remove(p._p)
+                    tf.paragraphs[0].text = "" # Vider le texte de l'ancien placeholder
+
+                    # b) Recréer le titre de section dans le premier paragraphe
+                    title_p = tf.paragraphs[0]
+                    title_p.text = title_text
+                    title_p.level = 0
+                    title_p.alignment = PP_ALIGN.LEFT
+
+                    # Formatage du titre
+                    for run in title_p.runs:
+                        run.font.name = FONT_NAME
+                        run.font.size = Pt(14) # Taille pour les titres de section
+                        run.font.color.rgb = NOIR
+                        run.font.bold = True
+
+                    # c) Insérer le contenu s'il n'est pas vide, un paragraphe pré-formaté par ligne
+                    #    PROFIL : texte simple ; CERTIFICATIONS : puce '✔' ; autres : puce '•'
+                    if value:
+                        items = [item.strip() for item in str(value).split('\n') if item.strip()]
+                        prefix = {"PROFIL": "", "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": "✔ "}.get(ph_key, "• ")
+                        append_paragraphs(tf._txBody, content_paragraph, [prefix + line for line in items])
+
+
+def render_cv_pptx(data, selections=None, logo_streams=(), template_path=TEMPLATE_PATH):
+    """
+    Génère le PPTX d'un CV : (octets du fichier, rapport). Le rapport contient les erreurs
+    d'insertion des logos, leur poids avant/après préparation, la taille du PPTX et le
+    temps de sauvegarde.
+    `selections` remplace le contenu des champs à cases à cocher (clés du mapping) ;
+    sans sélection, le champ complet est repris (génération en lot).
+    """
+    placeholders, exp_slide, exp_table, proj_slides, prs = get_template_info(template_path)
+
+    # --- INSERTION LOGOS ---
+    logo_errors, logos = insert_logos_on_first_slide(prs, logo_streams) if logo_streams else ([], [])
+
+    mapping = {
+        "NOM": data.NOM,
+        "POSTE": data.POSTE,
+        "DOMAINE D’EXPERTISE SPECIFIQUE": data.DOMAINE_D_EXPERTISE_SPECIFIQUE,
+        "FORMATION": data.FORMATION,
+        "PROFIL": data.PROFIL, # Le profil est toujours inclus
+        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": data.CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES,
+        "REFERENCES_PERTINENTES": data.REFERENCES_PERTINENTES,
+    }
+    mapping.update(selections or {})
+    fill_placeholders(placeholders, mapping)
+
+    # --- Remplissage des Expériences et Projets ---
+    fill_experiences(prs, exp_slide, exp_table, data.experiences)
+    fill_projects(prs, proj_slides, data.projects)
+
+    # --- Formatage final des titres statiques ---
+    apply_formatting(prs)
+
+    # Sauvegarde allégée : layouts/médias inutilisés retirés, XML recompressé (pptx_optimize.py)
+    start = time.perf_counter()
+    pptx_bytes = save_pptx(prs)
+    report = {
+        "logo_errors": logo_errors,
+        "logos_in": sum(image.original_size for image in logos),
+        "logos_out": sum(image.size for image in logos),
+        "size": len(pptx_bytes),
+        "save_s": time.perf_counter() - start,
+    }
+    return pptx_bytes, report
+
+
+def render_batch_job(payload):
+    """Rendu d'un CV de la génération en lot (dans un worker de pptx_batch) : (CVData, logos en octets)."""
+    data, logos = payload
+    return render_cv_pptx(data, logo_streams=[BytesIO(logo) for logo in logos])[0]
+
+
 def main():
     # --- CONFIG ---
     st.set_page_config(page_title="GTT CV Builder",page_icon="image.png", layout="wide")
@@ -27,6 +344,8 @@ def main():
         st.session_state.cv_data = None
     if 'cv_text' not in st.session_state:
         st.session_state.cv_text = None
+    if 'cv_canonical' not in st.session_state:
+        st.session_state.cv_canonical = None
 
     # ---------- DESIGN STREAMLIT (logo + CSS + header) ----------
     # NOTE: Le chemin vers le logo doit être valide pour que le code fonctionne localement.
@@ -132,12 +451,6 @@ def main():
     st.markdown("Génération du format Grant Thornton Technologies")
     st.divider()
 
-    # ---------- COULEURS PPTX ----------
-    MAUVE_FONCE = RGBColor(102, 0, 153)
-    MAUVE_CLAIR = RGBColor(230, 214, 245)
-    NOIR = RGBColor(0, 0, 0)
-    FONT_NAME = "Trebuchet MS"
-
     # ---------- API GEMINI ----------
     try:
         # Utiliser st.secrets pour la clé API
@@ -149,382 +462,94 @@ def main():
         # Pour le code local, s'assurer que la clé est bien configurée.
         pass 
         
-    GEMINI_MODEL = "gemini-2.5-flash"
-
-    # ---------- SCHEMA Pydantic ----------
-    class Experience(BaseModel):
-        company: str
-        position: str
-        period: str
-
-    class Project(BaseModel):
-        period: str
-        organization: str
-        country: str
-        summary: str
-
-    class CVData(BaseModel):
-        NOM: str
-        POSTE: str
-        DOMAINE_D_EXPERTISE_SPECIFIQUE: str = Field(alias="DOMAINE D’EXPERTISE SPECIFIQUE")
-        FORMATION: str
-        PROFIL: str
-        CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES: str
-        
-        REFERENCES_PERTINENTES: str = Field(
-            description="Liste des références professionnelles ou des organisations/clients pertinents mentionnés dans le CV. Si cette section est absente ou vide, extraire la liste des clients ou des organisations mentionnés sur le CV (e.g. CNOSP, MEN, BAD, Commission UEMOA)."
-        )
-        
-        experiences: List[Experience]
-        projects: List[Project]
+    GEMINI_MODEL = DEFAULT_MODEL  # GT_LLM_MODEL (ré-extractions ciblées ; l'analyse complète passe par la cascade)
+
+    # Champs affichés pendant le streaming de l'analyse (clé canonique → libellé)
+    LIVE_FIELDS = {
+        "nom_employe": "Nom",
+        "poste": "Poste",
+        "profil": "Profil",
+        "domaines_expertise": "Domaines d'expertise",
+        "education": "Formation",
+        "experience": "Expériences",
+        "projets": "Projets",
+    }
 
     # ---------- EXTRACTION CV ----------
     def extract_cv_text(file):
-        text = ""
+        """Lecture via le moteur commun (ingestion.py) : PDF/DOCX/PPTX, cache disque partagé."""
         try:
-            if file.type == "application/pdf":
-                reader = PdfReader(file)
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-                    text += "\n\n--- Nouvelle Page ---\n\n"
-            elif file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                doc = Document(file)
-                for para in doc.paragraphs:
-                    text += para.text + "\n"
-                for table in doc.tables:
-                    text += "\n--- Contenu de Tableau (DOCX) ---\n"
-                    for row in table.rows:
-                        row_text = " | ".join(cell.text.strip().replace("\n", " ") for cell in row.cells)
-                        text += row_text + "\n"
-                    text += "--- Fin de Tableau (DOCX) ---\n"
-            elif file.type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
+            if file.type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
                 st.warning("L'extraction de texte depuis un fichier PPTX est moins fiable que PDF/DOCX. Les données peuvent être incomplètes.")
-                prs = Presentation(file)
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if shape.has_text_frame:
-                            text += shape.text_frame.text + "\n"
-                        if shape.has_table:
-                            for row in shape.table.rows:
-                                row_text = " | ".join(cell.text.strip().replace("\n", " ") for cell in row.cells)
-                                text += row_text + "\n"
-                            text += row_text + "\n" # Pour s'assurer qu'un saut de ligne est après
-                
+            text = ingest(file.getvalue(), file.name).text
             return re.sub(r'\s{3,}', '\n\n', text).strip()
         except Exception as e:
             st.error(f"Erreur lecture CV : {e}")
             return None
 
-    # ---------- ANALYSE CV AVEC GEMINI (PROMPT MIS À JOUR : PLUS DE LIMITE À 4) ----------
-    @st.cache_resource(show_spinner="Analyse du CV avec Gemini...")
-    def analyze_cv_with_gemini(text):
-        """Appelle Gemini pour analyser le texte et le valider contre le schéma Pydantic. Prompt plus précis pour PROFIL/FORMATION/DOMAINE."""
-        prompt = f"""
-    Tu es expert RH sénégalais. Extrais TOUT le contenu du CV suivant au format JSON strict. 
-
-    Instructions cruciales pour l'extraction :
-    1.  **PROFIL**: Extrais le profil professionnel. Limitation stricte à 4 phrases maximum. Sépare chaque phrase par un caractère de **retour à la ligne unique ('\n')** pour forcer l'affichage vertical (une phrase par ligne). Rédige un profil concis et percutant.
-    2.  **DOMAINE D’EXPERTISE SPECIFIQUE**: Extrais **TOUS** les domaines d'expertise pertinents listés dans le CV. Sépare chaque domaine par un caractère de **retour à la ligne unique ('\n')** dans le JSON.
-    3.  **FORMATION**: Extrais **TOUTES** les formations ou diplômes pertinents listés dans le CV. Sépare chaque formation par un caractère de **retour à la ligne unique ('\n')** dans le JSON.
-    4. **REFERENCES_PERTINENTES**: Extrais **TOUTES** les références professionnelles, clients ou organisations mentionnés dans le CV. Sépare chaque référence par un caractère de **retour à la ligne unique ('\n')** dans le JSON.
-    5. **CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES**: Extrais **TOUTES** les certifications professionnelles pertinentes listées dans le CV. Sépare chaque certification par un caractère de **retour à la ligne unique ('\n')** dans le JSON.
-
-
-    Extrais les champs suivants :
-    - NOM, POSTE, PROFIL, DOMAINE D’EXPERTISE SPECIFIQUE
-    - FORMATION, CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES, REFERENCES_PERTINENTES
-    Pour le champ REFERENCES_PERTINENTES : 
-    - Extrais toutes les références professionnelles ou organisations mentionnées dans le CV. 
-    - Si une mission ou un rôle associé est mentionné, ajoute-la **après un double point**. 
-    - Chaque ligne doit respecter le format exact : "Référence : Mission(Année ou Période)". 
-    - Extrais la période (Année, Années, ou Période Complète) si elle est associée à la référence et ajoute-la entre parenthèses à la fin.
-    - Si aucune mission n’est mentionnée pour une référence, mets seulement le nom de la référence.
-    - experiences : toutes les expériences (company, position, period)
-    - projects : tous les projets (period, organization, country, summary)
-
-
-    CV :
-
-    {text[:49000]}
-    """
+    # ---------- ANALYSE CV AVEC GEMINI (EXTRACTION CANONIQUE PARTAGÉE) ----------
+    def analyze_cv_with_gemini(text, refresh=False, on_field=None):
+        """Extraction canonique (canonical.py, partagée avec les autres outils) projetée puis validée contre CVData.
+        Résultat servi depuis le cache disque par document sauf si refresh=True.
+        Réponse en streaming : on_field(clé, valeur) est appelé dès qu'un champ canonique est complet."""
         try:
-            model = genai.GenerativeModel(GEMINI_MODEL,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json",
-                    response_schema=CVData,
-                    temperature=0.0
-                ))
-            response = model.generate_content(prompt)
-            raw = response.text.strip()
-            
-            # Nettoyage pour les blocs de code Markdown
-            if raw.startswith("```"): 
-                raw = raw.split("```",1)[1].rsplit("```",1)[0]
-            if raw.startswith("json\n"):
-                raw = raw[5:]
-
-            return CVData.model_validate(json.loads(raw))
+            canonical = extract_canonical(text, refresh=refresh, on_field=on_field,
+                                           validate=lambda c: CVData.model_validate(to_cvdata(c)))
+            st.session_state.cv_canonical = canonical
+            return CVData.model_validate(to_cvdata(canonical))
         except json.JSONDecodeError as e:
             st.error(f"Erreur de décodage JSON de Gemini : Le modèle n'a pas renvoyé un JSON valide. {e}")
-            st.code(raw)
+            st.code(e.doc)
             return None
         except Exception as e:
             st.error(f"Erreur d'API ou de validation Pydantic : {e}")
             return None
 
-    # ---------- FONCTIONS PPTX (Fonctions de support pour la génération PPTX) ----------
-
-    # --- INSERTION LOGO PPTX (MODIFIÉE POUR 6 LOGOS) ---
-    def insert_logos_on_first_slide(prs, logo_streams):
-        """Insère une liste de logos (streams d'octets) sur la première diapositive."""
-        if not prs.slides:
-            st.warning("Aucune diapositive trouvée pour insérer le logo.")
-            return
-            
-        first_slide = prs.slides[0]
-        
-        # Paramètres de positionnement et taille pour 6 logos
-        START_LEFT = Inches(0.4)
-        TOP = Inches(4.7) 
-        LOGO_WIDTH = Inches(0.8) # Taille réduite pour en faire tenir 6
-        SPACING = Inches(0.1)
-        
-        current_left = START_LEFT
-        
-        for i, logo_stream in enumerate(logo_streams):
-            try:
-                # Ajoute l'image à partir du stream d'octets (BytesIO)
-                first_slide.shapes.add_picture(logo_stream, current_left, TOP, width=LOGO_WIDTH)
-                
-                # Calcule la position pour le logo suivant
-                current_left += LOGO_WIDTH + SPACING
-                
-                # Limite stricte à 6 logos (indices 0 à 5)
-                if i >= 5: 
-                    break
-                    
-            except Exception as e:
-                st.warning(f"Erreur lors de l'insertion du logo {i+1}: {e}")
-                
-        st.success(f"Tentative d'insertion de {min(len(logo_streams), 6)} logos sur la première diapositive.")
-    # --- FIN INSERTION LOGO ---
-    # --- FIN INSERTION LOGO ---
-
-    def get_template_info(template_path):
-        prs = Presentation(template_path)
-        placeholders = {}
-        exp_slide = None
-        exp_table = None
-        proj_slides = []
-
-        placeholder_keys = {
-            "NOM": ["NOM"],
-            "POSTE": ["POSTE"],
-            "DOMAINE D’EXPERTISE SPECIFIQUE": ["DOMAINE D’EXPERTISE SPECIFIQUE", "DOMAINE D'EXPERTISE SPECIFIQUE", "DOMAINE D EXPERTISE SPECIFIQUE"],
-            "FORMATION": ["FORMATION"],
-            "PROFIL": ["PROFIL"],
-            "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": ["CERTIFICATIONS PROFESSIONNELLES PERTINENTES", "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES", "CERTIFICATIONS"],
-            "REFERENCES_PERTINENTES": ["REFERENCES PERTINENTES", "REFERENCES_PERTINENTES", "REFERENCES"]
-        }
-
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if shape.has_text_frame:
-                    txt = shape.text_frame.text.upper().replace("_", " ")
-                    for key, variants in placeholder_keys.items():
-                        if any(var.upper() in txt for var in variants):
-                            placeholders.setdefault(key, []).append(shape)
-                if shape.has_table:
-                    if not shape.table.rows or not shape.table.rows[0].cells:
-                        continue
-                    header = " ".join(c.text.lower() for c in shape.table.rows[0].cells)
-                    if any(k in header for k in ["société", "company", "poste", "période", "emploi"]):
-                        if not exp_slide:
-                            exp_slide = slide
-                            exp_table = shape.table
-                    if any(k in header for k in ["organisation", "country", "pays", "résumé", "summary"]):
-                        proj_slides.append(slide)
-
-        return placeholders, exp_slide, exp_table, proj_slides, prs
-
-    def insert_row(table):
-        if not table.rows:
-            raise IndexError("Tableau corrompu : Impossible de trouver une ligne modèle.")
-        new_row_index = len(table.rows)
-        # Copie la structure de la première ligne comme modèle
-        template_row_tr = table.rows[0]._tr
-        tr = deepcopy(template_row_tr)
-        # Insère la nouvelle ligne
-        table._tbl.append(tr)
-        # Force la mise à jour de la liste des lignes (important après ajout)
-        table._rows = None
-        return table.rows[new_row_index]
-
-    def duplicate_slide(prs, slide):
-        # Créer une nouvelle diapositive avec le même layout
-        new_slide = prs.slides.add_slide(slide.slide_layout)
-        # Copier les formes (shapes) de la diapositive source vers la nouvelle
-        for shape in slide.shapes:
-            el = deepcopy(shape.element)
-            new_slide.shapes._spTree.insert_element_before(el, "p:extLst")
-        return new_slide
-
-    def fill_experiences(prs, template_slide, template_table, experiences):
-        if not template_slide or not experiences: return
-        # Trouver l'index de la diapositive d'expérience pour savoir où insérer les duplications
-        slide_id = next((i for i, slide in enumerate(prs.slides) if slide == template_slide), None)
-        if slide_id is None: return
-        
-        idx = 0
-        while idx < len(experiences):
-            # Utiliser la diapo template pour la première itération, puis dupliquer pour les suivantes
-            slide = prs.slides[slide_id] if idx == 0 else duplicate_slide(prs, template_slide)
-            
-            # Trouver le tableau sur la diapositive
-            table = next((s.table for s in slide.shapes if s.has_table), None)
-            if not table: 
-                idx += 10 # Passer à la diapo suivante (si on a sauté la duplication)
-                continue
-                
-            # Nettoyer les lignes existantes du tableau (sauf l'en-tête)
-            table._rows = None
-            while len(table.rows) > 1:
-                table._tbl.remove(table.rows[1]._tr)
-                table._rows = None
-                
-            # Remplir jusqu'à 10 lignes par diapositive
-            for _ in range(10):
-                if idx >= len(experiences): break
-                row = insert_row(table)
-                row.height = Inches(0.45)   # AUGMENTE LA HAUTEUR ICI (0.45 = encore plus grand)
-                if len(row.cells) >= 3:
-                    # Colonne 1: Société/Company
-                    row.cells[0].text = experiences[idx].company or ""
-                    # Colonne 2: Poste/Position
-                    row.cells[1].text = experiences[idx].position or ""
-                    # Colonne 3: Période
-                    row.cells[2].text = experiences[idx].period or ""
-                    
-                    for cell in row.cells:
-                        # Appliquer le fond clair (Mauve clair)
-                        cell.fill.solid()
-                        cell.fill.fore_color.rgb = MAUVE_CLAIR
-                        
-                        for paragraph in cell.text_frame.paragraphs:
-                            # Rétablir le niveau de retrait à 0 (pour les tableaux)
-                            paragraph.level = 0
-                            
-                            # Réinitialiser les indentations pour éviter les décalages
-                            if hasattr(paragraph, 'paragraph_format'):
-                                paragraph.paragraph_format.left_indent = Inches(0)
-                                paragraph.paragraph_format.first_line_indent = Inches(0)
-                                
-                            # S'assurer qu'un run existe pour le formatage si le texte est vide
-                            if not paragraph.runs:
-                                paragraph.text = cell.text
-                            
-                            # Appliquer le formatage de police
-                            for run in paragraph.runs:
-                                run.font.name = FONT_NAME
-                                run.font.size = Pt(11) # Taille standard (11pt)
-                                run.font.color.rgb = NOIR
-                                run.font.bold = False
-                idx += 1
-    def fill_projects(prs, slides, projects):
-        i = 0
-        for slide in slides:
-
-            # Chercher le tableau dans la slide
-            table = next((s.table for s in slide.shapes if s.has_table), None)
-            if not table or i >= len(projects):
-                continue
-
-            # Réinitialisation des lignes existantes
-            table._rows = None
-            while len(table.rows) > 1:
-                table._tbl.remove(table.rows[1]._tr)
-                table._rows = None
-
-            # Insérer jusqu'à 3 projets par slide
-            for _ in range(3):
-                if i >= len(projects):
-                    break
-
-                row = insert_row(table)
-                row.height = Inches(0.60)
-
-                if row and len(row.cells) >= 4:
-
-                    # Remplissage des colonnes classiques
-                    row.cells[0].text = projects[i].period
-                    row.cells[1].text = projects[i].organization
-                    row.cells[2].text = projects[i].country
-
-                    # ============================
-                    #  SUMMARY : TOUT EN PUCES
-                    # ============================
-                    summary_cell = row.cells[3]
-                    summary_cell.text = ""  # vider avant de reconstruire
-
-                    raw_summary = projects[i].summary.strip()
-                    # Découper sur les retours à la ligne ou les points suivis d'un espace
-                    lines = re.split(r'\.\s+', raw_summary)
-                    lines = [l.strip() for l in lines if l.strip()]
-                    tf = summary_cell.text_frame
-                    tf.clear()
-
-                    for l in lines:
-                        p = tf.add_paragraph()
-                        p.level = 0
-                        p.text = "• " + l
-                        if p.runs:
-                            for r in p.runs:
-                                r.font.size = Pt(11)
-                                r.font.bold = False
-                                r.font.name = 'Trebuchet MS'
-                                r.font.color.rgb = NOIR
-
-                    # ============================
-                    # STYLE GENERAL DES CELLULES (toutes)
-                    # ============================
-                    for cell in row.cells:
-                        cell.fill.solid()
-                        cell.fill.fore_color.rgb = MAUVE_CLAIR
-                        for p in cell.text_frame.paragraphs:
-                            p.level = 0
-                            if hasattr(p, 'paragraph_format'):
-                                p.paragraph_format.left_indent = Inches(0)
-                                p.paragraph_format.first_line_indent = Inches(0)
-                            for r in p.runs:
-                                r.font.size = Pt(11)
-                                r.font.name = 'Trebuchet MS'
-                                r.font.bold = False  # DESACTIVER GRAS
-                                r.font.color.rgb = NOIR
-
-                i += 1
-    def apply_formatting(prs):
-        """
-        Applique le formatage final uniquement aux titres statiques spécifiques 
-        qui ne sont pas remplis par l'IA (pour ne pas écraser le formatage inséré).
-        """
-        STATIC_SPECIAL_TEXT = ["CV DÉTAILLÉ", "DIRECTEUR DE MISSION", "ÉQUIPE D’INTERVENTION"] 
-        
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if not shape.has_text_frame: continue
-                
-                text = " ".join(p.text for p in shape.text_frame.paragraphs).upper()
-                
-                # Formatage SPÉCIAL pour les TITRES STATIQUES (ceux qui ne sont pas remplis par le CV)
-                if any(x in text for x in STATIC_SPECIAL_TEXT): 
-                    for p in shape.text_frame.paragraphs:
-                        p.alignment = PP_ALIGN.CENTER
-                        for run in p.runs:
-                            run.font.name = FONT_NAME
-                            run.font.size = Pt(18)
-                            run.font.color.rgb = MAUVE_FONCE
-                    continue 
-
+    # Ré-extraction ciblée : section proposée → (groupe canonique, champs CVData, sélections à réinitialiser)
+    SECTION_FIXES = {
+        "Nom / Poste": ("identite", ["NOM", "POSTE"], []),
+        "Profil": ("profil", ["PROFIL"], []),
+        "Références Pertinentes": ("references", ["REFERENCES_PERTINENTES"], ["selected_references"]),
+        "Domaine d'Expertise": ("competences", ["DOMAINE_D_EXPERTISE_SPECIFIQUE"], ["selected_domaines"]),
+        "Formation & Certifications": ("formation", ["FORMATION", "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES"],
+                                       ["selected_formations", "selected_certifications"]),
+        "Expériences": ("experience", ["experiences"], []),
+        "Projets": ("projets", ["projects"], []),
+    }
+
+    def reanalyze_section(label, refresh=False):
+        """Ré-extrait une seule section (extrait du CV + sous-schéma) et ne met à jour que ses champs
+        dans cv_data : les autres champs, y compris les modifications manuelles, sont conservés."""
+        group, fields, selections = SECTION_FIXES[label]
+        try:
+            canonical = reextract_section(st.session_state.cv_text, st.session_state.cv_canonical,
+                                          group, GEMINI_MODEL, refresh=refresh)
+            fresh = CVData.model_validate(to_cvdata(canonical))
+        except Exception as e:
+            st.error(f"Erreur lors de la ré-extraction de la section : {e}")
+            return False
+        st.session_state.cv_canonical = canonical
+        for field in fields:
+            setattr(st.session_state.cv_data, field, getattr(fresh, field))
+        for key in selections:
+            st.session_state[key] = {}
+        return True
+
+    # ---------- GÉNÉRATION EN LOT (ÉQUIPE D'UNE OFFRE) ----------
+    def analyze_for_batch(file):
+        """Texte + extraction canonique d'un CV du lot (exécuté dans un thread : aucun appel Streamlit)."""
+        text = ingest(file.getvalue(), file.name).text
+        canonical = extract_canonical(text, validate=lambda c: CVData.model_validate(to_cvdata(c)))
+        return CVData.model_validate(to_cvdata(canonical))
+
+    def run_batch(files, logo_files):
+        """Analyse et rendu de tous les CV (pptx_batch.generate_batch), avec les logos chargés."""
+        logos = [f.getvalue() for f in logo_files] if logo_files else []
+        st.session_state.batch_zip, st.session_state.batch_summary = generate_batch(
+            files, analyze_for_batch, render_batch_job, TEMPLATE_PATH,
+            output_name=lambda data: f"CV_{data.NOM.replace(' ', '_')}_GTT.pptx",
+            job=lambda data: (data, logos),
+        )
 
     # --------------------------------------------------------------------------------------
     # ---------- LOGIQUE DE SÉLECTION PAR CHECKBOXES ---------------------------------------
@@ -662,7 +687,7 @@ def main():
         st.dataframe(proj_data, use_container_width=True, hide_index=True)
         
     # ---------- MAIN LOGIC (CORRIGÉE) ----------
-    template_path = "CV PPT template.pptx" 
+    template_path = TEMPLATE_PATH
     if not os.path.exists(template_path):
         st.error(f"Template PPTX manquant : {template_path} ! Assurez-vous d'avoir le fichier 'CV PPT template.pptx' dans le même répertoire.")
 
@@ -677,6 +702,7 @@ def main():
 
     # --- BOUTON D'ANALYSE ---
     if cv_file:
+        force_refresh = st.checkbox("🔄 Forcer une nouvelle analyse (ignorer le cache Gemini)", value=False)
         if st.button("🔍Afficher l'Analyse CV"):
             st.session_state.cv_text = extract_cv_text(cv_file)
             if st.session_state.cv_text:
@@ -686,8 +712,26 @@ def main():
                 st.session_state['selected_formations'] = {}
                 st.session_state['selected_certifications'] = {}
                 
-                # Re-exécution de l'analyse 
-                st.session_state.cv_data = analyze_cv_with_gemini(st.session_state.cv_text) 
+                # Aperçu progressif : NOM, POSTE, PROFIL… s'affichent dès que Gemini les a terminés
+                live = st.empty()
+                streamed = {}
+
+                def show_field(key, value):
+                    label = LIVE_FIELDS.get(key)
+                    if not label:
+                        return
+                    if isinstance(value, list) and value and all(isinstance(v, str) for v in value):
+                        streamed[label] = " · ".join(value)
+                    elif isinstance(value, list):
+                        streamed[label] = f"{len(value)} élément(s)"
+                    elif value:
+                        streamed[label] = str(value).replace("\n", " · ")
+                    live.markdown("\n\n".join(f"**{k} :** {v}" for k, v in streamed.items()))
+
+                # Re-exécution de l'analyse (cache disque partagé, sauf nouvelle analyse forcée)
+                with st.spinner("Analyse du CV avec Gemini..."):
+                    st.session_state.cv_data = analyze_cv_with_gemini(st.session_state.cv_text, refresh=force_refresh, on_field=show_field)
+                live.empty()
                 
                 if st.session_state.cv_data:
                     st.success("Analyse réussie ! Visualisez l'aperçu ci-dessous et effectuez vos sélections.")
@@ -700,6 +744,16 @@ def main():
         # ✅ L'AJOUT CRUCIAL POUR AFFICHER LES CHECKBOXES ET MAINTENIR LEUR ÉTAT
         if st.session_state.cv_data:
             display_analysis_preview(st.session_state.cv_data)
+
+            # Correction d'une seule section sans relancer toute l'analyse
+            if st.session_state.cv_canonical and st.session_state.cv_text:
+                with st.expander("🎯 Corriger une section (ré-extraction ciblée)"):
+                    section_label = st.selectbox("Section à ré-extraire", list(SECTION_FIXES), key="section_fix")
+                    if st.button("Ré-extraire cette section"):
+                        with st.spinner(f"Ré-extraction de la section « {section_label} »..."):
+                            ok = reanalyze_section(section_label, refresh=force_refresh)
+                        if ok:
+                            st.rerun()
             st.markdown("---")  # ligne de séparation pour faire apparaître le bouton PPTX en bas   
         # --- BOUTON DE GÉNÉRATION PPTX ---
         if st.button("⚡Générer le PPTX"):
@@ -708,7 +762,8 @@ def main():
                 st.warning("Analyse en cours... Veuillez patienter.")
                 st.session_state.cv_text = extract_cv_text(cv_file)
                 if st.session_state.cv_text:
-                    st.session_state.cv_data = analyze_cv_with_gemini(st.session_state.cv_text)
+                    with st.spinner("Analyse du CV avec Gemini..."):
+                        st.session_state.cv_data = analyze_cv_with_gemini(st.session_state.cv_text)
             
             data = st.session_state.cv_data
             
@@ -726,171 +781,29 @@ def main():
                 st.success("✅CV analysé ! Démarrage de la génération PPTX...")
                 
                 try:
-                    placeholders, exp_slide, exp_table, proj_slides, prs = get_template_info(template_path)
-
-                    # --- APPEL INSERTION LOGO ---
-                    if logo_files :
-                        # Utiliser BytesIO pour passer le contenu de l'image à la fonction sans enregistrement local
-                        logo_streams = [BytesIO(f.read()) for f in logo_files]
-                        insert_logos_on_first_slide(prs, logo_streams)
-                    # --- FIN APPEL INSERTION LOGO ---
-
-                    # MISE À JOUR DU MAPPING AVEC LES DONNÉES FILTRÉES
-                    mapping = {
-                        "NOM": data.NOM,
-                        "POSTE": data.POSTE,
+                    # Utiliser BytesIO pour passer le contenu des logos sans enregistrement local
+                    logo_streams = [BytesIO(f.getvalue()) for f in logo_files] if logo_files else []
+                    selections = {
                         "DOMAINE D’EXPERTISE SPECIFIQUE": filtered_domaines,
                         "FORMATION": filtered_formations,
-                        "PROFIL": data.PROFIL, # Le profil est toujours inclus
                         "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": filtered_certifications,
-                        "REFERENCES_PERTINENTES": filtered_references
-                    }
-                    
-                    pydantic_to_pptx_token = {
-                        "NOM": "NOM",
-                        "POSTE": "POSTE",
-                        "DOMAINE D’EXPERTISE SPECIFIQUE": "DOMAINE D’EXPERTISE SPECIFIQUE",
-                        "FORMATION": "FORMATION",
-                        "PROFIL": "PROFIL",
-                        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": "CERTIFICATIONS PROFESSIONNELLES PERTINENTES",
-                        "REFERENCES_PERTINENTES": "REFERENCES PERTINENTES"
+                        "REFERENCES_PERTINENTES": filtered_references,
                     }
 
-                    MAIN_TITLES_KEYS = ["NOM", "POSTE"]
-                    SECTION_HEADERS_KEYS = [
-                        "PROFIL", 
-                        "DOMAINE D’EXPERTISE SPECIFIQUE", 
-                        "REFERENCES_PERTINENTES", 
-                        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES",
-                        "FORMATION" 
-                    ]
-                    
-                    DISPLAY_TITLES = {
-                        "PROFIL": "PROFIL",
-                        "DOMAINE D’EXPERTISE SPECIFIQUE": "DOMAINE D'EXPERTISE SPÉCIFIQUE",
-                        "REFERENCES_PERTINENTES": "RÉFÉRENCES PERTINENTES",
-                        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": "CERTIFICATIONS PROFESSIONNELLES PERTINENTES",
-                        "FORMATION": "FORMATION",
-                    }
+                    with st.spinner("Remplissage du template PPTX..."):
+                        pptx_bytes, report = render_cv_pptx(data, selections, logo_streams, template_path)
+                    for error in report["logo_errors"]:
+                        st.warning(error)
+                    if logo_streams:
+                        st.success(f"Tentative d'insertion de {min(len(logo_streams), 6)} logos sur la première diapositive.")
+                    st.caption(
+                        f"📦 PPTX : {report['size'] / 1024:.0f} Ko · sauvegarde : {report['save_s']:.2f} s"
+                        + (f" · logos : {report['logos_in'] / 1024:.0f} Ko → {report['logos_out'] / 1024:.0f} Ko"
+                           if logo_streams else "")
+                    )
 
+                    output = BytesIO(pptx_bytes)
 
-                    with st.spinner("Remplissage du template PPTX..."):
-                        for ph_key, shapes in placeholders.items():
-                            value = mapping.get(ph_key, "").strip()
-                            token = pydantic_to_pptx_token.get(ph_key, ph_key)
-                            
-                            for s in shapes:
-                                if s.has_text_frame and token in s.text:
-                                    
-                                    # 1. Gestion des Titres Principaux (NOM, POSTE)
-                                    if ph_key in MAIN_TITLES_KEYS:
-                                        # Remplacer le token directement
-                                        s.text = s.text.replace(token, str(value))
-                                        
-                                        # DÉTERMINATION DE LA TAILLE DE POLICE ADAPTATIVE
-                                        font_size = Pt(12) # Taille par défaut pour le NOM (12pt)
-                                        if ph_key == "POSTE":
-                                            # Ajustement très léger pour le POSTE si très long
-                                            if len(str(value)) > 35:
-                                                font_size = Pt(12)
-                                            else:
-                                                font_size = Pt(12)
-                                        
-                                        # Appliquer le formatage aux paragraphes existants
-                                        for p in s.text_frame.paragraphs:
-                                            p.alignment = PP_ALIGN.CENTER
-                                            if hasattr(p, 'paragraph_format'):
-                                                p.paragraph_format.left_indent = Inches(0)
-                                                p.paragraph_format.first_line_indent = Inches(0)
-                                                
-                                            for run in p.runs:
-                                                run.font.name = FONT_NAME
-                                                run.font.size = font_size
-                                                run.font.color.rgb = NOIR
-                                                run.font.bold = True
-                                    
-                                    # 2. Gestion des En-têtes de Section (PROFIL, DOMAINE, FORMATION, etc.) 
-                                    elif ph_key in SECTION_HEADERS_KEYS:
-                                        title_text = DISPLAY_TITLES.get(ph_key, ph_key).upper()
-                                        tf = s.text_frame
-                                        
-                                        # a) Vider la zone de texte du placeholder (sauf le premier paragraphe qui devient le titre)
-                                        while len(tf.paragraphs) > 1:
-                                            p = tf.paragraphs[1]
-                                            tf.paragraphs._element.remove(p._element)
-                                        tf.paragraphs[0].text = "" # Vider le texte de l'ancien placeholder
-                                        
-                                        # b) Recréer le titre de section dans le premier paragraphe
-                                        title_p = tf.paragraphs[0]
-                                        title_p.text = title_text
-                                        title_p.level = 0
-                                        title_p.alignment = PP_ALIGN.LEFT
-                                        
-                                        # Formatage du titre
-                                        for run in title_p.runs:
-                                            run.font.name = FONT_NAME
-                                            run.font.size = Pt(14) # Taille pour les titres de section
-                                            run.font.color.rgb = NOIR
-                                            run.font.bold = True
-                                        
-                                        # c) Insérer le contenu s'il n'est pas vide avec le formatage spécifique
-                                        if value:
-                                            items = [item.strip() for item in str(value).split('\n') if item.strip()]
-                                            for line in items:
-                                                p = tf.add_paragraph() # Ajoute un nouveau paragraphe pour chaque ligne de contenu
-                                                
-                                                # --- LOGIQUE DE FORMATAGE DES LIGNES (CORRIGÉE) ---
-                                                
-                                                # Cas 1 : PROFIL (Texte simple, aligné à gauche, pas de puce)
-                                                if ph_key == "PROFIL":
-                                                    p.text = line
-                                                    p.level = 0 
-                                                    p.alignment = PP_ALIGN.LEFT
-                                                    
-                                                # Cas 2 : CERTIFICATIONS (Puce '✔' insérée manuellement)
-                                                elif ph_key == "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES":
-                                                    p.text = "✔ " + line
-                                                    p.level = 0 
-                                                    p.alignment = PP_ALIGN.LEFT
-                                                    
-                                                # Cas 3 : Autres (Domaine, Formation, Références) (Puce '•' insérée manuellement)
-                                                else:
-                                                    p.text = "• " + line
-                                                    p.level = 0 
-                                                    p.alignment = PP_ALIGN.LEFT
-                                                
-                                                # --- Application du formatage d'indentation (important) ---
-                                                # Réinitialiser l'indentation par défaut du niveau 0
-                                                if hasattr(p, 'paragraph_format'): 
-                                                    p.paragraph_format.left_indent = Inches(0)
-                                                    p.paragraph_format.first_line_indent = Inches(0)
-                                                
-                                                # --- Application du formatage de police pour la ligne ---
-                                                # S'assurer qu'un run existe pour appliquer le formatage
-                                                if not p.runs:
-                                                    # Ajoute le texte au paragraphe si pas de run (cela crée un run)
-                                                    p.text = line if ph_key == "PROFIL" else p.text
-                                                
-                                                if p.runs:
-                                                    run = p.runs[0]
-                                                    run.font.name = FONT_NAME
-                                                    run.font.size = Pt(11) # Taille standard pour le contenu (11pt)
-                                                    run.font.color.rgb = NOIR
-                                                    run.font.bold = False
-                                                # --- FIN LOGIQUE DE FORMATAGE DES LIGNES ---
-                                                
-                    # --- Remplissage des Expériences et Projets ---
-                    fill_experiences(prs, exp_slide, exp_table, data.experiences)
-                    fill_projects(prs, proj_slides, data.projects)
-                    
-                    # --- Formatage final des titres statiques ---
-                    apply_formatting(prs)
-
-                    # --- Sauvegarde du fichier ---
-                    output = BytesIO()
-                    prs.save(output)
-                    output.seek(0)
-                    
                     st.download_button(
                         label="⬇️ Télécharger le CV PPTX",
                         data=output,
@@ -903,5 +816,24 @@ def main():
                 except Exception as e:
                     st.error(f"Une erreur critique est survenue lors de la génération du PPTX : {e}")
                     st.exception(e)
+
+    # --- GÉNÉRATION EN LOT ---
+    st.markdown("---")
+    with st.expander("📦 Génération en lot (tous les CV de l'équipe)"):
+        st.caption("Chaque CV est analysé puis rendu en parallèle, avec tout son contenu extrait "
+                   "(pas de sélection par cases) et les logos chargés plus haut. Les PPTX sont regroupés dans un ZIP.")
+        batch_files = st.file_uploader("📁 CV de l'équipe", type=["pdf", "docx", "pptx"],
+                                       accept_multiple_files=True, key="batch_uploader")
+        if batch_files and st.button("⚡ Générer tous les PPTX"):
+            run_batch(batch_files, logo_files)
+        if st.session_state.get("batch_zip"):
+            st.success(st.session_state.batch_summary)
+            st.download_button(
+                label="⬇️ Télécharger le ZIP des CV",
+                data=st.session_state.batch_zip,
+                file_name="CV_equipe_GTT.zip",
+                mime="application/zip",
+                key="download_batch_zip"
+            )
 if __name__ == "__main__":
     pass  # laisse vide si tout ton code est déjà en haut
@@ -0,0 +1,91 @@
+"""
+Banc d'essai hors ligne de l'extraction canonique (débit et latence de queue).
+
+Utilise le remplaçant local de Gemini (llm_backend.StandInBackend) : aucun réseau,
+aucun quota consommé. Exemple :
+
+    python benchmarks/bench_llm.py --cvs 200 --workers 8 --latency 1.5 --error-rate 0.02 --rate-limit-rate 0.05
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def synthetic_cv(i: int, rng: random.Random) -> str:
+    lines = [f"Candidat {i} NDIAYE", "Auditeur des systèmes d'information", "", "PROFIL"]
+    lines += [f"Phrase de profil {j} du candidat {i}." for j in range(rng.randint(2, 6))]
+    lines += ["", "EXPÉRIENCES PROFESSIONNELLES"]
+    for j in range(rng.randint(3, 30)):
+        lines.append(f"{2000 + j} - {2001 + j} : Consultant senior - Cabinet {j}")
+        lines += [f"- Activité {k} de la mission {j}" for k in range(rng.randint(1, 8))]
+    lines += ["", "FORMATION", "Master Audit - UCAD (2005)", "", "LANGUES", "Français, Anglais"]
+    return "\n".join(lines)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(p / 100 * (len(values) - 1)))))
+    return values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cvs", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=1.5, help="latence médiane simulée (s)")
+    parser.add_argument("--sigma", type=float, default=0.5, help="dispersion log-normale de la latence")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, default=600.0, help="limite requêtes/minute côté client")
+    parser.add_argument("--stream", action="store_true", help="passe par le chemin streaming")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Avant les imports : le limiteur lit ses réglages à l'import, le cache doit rester isolé
+    os.environ["GT_GEMINI_RPM"] = str(args.rpm)
+    os.environ.setdefault("GT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+    from canonical import extract_canonical
+    from llm_backend import StandInBackend, set_backend
+
+    backend = StandInBackend(replay_dir=None, latency=args.latency, latency_sigma=args.sigma,
+                             error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    set_backend(backend)
+
+    rng = random.Random(args.seed)
+    texts = [synthetic_cv(i, rng) for i in range(args.cvs)]
+
+    def job(text):
+        start = time.perf_counter()
+        on_field = (lambda k, v: None) if args.stream else None
+        extract_canonical(text, refresh=True, on_field=on_field)
+        return time.perf_counter() - start
+
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for fut in as_completed([pool.submit(job, t) for t in texts]):
+            try:
+                latencies.append(fut.result())
+            except Exception:
+                errors += 1
+    wall = time.perf_counter() - start
+
+    print(f"CV : {args.cvs}  workers : {args.workers}  appels backend : {backend.calls}")
+    print(f"Durée totale : {wall:.2f} s  débit : {len(latencies) / wall:.2f} CV/s  échecs : {errors}")
+    if latencies:
+        print(f"Latence  moy {statistics.mean(latencies):.2f} s  p50 {percentile(latencies, 50):.2f} s  "
+              f"p95 {percentile(latencies, 95):.2f} s  p99 {percentile(latencies, 99):.2f} s  "
+              f"max {max(latencies):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
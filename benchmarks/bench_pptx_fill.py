@@ -0,0 +1,214 @@
+"""
+Compare le remplissage des tableaux d'app_powerpoint :
+    - "legacy" : copie figée de l'ancienne implémentation (python-pptx cellule par cellule,
+      formatage run par run, nettoyage avec table.rows[1] à chaque tour) ;
+    - "xml"    : pptx_fill (ligne prototype pré-formatée, texte seul posé par ligne).
+Chaque mesure remplit un tableau du template déjà garni de N lignes (re-génération)
+avec N expériences ou N projets, puis vérifie que les textes produits sont identiques.
+Mesure aussi la pagination : ancienne duplicate_slide contre pptx_fill.clone_slide
+(avec, pour chaque copie, les références d'images qui ne pointent sur rien).
+
+    python benchmarks/bench_pptx_fill.py --rows 10 60 200 --slides 12 --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from copy import deepcopy
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pptx import Presentation  # noqa: E402
+from pptx.dml.color import RGBColor  # noqa: E402
+from pptx.util import Inches, Pt  # noqa: E402
+
+from pptx_fill import RowPrototype, clone_slide, fill_table  # noqa: E402
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CV PPT template.pptx")
+MAUVE_CLAIR = RGBColor(230, 214, 245)
+NOIR = RGBColor(0, 0, 0)
+FONT_NAME = "Trebuchet MS"
+
+
+# =====================================================
+# ========== ANCIENNE IMPLÉMENTATION (FIGÉE) ==========
+# =====================================================
+
+def legacy_insert_row(table):
+    new_row_index = len(table.rows)
+    tr = deepcopy(table.rows[0]._tr)
+    table._tbl.append(tr)
+    table._rows = None
+    return table.rows[new_row_index]
+
+
+def legacy_clear(table):
+    table._rows = None
+    while len(table.rows) > 1:
+        table._tbl.remove(table.rows[1]._tr)
+        table._rows = None
+
+
+def legacy_fill_experiences(table, experiences):
+    legacy_clear(table)
+    for company, position, period in experiences:
+        row = legacy_insert_row(table)
+        row.height = Inches(0.45)
+        row.cells[0].text = company
+        row.cells[1].text = position
+        row.cells[2].text = period
+        for cell in row.cells:
+            cell.fill.solid()
+            cell.fill.fore_color.rgb = MAUVE_CLAIR
+            for paragraph in cell.text_frame.paragraphs:
+                paragraph.level = 0
+                if not paragraph.runs:
+                    paragraph.text = cell.text
+                for run in paragraph.runs:
+                    run.font.name = FONT_NAME
+                    run.font.size = Pt(11)
+                    run.font.color.rgb = NOIR
+                    run.font.bold = False
+
+
+def legacy_fill_projects(table, projects):
+    legacy_clear(table)
+    for period, organization, country, summary in projects:
+        row = legacy_insert_row(table)
+        row.height = Inches(0.60)
+        row.cells[0].text = period
+        row.cells[1].text = organization
+        row.cells[2].text = country
+        tf = row.cells[3].text_frame
+        tf.clear()
+        for line in [l.strip() for l in re.split(r'\.\s+', summary.strip()) if l.strip()]:
+            p = tf.add_paragraph()
+            p.level = 0
+            p.text = "• " + line
+            for r in p.runs:
+                r.font.size = Pt(11)
+                r.font.bold = False
+                r.font.name = FONT_NAME
+                r.font.color.rgb = NOIR
+        for cell in row.cells:
+            cell.fill.solid()
+            cell.fill.fore_color.rgb = MAUVE_CLAIR
+            for p in cell.text_frame.paragraphs:
+                p.level = 0
+                for r in p.runs:
+                    r.font.size = Pt(11)
+                    r.font.name = FONT_NAME
+                    r.font.bold = False
+                    r.font.color.rgb = NOIR
+
+
+def legacy_duplicate_slide(prs, slide):
+    new_slide = prs.slides.add_slide(slide.slide_layout)
+    for shape in slide.shapes:
+        el = deepcopy(shape.element)
+        new_slide.shapes._spTree.insert_element_before(el, "p:extLst")
+    return new_slide
+
+
+# =====================================================
+# ========== NOUVELLE IMPLÉMENTATION ==================
+# =====================================================
+
+def xml_fill_experiences(table, experiences):
+    prototype = RowPrototype(table, Inches(0.45), MAUVE_CLAIR, FONT_NAME, 11, NOIR)
+    fill_table(table, prototype, [list(e) for e in experiences])
+
+
+def xml_fill_projects(table, projects):
+    prototype = RowPrototype(table, Inches(0.60), MAUVE_CLAIR, FONT_NAME, 11, NOIR)
+    rows = []
+    for period, organization, country, summary in projects:
+        lines = [l.strip() for l in re.split(r'\.\s+', summary.strip()) if l.strip()]
+        rows.append([period, organization, country, ["• " + l for l in lines]])
+    fill_table(table, prototype, rows)
+
+
+# =====================================================
+# ========== MESURE ===================================
+# =====================================================
+
+def synthetic_rows(n, rng):
+    experiences = [(f"Société {i}", f"Consultant senior {rng.randint(1, 99)}", f"{2000 + i % 24} - {2001 + i % 24}")
+                   for i in range(n)]
+    projects = [(f"{2000 + i % 24}", f"Organisation {i}", "Sénégal",
+                 ". ".join(f"Action {j} menée sur le projet {i}" for j in range(rng.randint(2, 6))))
+                for i in range(n)]
+    return experiences, projects
+
+
+def table_of(prs, slide_idx):
+    return next(s.table for s in prs.slides[slide_idx].shapes if s.has_table)
+
+
+def cell_texts(table):
+    # Textes des lignes de données, paragraphes vides ignorés
+    return [[[p.text for p in c.text_frame.paragraphs if p.text] for c in row.cells] for row in list(table.rows)[1:]]
+
+
+def broken_refs(slide):
+    return sum(1 for v in slide._element.xpath(".//@r:*") if v not in slide.part.rels)
+
+
+def bench_slides(data, count, repeat):
+    for name, clone in (("legacy", lambda prs, s: legacy_duplicate_slide(prs, s)),
+                        ("clone", lambda prs, s: clone_slide(prs, s, after=1))):
+        timings, broken = [], 0
+        for _ in range(repeat):
+            prs = Presentation(BytesIO(data))
+            source = prs.slides[1]
+            start = time.perf_counter()
+            copies = [clone(prs, source) for _ in range(count)]
+            timings.append(time.perf_counter() - start)
+            broken = sum(broken_refs(c) for c in copies)
+        print(f"slides x{count:<3}  {name:<6} {statistics.median(timings) * 1000:8.1f} ms   "
+              f"références cassées : {broken}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 60, 200])
+    parser.add_argument("--slides", type=int, default=12, help="nombre de slides de suite à créer")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(TEMPLATE, "rb") as f:
+        data = f.read()
+    rng = random.Random(args.seed)
+
+    for n in args.rows:
+        experiences, projects = synthetic_rows(n, rng)
+        for label, slide_idx, rows, legacy, xml in (
+                ("expériences", 1, experiences, legacy_fill_experiences, xml_fill_experiences),
+                ("projets", 2, projects, legacy_fill_projects, xml_fill_projects)):
+            timings, texts = {}, {}
+            for name, fill in (("legacy", legacy), ("xml", xml)):
+                timings[name] = []
+                for _ in range(args.repeat):
+                    prs = Presentation(BytesIO(data))
+                    table = table_of(prs, slide_idx)
+                    xml(table, rows)  # tableau déjà garni de N lignes
+                    start = time.perf_counter()
+                    fill(table, rows)
+                    timings[name].append(time.perf_counter() - start)
+                texts[name] = cell_texts(table)
+            legacy_ms = statistics.median(timings["legacy"]) * 1000
+            xml_ms = statistics.median(timings["xml"]) * 1000
+            same = "identiques" if texts["legacy"] == texts["xml"] else "DIFFÉRENTS"
+            print(f"{label:<12} N={n:<4} legacy {legacy_ms:8.1f} ms   xml {xml_ms:7.1f} ms   "
+                  f"x{legacy_ms / max(xml_ms, 1e-6):5.1f}   textes {same}")
+
+    bench_slides(data, args.slides, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare les deux modes d'extraction canonique (canonical.py) :
+    - "prompt" : structure JSON recopiée dans le prompt (ancien fonctionnement) ;
+    - "schema" : sortie contrainte par response_schema (GT_LLM_SCHEMA_MODE=1).
+Mesures par mode : tokens d'entrée et de sortie (estimés), latence, réponses à nettoyer
+(blocs ```json) et réponses non décodables.
+
+Sur Gemini (vrais chiffres) :
+    GEMINI_API_KEY=... python benchmarks/bench_schema.py --backend gemini cv1.pdf cv2.docx
+Hors ligne (vérifie seulement le chemin de code et les tokens d'entrée) :
+    python benchmarks/bench_schema.py --cvs 10
+Les deux modes sont alternés CV par CV : sur Gemini, l'attente imposée par le limiteur
+(GT_GEMINI_RPM) pèse autant sur l'un que sur l'autre. Hors ligne, le limiteur est
+neutralisé (--rpm élevé) pour ne mesurer que le chemin de code.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_llm import percentile, synthetic_cv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="CV à analyser (PDF/DOCX/PPTX) ; sinon CV synthétiques")
+    parser.add_argument("--cvs", type=int, default=10, help="nombre de CV synthétiques")
+    parser.add_argument("--backend", choices=["standin", "gemini"], default="standin")
+    parser.add_argument("--rpm", type=float, default=None,
+                        help="limite requêtes/minute côté client (défaut : GT_GEMINI_RPM sur Gemini, illimité hors ligne)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Avant les imports : le limiteur lit ses réglages à l'import
+    if args.rpm is not None:
+        os.environ["GT_GEMINI_RPM"] = str(args.rpm)
+    elif args.backend == "standin":
+        os.environ["GT_GEMINI_RPM"] = "100000"
+    os.environ.setdefault("GT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+    from canonical import build_request, parse_canonical_json
+    from llm import generate_text
+    from llm_backend import DEFAULT_MODEL, GeminiBackend, StandInBackend, set_backend
+    from token_budget import estimate_tokens
+
+    if args.backend == "gemini":
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        set_backend(GeminiBackend(record_dir=None))
+    else:
+        set_backend(StandInBackend(replay_dir=None, latency=0.2, seed=args.seed))
+
+    if args.files:
+        from ingestion import ingest
+        texts = []
+        for path in args.files:
+            with open(path, "rb") as f:
+                texts.append(ingest(f.read(), os.path.basename(path)).text)
+    else:
+        rng = random.Random(args.seed)
+        texts = [synthetic_cv(i, rng) for i in range(args.cvs)]
+
+    modes = ("prompt", "schema")
+    stats = {mode: {"in": [], "out": [], "latency": [], "fenced": 0, "invalid": 0} for mode in modes}
+    for i, text in enumerate(texts):
+        # Ordre alterné d'un CV à l'autre : aucun mode ne passe systématiquement après l'autre
+        for mode in (modes if i % 2 == 0 else modes[::-1]):
+            prompt, config = build_request(text, schema_mode=(mode == "schema"))
+            start = time.perf_counter()
+            raw = generate_text(prompt, DEFAULT_MODEL, config, refresh=True)
+            m = stats[mode]
+            m["latency"].append(time.perf_counter() - start)
+            m["in"].append(estimate_tokens(prompt))
+            m["out"].append(estimate_tokens(raw))
+            m["fenced"] += raw.strip().startswith("```")
+            try:
+                parse_canonical_json(raw)
+            except json.JSONDecodeError:
+                m["invalid"] += 1
+
+    for mode in modes:
+        m = stats[mode]
+        print(f"[{mode}] tokens entrée moy {statistics.mean(m['in']):.0f}  "
+              f"sortie moy {statistics.mean(m['out']):.0f}  "
+              f"latence p50 {percentile(m['latency'], 50):.2f} s  p95 {percentile(m['latency'], 95):.2f} s  "
+              f"```json : {m['fenced']}  JSON invalides : {m['invalid']}")
+
+
+if __name__ == "__main__":
+    main()
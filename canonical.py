@@ -0,0 +1,541 @@
+"""
+Extraction canonique d'un CV : UN appel Gemini par document, partagé par les trois outils.
+
+Le schéma canonique est un sur-ensemble de :
+- le JSON Banque Mondiale (app_banque),
+- CVData (app_powerpoint),
+- DEFAULT_DATA (app2 / app1).
+Chaque outil obtient ensuite son format par une projection locale et déterministe
+(to_banque, to_cvdata, to_offre) : plus besoin de trois prompts ni de trois appels.
+Le résultat est mis en cache par hash du texte du document.
+
+Les CV trop longs pour un seul prompt (annexes d'appels d'offres) sont découpés sur
+les frontières de sections ; chaque morceau est extrait en parallèle puis les
+résultats partiels sont fusionnés de façon déterministe (merge_canonical).
+"""
+import json
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cv_cache import DiskCache, hash_bytes
+from llm import generate_text, generate_text_streaming, looks_like_json, strip_json_fences
+from llm_backend import DEFAULT_MODEL, MODEL_TIERS, get_backend
+from token_budget import DEFAULT_MAX_TOKENS, compress_cv_text, select_sections, split_into_chunks
+
+# À incrémenter dès que le prompt ou le schéma canonique change (invalide le cache)
+CANONICAL_VERSION = "3"
+
+# Sortie contrainte par response_schema (sinon : structure JSON recopiée dans le prompt)
+SCHEMA_MODE = os.environ.get("GT_LLM_SCHEMA_MODE", "1") == "1"
+
+_CACHE = DiskCache("canonical", max_bytes=50 * 1024 * 1024)
+
+# Mode morceaux : taille d'un morceau (tokens estimés) et appels simultanés
+CHUNK_MAX_TOKENS = int(os.environ.get("GT_CHUNK_MAX_TOKENS", str(DEFAULT_MAX_TOKENS)))
+CHUNK_WORKERS = int(os.environ.get("GT_CHUNK_WORKERS", "4"))
+
+# Définition unique du schéma canonique : valeurs par défaut (ordre des champs) + champs des éléments.
+# Le schéma imposé au modèle et la structure recopiée dans le prompt en sont dérivés.
+CANONICAL_DEFAULTS: Dict[str, Any] = {
+    "nom_employe": "",
+    "poste": "",
+    "nom_candidat": "",
+    "email": "",
+    "naissance": "",
+    "nationalite": "",
+    "profil": [],
+    "domaines_expertise": [],
+    "secteurs": [],
+    "pays_travailles": [],
+    "education": [],
+    "autres_formations": [],
+    "certifications": [],
+    "langues": [],
+    "experience": [],
+    "taches_detaillees": [],
+    "projets": [],
+    "references": [],
+}
+
+ITEM_FIELDS = {
+    "education": ["date", "detail", "lieu"],
+    "autres_formations": ["date", "detail", "lieu"],
+    "langues": ["langue", "oral", "lu", "ecrit"],
+    "experience": ["date", "entreprise", "poste", "pays"],
+    "projets": ["nom", "client", "annee", "lieu", "poste", "caracteristiques", "activites"],
+    "references": ["reference", "mission", "periode"],
+}
+
+
+# Champs sans lesquels une extraction est jugée ratée (→ modèle suivant de la cascade)
+REQUIRED_FIELDS = ("nom_employe", "poste")
+
+
+def missing_fields(data: Dict[str, Any]) -> List[str]:
+    """Champs obligatoires vides ; il faut aussi au moins une expérience ou un projet."""
+    missing = [k for k in REQUIRED_FIELDS if not data.get(k)]
+    if not data.get("experience") and not data.get("projets"):
+        missing.append("experience/projets")
+    return missing
+
+
+class TierStats:
+    """Compteurs de la cascade par modèle (processus entier) : appels, escalades, échecs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, model_name: str, escalated: bool, failed: bool = False) -> None:
+        with self._lock:
+            c = self.counts.setdefault(model_name, {"appels": 0, "escalades": 0, "echecs": 0})
+            c["appels"] += 1
+            c["escalades"] += escalated
+            c["echecs"] += failed
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Une ligne par modèle, dans l'ordre de la cascade, avec le taux d'escalade."""
+        with self._lock:
+            order = [m for m in MODEL_TIERS if m in self.counts] + [m for m in self.counts if m not in MODEL_TIERS]
+            return [{"modèle": m, **self.counts[m],
+                     "taux d'escalade": f"{100 * self.counts[m]['escalades'] / self.counts[m]['appels']:.0f} %"}
+                    for m in order]
+
+
+TIER_STATS = TierStats()
+
+
+def json_template(keys: Optional[List[str]] = None) -> str:
+    """Structure JSON attendue, recopiée dans le prompt quand le schéma n'est pas imposé."""
+    structure = {}
+    for key in keys or CANONICAL_DEFAULTS:
+        if key in ITEM_FIELDS:
+            structure[key] = [{f: (["", ""] if f == "activites" else "") for f in ITEM_FIELDS[key]}]
+        else:
+            structure[key] = "" if isinstance(CANONICAL_DEFAULTS[key], str) else ["", ""]
+    lines = [f'    "{k}": {json.dumps(v, ensure_ascii=False)}' for k, v in structure.items()]
+    return "{\n" + ",\n".join(lines) + "\n}"
+
+
+def json_schema(keys: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Schéma de sortie (format response_schema de Gemini) pour tout ou partie des champs."""
+    string = {"type": "STRING"}
+    string_list = {"type": "ARRAY", "items": string}
+    properties = {}
+    for key in keys or CANONICAL_DEFAULTS:
+        if key in ITEM_FIELDS:
+            item = {f: (string_list if f == "activites" else string) for f in ITEM_FIELDS[key]}
+            properties[key] = {"type": "ARRAY", "items": {"type": "OBJECT", "properties": item,
+                                                          "required": list(ITEM_FIELDS[key])}}
+        else:
+            properties[key] = string if isinstance(CANONICAL_DEFAULTS[key], str) else string_list
+    return {"type": "OBJECT", "properties": properties, "required": list(properties)}
+
+
+CANONICAL_SCHEMA = json_schema()
+
+
+# Consigne d'extraction par champ (partagée par l'extraction complète et la ré-extraction ciblée)
+FIELD_INSTRUCTIONS = {
+    "nom_employe": "nom de la personne physique (Prénom NOM)",
+    "nom_candidat": "la firme ou société qui présente le CV",
+    "poste": "titre du poste visé ou dernier poste occupé",
+    "profil": "résumé du profil professionnel en 4 à 6 phrases complètes, une phrase par élément",
+    "domaines_expertise": "TOUS les domaines d'expertise, un par élément",
+    "secteurs": "TOUS les secteurs d'activité, un par élément",
+    "education": "TOUS les diplômes",
+    "autres_formations": "formations courtes et autres formations",
+    "certifications": "TOUTES les certifications professionnelles (CISA, ISO…)",
+    "experience": "TOUTES les expériences professionnelles, dans l'ordre chronologique du CV",
+    "projets": "TOUS les projets/missions détaillés avec TOUTES leurs activités",
+    "references": ("TOUTES les références professionnelles, clients ou organisations mentionnés "
+                   "(mission associée et période si elles sont indiquées, sinon chaînes vides)"),
+}
+
+
+def build_canonical_prompt(text: str, part: Optional[Tuple[int, int]] = None,
+                           schema_mode: bool = SCHEMA_MODE, keys: Optional[List[str]] = None) -> str:
+    """Prompt d'extraction de tous les champs, ou seulement de `keys` (ré-extraction ciblée)."""
+    partial = ""
+    if part and part[1] > 1:
+        partial = (f"\n⚠️ Ce texte est la partie {part[0]} sur {part[1]} d'un long CV : extrais uniquement "
+                   f"ce qui figure dans cette partie, les autres parties sont traitées séparément.\n")
+    if keys:
+        task = f"d'extraire UNIQUEMENT les champs {', '.join(keys)} d'un extrait de CV"
+    else:
+        task = "d'extraire TOUTES les informations d'un CV"
+    instructions = "\n".join(f"- '{k}' : {v}." for k, v in FIELD_INSTRUCTIONS.items() if not keys or k in keys)
+    if schema_mode:
+        output = "Réponds avec le JSON du schéma imposé."
+    else:
+        output = ("Réponds UNIQUEMENT avec un JSON valide, sans texte explicatif, dans cette structure exacte :\n"
+                  f"{json_template(keys)}")
+    return f"""
+Tu es un expert RH de GT Technologies chargé {task}.
+
+⚠️ Instructions importantes :
+- Ne résume pas et ne reformule pas les tâches et activités : conserve la formulation originale.
+{instructions}
+- Un champ absent du CV reste vide ("" ou []).
+{partial}
+{output}
+
+Voici le texte du CV :
+{compress_cv_text(text)}
+"""
+
+
+def generation_config(schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    config = {"temperature": 0.0, "response_mime_type": "application/json"}
+    if schema:
+        config["response_schema"] = schema
+    return config
+
+
+def build_request(text: str, part: Optional[Tuple[int, int]] = None,
+                  schema_mode: bool = SCHEMA_MODE) -> Tuple[str, Dict[str, Any]]:
+    """(prompt, configuration de génération) d'une extraction canonique."""
+    config = generation_config(CANONICAL_SCHEMA if schema_mode else None)
+    return build_canonical_prompt(text, part, schema_mode), config
+
+
+def _text_list(value: Any) -> List[str]:
+    """Liste de textes non vides : None ou "" → [], texte seul → [texte], None ignoré dans une liste."""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [str(v).strip() for v in value if v is not None and str(v).strip()]
+
+
+def normalize_canonical(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Complète les champs manquants et force les bons types (le modèle n'est pas toujours strict)."""
+    out = {}
+    for key, default in CANONICAL_DEFAULTS.items():
+        value = data.get(key, default)
+        if isinstance(default, str):
+            out[key] = value if isinstance(value, str) else ("" if value is None else str(value))
+        elif key in ITEM_FIELDS:
+            items = []
+            for item in value if isinstance(value, list) else []:
+                if not isinstance(item, dict):
+                    continue
+                clean = {}
+                for f in ITEM_FIELDS[key]:
+                    v = item.get(f, [] if f == "activites" else "")
+                    if f == "activites":
+                        clean[f] = _text_list(v)
+                    else:
+                        clean[f] = "" if v is None else str(v)
+                items.append(clean)
+            out[key] = items
+        else:
+            if isinstance(value, str):
+                value = value.split("\n")
+            out[key] = _text_list(value)
+    return out
+
+
+def parse_canonical_json(raw: str) -> Dict[str, Any]:
+    match = re.search(r"\{.*\}", strip_json_fences(raw), re.DOTALL)
+    if not match:
+        raise json.JSONDecodeError("Aucun objet JSON dans la réponse", raw, 0)
+    return normalize_canonical(json.loads(match.group(0)))
+
+
+def _call_model(request: Tuple[str, Dict[str, Any]], model_name: str, refresh: bool,
+                on_field: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    prompt, config = request
+    if on_field:
+        raw = generate_text_streaming(prompt, model_name, config, refresh=refresh,
+                                      cacheable=looks_like_json, on_field=on_field)
+    else:
+        raw = generate_text(prompt, model_name, config, refresh=refresh, cacheable=looks_like_json)
+    return parse_canonical_json(raw)
+
+
+def document_id(text: str) -> str:
+    """Identifiant d'un document = hash de son texte extrait."""
+    return hash_bytes(text.encode("utf-8"))
+
+
+def _cache_key(text: str, schema_mode: bool, doc_id: Optional[str] = None) -> str:
+    """Une extraction canonique par document (quel que soit le modèle qui l'a produite)."""
+    mode = "schema" if schema_mode else "prompt"
+    return f"{doc_id or document_id(text)}:{CANONICAL_VERSION}:{mode}:{get_backend().name}"
+
+
+def cached_canonical(doc_id: str, schema_mode: bool = SCHEMA_MODE) -> Optional[Dict[str, Any]]:
+    """Extraction déjà en cache pour un document (réutilisée pour ses quasi-doublons), ou None."""
+    cached = _CACHE.get_text(_cache_key("", schema_mode, doc_id))
+    return json.loads(cached) if cached is not None else None
+
+
+def _extract_with_model(text: str, model_name: str, refresh: bool,
+                        on_field: Optional[Callable[[str, Any], None]],
+                        chunk_max_tokens: int, schema_mode: bool) -> Dict[str, Any]:
+    chunks = split_into_chunks(text, chunk_max_tokens)
+    if len(chunks) == 1:
+        return _call_model(build_request(text, schema_mode=schema_mode), model_name, refresh, on_field)
+
+    requests = [build_request(c, (i + 1, len(chunks)), schema_mode) for i, c in enumerate(chunks)]
+    with ThreadPoolExecutor(max_workers=min(CHUNK_WORKERS, len(requests))) as pool:
+        parts = list(pool.map(lambda r: _call_model(r, model_name, refresh), requests))
+    data = merge_canonical(parts)
+    if on_field:
+        for k, v in data.items():
+            on_field(k, v)
+    return data
+
+
+def extract_canonical(text: str, model_name: Optional[str] = None, refresh: bool = False,
+                      on_field: Optional[Callable[[str, Any], None]] = None,
+                      chunk_max_tokens: int = CHUNK_MAX_TOKENS, schema_mode: bool = SCHEMA_MODE,
+                      validate: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+    """
+    Extraction canonique du CV (un seul appel LLM par document, ou un par morceau si le CV est trop long).
+    Sans model_name, cascade de modèles (MODEL_TIERS) : le modèle rapide d'abord, le suivant
+    seulement si la réponse est invalide, s'il manque des champs obligatoires ou si
+    validate(extraction) lève une exception (ex. validation Pydantic de l'outil).
+    Avec on_field, la réponse est reçue en streaming (clés canoniques) ; en mode morceaux,
+    les champs sont signalés une fois la fusion faite.
+    Lève json.JSONDecodeError si le modèle ne renvoie pas de JSON, ou l'erreur de l'API.
+    """
+    key = _cache_key(text, schema_mode)
+    if not refresh:
+        cached = _CACHE.get_text(key)
+        if cached is not None:
+            data = json.loads(cached)
+            if on_field:
+                for k, v in data.items():
+                    on_field(k, v)
+            return data
+
+    tiers = [model_name] if model_name else MODEL_TIERS
+    for rank, tier in enumerate(tiers):
+        last = rank == len(tiers) - 1
+        try:
+            data = _extract_with_model(text, tier, refresh, on_field, chunk_max_tokens, schema_mode)
+            problems = missing_fields(data)
+            if validate:
+                validate(data)
+        except ValueError:
+            # JSON illisible ou validation Pydantic (JSONDecodeError et ValidationError héritent de ValueError)
+            if last:
+                TIER_STATS.record(tier, escalated=False, failed=True)
+                raise
+            TIER_STATS.record(tier, escalated=True)
+            continue
+        if problems and not last:
+            TIER_STATS.record(tier, escalated=True)
+            continue
+        TIER_STATS.record(tier, escalated=False)
+        break
+
+    _CACHE.set_text(key, json.dumps(data, ensure_ascii=False))
+    return data
+
+
+# =====================================================
+# ========== RÉ-EXTRACTION CIBLÉE D'UNE SECTION =======
+# =====================================================
+
+# Groupe → (champs canoniques ré-extraits, sections du CV envoyées au modèle, cf. token_budget)
+SECTION_GROUPS = {
+    "identite": (["nom_employe", "poste", "nom_candidat", "email", "naissance", "nationalite"],
+                 ["identite", "profil"]),
+    "profil": (["profil"], ["profil", "experience"]),
+    "competences": (["domaines_expertise", "secteurs", "pays_travailles"],
+                    ["competences", "profil", "experience", "projets"]),
+    "formation": (["education", "autres_formations", "certifications"], ["formation", "certifications"]),
+    "langues": (["langues"], ["langues"]),
+    "experience": (["experience", "taches_detaillees"], ["experience"]),
+    "projets": (["projets"], ["projets", "experience"]),
+    "references": (["references"], ["projets", "experience"]),
+}
+
+
+def reextract_section(text: str, canonical: Dict[str, Any], group: str, model_name: str = DEFAULT_MODEL,
+                      refresh: bool = False, schema_mode: bool = SCHEMA_MODE) -> Dict[str, Any]:
+    """
+    Ré-extrait un seul groupe de champs (SECTION_GROUPS) à partir des seules sections
+    concernées du CV, avec un sous-schéma, et le fusionne dans l'extraction existante.
+    Retourne la nouvelle extraction canonique (aussi enregistrée dans le cache du document).
+    """
+    keys, sections = SECTION_GROUPS[group]
+    prompt = build_canonical_prompt(select_sections(text, sections), schema_mode=schema_mode, keys=keys)
+    config = generation_config(json_schema(keys) if schema_mode else None)
+    partial = _call_model((prompt, config), model_name, refresh)
+
+    updated = dict(canonical)
+    updated.update({k: partial[k] for k in keys})
+    _CACHE.set_text(_cache_key(text, schema_mode), json.dumps(updated, ensure_ascii=False))
+    return updated
+
+
+# =====================================================
+# ========== FUSION DES EXTRACTIONS PARTIELLES ========
+# =====================================================
+
+# Champs qui identifient un même élément d'une liste d'un morceau à l'autre
+ITEM_KEYS = {
+    "education": ("date", "detail"),
+    "autres_formations": ("date", "detail"),
+    "langues": ("langue",),
+    "experience": ("date", "entreprise", "poste"),
+    "projets": ("nom", "annee"),
+    "references": ("reference", "mission"),
+}
+
+
+def _norm(value: str) -> str:
+    """Forme de comparaison : sans accents, casse, espaces ni ponctuation ("G.T." == "GT")."""
+    value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[\W_]+", "", value.lower())
+
+
+def _merge_item(target: Dict[str, Any], item: Dict[str, Any]) -> None:
+    """Complète un élément déjà vu : champs vides remplis, activités ajoutées sans doublon."""
+    for f, v in item.items():
+        if f == "activites":
+            seen = {_norm(a) for a in target[f]}
+            for a in v:
+                if _norm(a) not in seen:
+                    seen.add(_norm(a))
+                    target[f].append(a)
+        elif not target.get(f) and v:
+            target[f] = v
+
+
+def merge_canonical(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Fusionne des extractions partielles (dans l'ordre des morceaux) :
+    - texte simple : première valeur non vide ;
+    - 'profil' : celui du premier morceau qui en a un ;
+    - listes de textes : union dans l'ordre d'apparition, sans doublon ;
+    - listes d'éléments : dédoublonnées sur ITEM_KEYS, les doublons se complètent.
+    """
+    merged = normalize_canonical({})
+    for part in parts:
+        for key, value in part.items():
+            if key not in merged:
+                continue
+            if isinstance(merged[key], str):
+                merged[key] = merged[key] or value
+            elif key == "profil":
+                merged[key] = merged[key] or list(value)
+            elif key in ITEM_FIELDS:
+                index = {tuple(_norm(i[f]) for f in ITEM_KEYS[key]): i for i in merged[key]}
+                for item in value:
+                    ident = tuple(_norm(item[f]) for f in ITEM_KEYS[key])
+                    if not any(ident):
+                        continue
+                    if ident in index:
+                        _merge_item(index[ident], item)
+                    else:
+                        index[ident] = {f: (list(v) if isinstance(v, list) else v) for f, v in item.items()}
+                        merged[key].append(index[ident])
+            else:
+                seen = {_norm(v) for v in merged[key]}
+                for v in value:
+                    if _norm(v) not in seen:
+                        seen.add(_norm(v))
+                        merged[key].append(v)
+    return merged
+
+
+# =====================================================
+# ========== PROJECTIONS PAR OUTIL ====================
+# =====================================================
+
+def _join(*parts: str, sep: str = " - ") -> str:
+    return sep.join(p.strip() for p in parts if p and p.strip())
+
+
+def format_reference(ref: Dict[str, str]) -> str:
+    """Format attendu par les outils : 'Référence : Mission (Période)'."""
+    line = ref.get("reference", "").strip()
+    if ref.get("mission", "").strip():
+        line = f"{line} : {ref['mission'].strip()}" if line else ref["mission"].strip()
+    if ref.get("periode", "").strip():
+        line = f"{line} ({ref['periode'].strip()})"
+    return line
+
+
+def _format_formation(f: Dict[str, str]) -> str:
+    line = _join(f.get("detail", ""), f.get("lieu", ""))
+    return f"{line} ({f['date'].strip()})" if f.get("date", "").strip() else line
+
+
+def to_banque(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Format JSON Banque Mondiale attendu par build_standard_docx (app_banque)."""
+    return {
+        "poste": c["poste"],
+        "nom_candidat": c["nom_candidat"],
+        "nom_employe": c["nom_employe"],
+        "naissance": c["naissance"],
+        "nationalite": c["nationalite"],
+        "pays_travailles": list(c["pays_travailles"]),
+        "education": [dict(e) for e in c["education"]],
+        "autres_formations": [dict(f) for f in c["autres_formations"]],
+        "langues": [dict(l) for l in c["langues"]],
+        "experience": [{"date": e["date"], "entreprise": e["entreprise"], "poste": e["poste"]} for e in c["experience"]],
+        "taches_detaillees": list(c["taches_detaillees"]),
+        "projets": [
+            {k: (list(p[k]) if k == "activites" else p[k])
+             for k in ("nom", "annee", "lieu", "poste", "caracteristiques", "activites")}
+            for p in c["projets"]
+        ],
+    }
+
+
+def to_cvdata(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Dictionnaire validable par CVData (app_powerpoint), clés avec alias."""
+    projects = []
+    for p in c["projets"]:
+        summary_parts = [s.strip().rstrip(".") for s in [p["caracteristiques"]] + p["activites"] if s.strip()]
+        projects.append({
+            "period": p["annee"],
+            "organization": p["client"] or p["nom"],
+            "country": p["lieu"],
+            "summary": ". ".join(summary_parts),
+        })
+    return {
+        "NOM": c["nom_employe"],
+        "POSTE": c["poste"],
+        "DOMAINE D’EXPERTISE SPECIFIQUE": "\n".join(c["domaines_expertise"]),
+        "FORMATION": "\n".join(_format_formation(e) for e in c["education"] + c["autres_formations"]),
+        "PROFIL": "\n".join(c["profil"][:4]),
+        "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": "\n".join(c["certifications"]),
+        "REFERENCES_PERTINENTES": "\n".join(format_reference(r) for r in c["references"]),
+        "experiences": [{"company": e["entreprise"], "position": e["poste"], "period": e["date"]} for e in c["experience"]],
+        "projects": projects,
+    }
+
+
+def _bullets(lines: List[str]) -> str:
+    return "\n".join(f"•{l.strip()}" for l in lines if l and l.strip())
+
+
+def to_offre(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Format DEFAULT_DATA du CV détaillé de l'offre (app2 / app1)."""
+    return {
+        "NOM": c["nom_employe"],
+        "Poste": c["poste"],
+        "email": c["email"],
+        "DOMAINE_EXPERIENCE": _bullets(c["domaines_expertise"]),
+        "SECTEURS_EXPERIENCE": _bullets(c["secteurs"]),
+        "PROFIL": "\n".join(c["profil"]),
+        "EXPERIENCES_PERTINENTES": _bullets(
+            f"{e['date']} : {_join(e['poste'], e['entreprise'])}" if e["date"] else _join(e["poste"], e["entreprise"])
+            for e in c["experience"]
+        ),
+        "REFERENCES_PERTINENTES": _bullets(format_reference(r) for r in c["references"]),
+        "DIPLOMES_TEXTUELS": _bullets(
+            [_join(e["detail"], e["lieu"]) for e in c["education"] + c["autres_formations"]] + c["certifications"]
+        ),
+    }
@@ -0,0 +1,118 @@
+"""
+Cache disque partagé par toutes les sessions Streamlit (et tous les outils GT).
+
+Les entrées sont adressées par contenu : l'appelant fournit une clé (en général
+le SHA-256 des octets du fichier + une version), le fichier sur disque est nommé
+d'après le hash de cette clé. L'éviction est LRU et bornée en taille :
+- atime = dernier accès (mis à jour explicitement à chaque lecture),
+- mtime = date d'écriture (utilisée pour le TTL optionnel).
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+CACHE_DIR = os.environ.get(
+    "GT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+
+
+def hash_bytes(b: bytes) -> str:
+    """SHA-256 hexadécimal d'un contenu binaire."""
+    return hashlib.sha256(b).hexdigest()
+
+
+class DiskCache:
+    """Cache clé → octets sur disque, LRU borné en taille, sûr entre threads et processus."""
+
+    def __init__(self, namespace: str, max_bytes: int = 200 * 1024 * 1024, ttl: Optional[float] = None):
+        self.directory = os.path.join(CACHE_DIR, namespace)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._approx_size = None  # calculé paresseusement au premier set()
+
+    def _path(self, key: str) -> str:
+        h = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, h[:2], h)
+
+    # --- Lecture / écriture ---
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            st_ = os.stat(path)
+            now = time.time()
+            if self.ttl is not None and now - st_.st_mtime > self.ttl:
+                self.delete(key)
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            # Marque l'accès pour le LRU (on conserve mtime = date d'écriture)
+            os.utime(path, (now, st_.st_mtime))
+            return data
+        except (FileNotFoundError, OSError):
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Écriture atomique : plusieurs sessions peuvent écrire la même clé en même temps
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._approx_size is None:
+                self._approx_size = self._scan_size()
+            else:
+                self._approx_size += len(data)
+            if self._approx_size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def get_text(self, key: str) -> Optional[str]:
+        data = self.get(key)
+        return data.decode("utf-8") if data is not None else None
+
+    def set_text(self, key: str, text: str) -> None:
+        self.set(key, text.encode("utf-8"))
+
+    # --- Éviction ---
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st_ = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st_
+
+    def _scan_size(self) -> int:
+        return sum(st_.st_size for _, st_ in self._entries())
+
+    def _evict(self) -> None:
+        """Supprime les entrées les moins récemment lues jusqu'à 90 % de la taille max."""
+        entries = sorted(self._entries(), key=lambda e: e[1].st_atime)
+        total = sum(st_.st_size for _, st_ in entries)
+        target = int(self.max_bytes * 0.9)
+        for path, st_ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= st_.st_size
+            except OSError:
+                pass
+        self._approx_size = total
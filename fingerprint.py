@@ -0,0 +1,187 @@
+"""
+Empreintes MinHash des CV pour repérer les quasi-doublons avant tout appel Gemini.
+
+Le même CV revient souvent sous plusieurs noms ("CV_v2.pdf", "CV final.docx") avec
+de petites différences (date, mise en page). On compare les textes normalisés par
+leurs ensembles de shingles (suites de mots) : MinHash estime la similarité de
+Jaccard, et un index LSH (bandes) retrouve les candidats sans tout comparer.
+L'historique est conservé sur disque (un fichier JSONL en ajout seul).
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from cv_cache import CACHE_DIR
+
+NUM_PERM = 128
+BANDS = 32                 # 32 bandes de 4 lignes : candidat dès ~45 % de similarité
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+DUPLICATE_THRESHOLD = float(os.environ.get("GT_DUPLICATE_THRESHOLD", "0.85"))
+HISTORY_MAX_ENTRIES = 5000
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # graine fixe : les signatures restent comparables d'un lancement à l'autre
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+Signature = Tuple[int, ...]
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents, ponctuation et espaces multiples retirés."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.sub(r"[^a-z0-9@]+", " ", text).split())
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set:
+    words = normalize_text(text).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash(text: str) -> Signature:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in shingles(text)]
+    if not hashes:
+        return tuple([_PRIME] * NUM_PERM)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimation de la similarité de Jaccard entre deux textes."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _bands(sig: Signature) -> List[Tuple[int, Tuple[int, ...]]]:
+    return [(i, sig[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+
+
+@dataclass
+class Match:
+    doc_id: str       # hash du texte du document déjà vu
+    name: str         # nom du fichier déjà vu
+    similarity: float
+
+
+class FingerprintIndex:
+    """Index LSH des empreintes, thread-safe ; persistant si `path` est donné."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = HISTORY_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, Signature]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._loaded = path is None
+        self._lines = 0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                    self._insert(row["id"], row["name"], tuple(row["sig"]))
+                    self._lines += 1
+                except (ValueError, KeyError):
+                    continue  # ligne tronquée (arrêt brutal) : ignorée
+        self._trim()
+
+    def _insert(self, doc_id: str, name: str, sig: Signature) -> None:
+        if doc_id in self._entries:
+            self._remove(doc_id)
+        self._entries[doc_id] = (name, sig)
+        for band in _bands(sig):
+            self._buckets.setdefault(band, set()).add(doc_id)
+
+    def _remove(self, doc_id: str) -> None:
+        _, sig = self._entries.pop(doc_id)
+        for band in _bands(sig):
+            bucket = self._buckets.get(band)
+            if bucket:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _trim(self) -> None:
+        # Les dictionnaires gardent l'ordre d'insertion : on oublie les plus anciens
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _compact(self) -> None:
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for doc_id, (name, sig) in self._entries.items():
+                f.write(json.dumps({"id": doc_id, "name": name, "sig": list(sig)}) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(self._entries)
+
+    def add(self, doc_id: str, name: str, sig: Signature) -> None:
+        with self._lock:
+            self._load()
+            self._insert(doc_id, name, sig)
+            self._trim()
+            if self.path:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"id": doc_id, "name": name, "sig": list(sig)}) + "\n")
+                self._lines += 1
+                if self._lines > 2 * self.max_entries:
+                    self._compact()
+
+    def find(self, sig: Signature, threshold: float = DUPLICATE_THRESHOLD,
+             exclude: Optional[str] = None) -> Optional[Match]:
+        """Document le plus semblable au-dessus du seuil (hors `exclude`), ou None."""
+        with self._lock:
+            self._load()
+            candidates = set()
+            for band in _bands(sig):
+                candidates |= self._buckets.get(band, set())
+            best = None
+            for doc_id in candidates - {exclude}:
+                name, other = self._entries[doc_id]
+                score = similarity(sig, other)
+                if score >= threshold and (best is None or score > best.similarity):
+                    best = Match(doc_id, name, score)
+            return best
+
+
+_history: Optional[FingerprintIndex] = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> FingerprintIndex:
+    """Historique partagé par toutes les sessions (CACHE_DIR/fingerprints/history.jsonl)."""
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = FingerprintIndex(os.path.join(CACHE_DIR, "fingerprints", "history.jsonl"))
+        return _history
+
+
+def find_batch_duplicates(texts: Dict[str, str], threshold: float = DUPLICATE_THRESHOLD) -> Dict[str, Match]:
+    """
+    Quasi-doublons à l'intérieur d'un lot : {nom du fichier en double: Match vers le premier
+    fichier semblable}. Le premier de chaque groupe n'apparaît pas (c'est lui qu'on analyse).
+    """
+    index = FingerprintIndex()
+    duplicates = {}
+    for name, text in texts.items():
+        sig = minhash(text)
+        match = index.find(sig, threshold)
+        if match:
+            duplicates[name] = match
+        else:
+            index.add(name, name, sig)
+    return duplicates
@@ -0,0 +1,200 @@
+"""
+Moteur unique de lecture des CV (PDF, DOCX, PPTX) utilisé par toutes les apps.
+
+- iter_blocks() : générateur de blocs (page PDF, slide PPTX, paragraphe/tableau DOCX)
+- ingest()      : résultat uniforme (texte, temps par bloc, méthodes, OCR ou non),
+                  mis en cache disque par contenu et partagé par toutes les sessions.
+"""
+import io
+import json
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Iterator, List
+
+from cv_cache import DiskCache, hash_bytes
+from pdf_engine import iter_pdf_pages, METHOD_OCR
+
+# --- Modules optionnels (Vérification des dépendances)
+try:
+    from docx import Document
+    from docx.table import Table as DocxTable
+    from docx.text.paragraph import Paragraph as DocxParagraph
+except ImportError:
+    Document = None
+
+try:
+    from pptx import Presentation
+    from pptx.enum.shapes import MSO_SHAPE_TYPE
+except ImportError:
+    Presentation = None
+
+# À incrémenter dès que la sortie d'un extracteur change (invalide le cache)
+INGESTION_VERSION = "1"
+
+KIND_PDF = "pdf"
+KIND_DOCX = "docx"
+KIND_PPTX = "pptx"
+
+METHOD_DOCX = "docx"
+METHOD_PPTX = "pptx"
+
+# Séparateur des blocs dans IngestionResult.text : saut de page (vu comme un saut de
+# ligne par str.splitlines, il permet à token_budget de retrouver les pages)
+PAGE_BREAK = "\f"
+
+_CACHE = DiskCache("ingestion", max_bytes=200 * 1024 * 1024)
+
+
+@dataclass
+class Block:
+    index: int
+    text: str
+    method: str
+    seconds: float = 0.0
+
+
+@dataclass
+class IngestionResult:
+    kind: str
+    blocks: List[Block] = field(default_factory=list)
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return PAGE_BREAK.join(b.text.strip() for b in self.blocks if b.text.strip())
+
+    @property
+    def methods(self) -> List[str]:
+        return sorted({b.method for b in self.blocks})
+
+    @property
+    def ocr_used(self) -> bool:
+        return any(b.method == METHOD_OCR for b in self.blocks)
+
+    @property
+    def block_timings(self) -> List[float]:
+        return [b.seconds for b in self.blocks]
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.block_timings)
+
+    def to_json(self) -> str:
+        return json.dumps({"kind": self.kind, "blocks": [asdict(b) for b in self.blocks]}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "IngestionResult":
+        d = json.loads(raw)
+        return cls(kind=d["kind"], blocks=[Block(**b) for b in d["blocks"]], from_cache=True)
+
+
+def detect_kind(data: bytes, filename: str = "") -> str:
+    """Type de document, d'après l'extension puis le contenu."""
+    name = filename.lower()
+    for ext, kind in ((".pdf", KIND_PDF), (".docx", KIND_DOCX), (".pptx", KIND_PPTX)):
+        if name.endswith(ext):
+            return kind
+    if data[:4] == b"%PDF":
+        return KIND_PDF
+    if data[:2] == b"PK":
+        head = data[:4096]
+        if b"word/" in head:
+            return KIND_DOCX
+        if b"ppt/" in head:
+            return KIND_PPTX
+    return KIND_PDF  # même comportement que les anciens extracteurs : PDF par défaut
+
+
+# =====================================================
+# ========== EXTRACTEURS (GÉNÉRATEURS) ================
+# =====================================================
+
+def _table_rows_text(rows) -> str:
+    lines = []
+    for row in rows:
+        cells = []
+        for c in row.cells:
+            t = c.text.strip().replace("\n", " ")
+            # Les cellules fusionnées sont répétées par python-docx/pptx : on dédoublonne
+            if t and (not cells or cells[-1] != t):
+                cells.append(t)
+        if cells:
+            lines.append(" | ".join(cells))
+    return "\n".join(lines)
+
+
+def _iter_docx(data: bytes) -> Iterator[Block]:
+    if Document is None:
+        raise ImportError("Installe python-docx : pip install python-docx")
+    doc = Document(io.BytesIO(data))
+    # Parcours du corps dans l'ordre du document (paragraphes et tableaux mêlés)
+    index = 0
+    paragraphs = []
+    start = time.perf_counter()
+    for el in doc.element.body.iterchildren():
+        tag = el.tag.rsplit("}", 1)[-1]
+        if tag == "p":
+            t = DocxParagraph(el, doc).text
+            if t.strip():
+                paragraphs.append(t)
+        elif tag == "tbl":
+            if paragraphs:
+                yield Block(index, "\n".join(paragraphs), METHOD_DOCX, time.perf_counter() - start)
+                index += 1
+                paragraphs = []
+                start = time.perf_counter()
+            yield Block(index, _table_rows_text(DocxTable(el, doc).rows), METHOD_DOCX, time.perf_counter() - start)
+            index += 1
+            start = time.perf_counter()
+    if paragraphs:
+        yield Block(index, "\n".join(paragraphs), METHOD_DOCX, time.perf_counter() - start)
+
+
+def _shape_texts(shapes):
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            yield from _shape_texts(shape.shapes)
+        elif getattr(shape, "has_table", False) and shape.has_table:
+            yield _table_rows_text(shape.table.rows)
+        elif getattr(shape, "has_text_frame", False) and shape.has_text_frame:
+            yield shape.text_frame.text
+
+
+def _iter_pptx(data: bytes) -> Iterator[Block]:
+    if Presentation is None:
+        raise ImportError("Installe python-pptx : pip install python-pptx")
+    prs = Presentation(io.BytesIO(data))
+    for i, slide in enumerate(prs.slides):
+        start = time.perf_counter()
+        text = "\n".join(t for t in _shape_texts(slide.shapes) if t.strip())
+        yield Block(i, text, METHOD_PPTX, time.perf_counter() - start)
+
+
+def _iter_pdf(data: bytes) -> Iterator[Block]:
+    for page in iter_pdf_pages(data):
+        yield Block(page.index, page.text, page.method, page.seconds)
+
+
+def iter_blocks(data: bytes, filename: str = "") -> Iterator[Block]:
+    """Génère les blocs du document au fur et à mesure de la lecture."""
+    kind = detect_kind(data, filename)
+    if kind == KIND_DOCX:
+        return _iter_docx(data)
+    if kind == KIND_PPTX:
+        return _iter_pptx(data)
+    return _iter_pdf(data)
+
+
+def ingest(data: bytes, filename: str = "", use_cache: bool = True) -> IngestionResult:
+    """Lit le document entier. Un fichier déjà vu (même contenu) est servi depuis le cache."""
+    cache_key = f"{hash_bytes(data)}:{INGESTION_VERSION}"
+    if use_cache:
+        cached = _CACHE.get_text(cache_key)
+        if cached is not None:
+            return IngestionResult.from_json(cached)
+
+    result = IngestionResult(kind=detect_kind(data, filename))
+    result.blocks = sorted(iter_blocks(data, filename), key=lambda b: b.index)
+    if use_cache:
+        _CACHE.set_text(cache_key, result.to_json())
+    return result
@@ -0,0 +1,88 @@
+"""
+Parseur JSON incrémental pour les réponses Gemini en streaming.
+
+On lui donne les morceaux de texte au fil de l'eau ; il renvoie chaque champ de
+premier niveau de l'objet JSON dès que sa valeur est complète, ce qui permet
+d'afficher NOM, POSTE, PROFIL… avant la fin de la réponse.
+"""
+import json
+from typing import Any, List, Tuple
+
+
+class IncrementalJSONParser:
+    """Suit l'objet racine caractère par caractère (chaînes, échappements, imbrication)."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.started = False      # '{' racine rencontrée (on ignore les ```json avant)
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.state = "key"        # key → colon → value
+        self.key_start = None
+        self.current_key = None
+        self.value_start = None
+        self.fields = {}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Ajoute un morceau ; retourne les (clé, valeur) complétés par ce morceau."""
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        while self.pos < len(buf) and not self.finished:
+            c = buf[self.pos]
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.depth = 1
+                self.pos += 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.state == "key" and self.key_start is not None:
+                        self.current_key = json.loads(buf[self.key_start:self.pos + 1])
+                        self.key_start = None
+                        self.state = "colon"
+                self.pos += 1
+                continue
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.state == "key":
+                    self.key_start = self.pos
+            elif c == ":" and self.depth == 1 and self.state == "colon":
+                self.state = "value"
+                self.value_start = self.pos + 1
+            elif c in "{[":
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._complete_value(buf, completed)
+                    self.finished = True
+            elif c == "," and self.depth == 1 and self.state == "value":
+                self._complete_value(buf, completed)
+            self.pos += 1
+        return completed
+
+    def _complete_value(self, buf: str, completed: List[Tuple[str, Any]]) -> None:
+        if self.state != "value" or self.current_key is None:
+            return
+        raw = buf[self.value_start:self.pos].strip()
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        self.fields[self.current_key] = value
+        completed.append((self.current_key, value))
+        self.current_key = None
+        self.value_start = None
+        self.state = "key"
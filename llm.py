@@ -0,0 +1,214 @@
+"""
+Point d'entrée commun des appels Gemini pour toutes les apps GT.
+
+Les réponses sont mises en cache sur disque (partagé par toutes les sessions et
+conservé au redémarrage). Clé = modèle + configuration de génération + hash du prompt.
+Un appel avec refresh=True ignore le cache (nouvelle analyse forcée) et le remplace.
+Les appels réels passent par le limiteur de débit partagé (rate_limit.py) : les
+erreurs 429 sont retentées automatiquement avec backoff.
+generate_text_streaming() reçoit la réponse en flux et signale chaque champ JSON
+de premier niveau dès qu'il est complet (affichage progressif dans l'UI).
+Le fournisseur est choisi par llm_backend.py (Gemini, ou remplaçant local hors ligne).
+Les requêtes identiques simultanées (même clé de cache, ex. plusieurs recruteurs qui
+ouvrent le même CV) sont fusionnées : un seul appel part, les autres attendent son résultat.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from cv_cache import DiskCache
+from json_stream import IncrementalJSONParser
+from llm_backend import DEFAULT_MODEL, get_backend
+from rate_limit import call_with_backoff, get_limiter
+from token_budget import estimate_tokens
+
+LLM_CACHE_TTL = float(os.environ.get("GT_LLM_CACHE_TTL", str(30 * 24 * 3600)))  # 30 jours
+LLM_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# Tokens de sortie comptés d'avance dans le quota tokens/minute
+EXPECTED_OUTPUT_TOKENS = 2000
+
+_CACHE = DiskCache("llm", max_bytes=LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Un seul appel en cours par clé dans le processus ; les appels identiques partagent son résultat."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced = 0  # appels évités depuis le démarrage
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """(résultat, partagé) : partagé=True si on a attendu l'appel d'un autre thread/session."""
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                else:
+                    self.coalesced += 1
+            if leader:
+                break
+            flight.done.wait()
+            if flight.error is None:
+                return flight.result, True
+            if isinstance(flight.error, Exception):
+                raise flight.error
+            # Appel interrompu côté meneur (ex. session Streamlit relancée) : on réessaie soi-même
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+
+_FLIGHTS = SingleFlight()
+
+
+def _json_default(obj: Any):
+    """Sérialise ce que json ne sait pas faire (schéma Pydantic, GenerationConfig…)."""
+    if isinstance(obj, type) and hasattr(obj, "model_json_schema"):
+        return obj.model_json_schema()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    return repr(obj)
+
+
+def model_tag(model_name: str) -> str:
+    """Identifiant du modèle pour les caches : les réponses du remplaçant local restent séparées."""
+    backend = get_backend()
+    return model_name if backend.name == "gemini" else f"{backend.name}/{model_name}"
+
+
+def cache_key(model_name: str, prompt: str, generation_config: Any = None) -> str:
+    config = json.dumps(generation_config, sort_keys=True, default=_json_default, ensure_ascii=False)
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{model_name}\n{config}\n{prompt_hash}".encode("utf-8")).hexdigest()
+
+
+def strip_json_fences(raw: str) -> str:
+    """Retire les ```json … ``` que Gemini ajoute parfois."""
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1] if "\n" in raw else raw[3:]
+        if raw.startswith("json"):
+            raw = raw[4:]
+        raw = raw.rsplit("```", 1)[0]
+    return raw.strip()
+
+
+def looks_like_json(raw: str) -> bool:
+    """Vrai si la réponse contient un objet JSON décodable (on ne cache pas les réponses cassées)."""
+    match = re.search(r"\{.*\}", strip_json_fences(raw), re.DOTALL)
+    if not match:
+        return False
+    try:
+        json.loads(match.group(0))
+        return True
+    except ValueError:
+        return False
+
+
+def generate_text(prompt: str, model_name: str = DEFAULT_MODEL, generation_config: Any = None,
+                  refresh: bool = False, cacheable: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Texte de la réponse Gemini pour `prompt`, servi depuis le cache si possible.
+    `cacheable(texte)` décide si la réponse mérite d'être conservée (par défaut : non vide).
+    Les erreurs de l'API (hors 429 retentées) remontent telles quelles à l'appelant.
+    """
+    key = cache_key(model_tag(model_name), prompt, generation_config)
+    if not refresh:
+        cached = _CACHE.get_text(key)
+        if cached is not None:
+            return cached
+
+    def call() -> str:
+        backend = get_backend()
+        text = call_with_backoff(
+            lambda: backend.generate(prompt, model_name, generation_config),
+            get_limiter(model_tag(model_name)),
+            estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS,
+        )
+        if text.strip() and (cacheable is None or cacheable(text)):
+            _CACHE.set_text(key, text)
+        return text
+
+    text, _ = _FLIGHTS.do(key, call)
+    return text
+
+
+def _start_stream(backend, prompt: str, model_name: str, generation_config: Any):
+    """Lance la génération en flux et attend le premier morceau (c'est là qu'arrivent les 429)."""
+    stream = iter(backend.stream(prompt, model_name, generation_config))
+    first = next(stream, None)
+    return first, stream
+
+
+def generate_text_streaming(prompt: str, model_name: str = DEFAULT_MODEL, generation_config: Any = None,
+                            refresh: bool = False, cacheable: Optional[Callable[[str], bool]] = None,
+                            on_field: Optional[Callable[[str, Any], None]] = None) -> str:
+    """
+    Comme generate_text(), mais en streaming : on_field(clé, valeur) est appelé pour
+    chaque champ de premier niveau du JSON dès qu'il est complet. Retourne le texte complet.
+    Sur un succès de cache, tous les champs sont signalés d'un coup.
+    """
+    parser = IncrementalJSONParser()
+
+    def emit(chunk: str) -> None:
+        for key, value in parser.feed(chunk):
+            if on_field:
+                on_field(key, value)
+
+    key = cache_key(model_tag(model_name), prompt, generation_config)
+    if not refresh:
+        cached = _CACHE.get_text(key)
+        if cached is not None:
+            emit(cached)
+            return cached
+
+    def call() -> str:
+        backend = get_backend()
+        first, stream = call_with_backoff(
+            lambda: _start_stream(backend, prompt, model_name, generation_config),
+            get_limiter(model_tag(model_name)),
+            estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS,
+        )
+        parts = []
+        if first is not None:
+            parts.append(first)
+            emit(first)
+        for chunk in stream:
+            parts.append(chunk)
+            emit(chunk)
+        text = "".join(parts)
+        if text.strip() and (cacheable is None or cacheable(text)):
+            _CACHE.set_text(key, text)
+        return text
+
+    text, shared = _FLIGHTS.do(key, call)
+    if shared:
+        # Résultat d'un appel identique lancé par une autre session : champs signalés d'un coup
+        emit(text)
+    return text
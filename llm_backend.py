@@ -0,0 +1,237 @@
+"""
+Backends LLM interchangeables pour llm.py.
+
+- GeminiBackend : appels réels à google.generativeai (comportement par défaut) ;
+  avec GT_LLM_RECORD_DIR, chaque réponse est aussi enregistrée pour être rejouée.
+- StandInBackend : remplaçant local, sans réseau ni quota. Il rejoue les réponses
+  enregistrées, sinon il synthétise un JSON conforme au schéma demandé. La latence
+  (log-normale, pour avoir une vraie queue de distribution) et les erreurs
+  (429 / erreurs serveur) sont injectables. Sert aux tests de charge et aux benchmarks.
+
+Sélection : GT_LLM_BACKEND = "gemini" (défaut) ou "standin", ou set_backend().
+"""
+import hashlib
+import json
+from abc import ABC, abstractmethod
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Iterator, Optional
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+# Modèle utilisé par toutes les apps (un seul endroit à modifier)
+DEFAULT_MODEL = os.environ.get("GT_LLM_MODEL", "gemini-2.5-flash")
+# Cascade d'extraction : du modèle le plus rapide/économique au plus fiable (séparés par des virgules)
+MODEL_TIERS = list(dict.fromkeys(m.strip() for m in os.environ.get(
+    "GT_LLM_MODEL_TIERS", f"gemini-2.5-flash-lite,{DEFAULT_MODEL}").split(",") if m.strip()))
+
+RECORD_DIR = os.environ.get("GT_LLM_RECORD_DIR") or None
+STANDIN_REPLAY_DIR = os.environ.get("GT_STANDIN_REPLAY_DIR") or RECORD_DIR
+STANDIN_LATENCY = float(os.environ.get("GT_STANDIN_LATENCY", "1.5"))        # secondes (médiane)
+STANDIN_LATENCY_SIGMA = float(os.environ.get("GT_STANDIN_LATENCY_SIGMA", "0.5"))
+STANDIN_ERROR_RATE = float(os.environ.get("GT_STANDIN_ERROR_RATE", "0"))     # erreurs serveur
+STANDIN_429_RATE = float(os.environ.get("GT_STANDIN_429_RATE", "0"))         # quotas dépassés
+STANDIN_CHUNKS = 8  # nombre de morceaux en streaming
+
+
+def replay_key(prompt: str) -> str:
+    """Nom de fichier d'une réponse enregistrée (hash du prompt, indépendant du modèle)."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class LLMBackend(ABC):
+    """Interface commune : texte complet ou flux de morceaux de texte."""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompt: str, model_name: str, generation_config: Any = None) -> str:
+        """Réponse complète du modèle."""
+
+    def stream(self, prompt: str, model_name: str, generation_config: Any = None) -> Iterator[str]:
+        yield self.generate(prompt, model_name, generation_config)
+
+
+class GeminiBackend(LLMBackend):
+    name = "gemini"
+
+    def __init__(self, record_dir: Optional[str] = RECORD_DIR):
+        if genai is None:
+            raise ImportError("Installe google-generativeai : pip install google-generativeai")
+        self.record_dir = record_dir
+
+    def _record(self, prompt: str, text: str) -> None:
+        if not self.record_dir or not text.strip():
+            return
+        os.makedirs(self.record_dir, exist_ok=True)
+        with open(os.path.join(self.record_dir, replay_key(prompt) + ".txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def generate(self, prompt: str, model_name: str, generation_config: Any = None) -> str:
+        model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        text = model.generate_content(prompt).text
+        self._record(prompt, text)
+        return text
+
+    def stream(self, prompt: str, model_name: str, generation_config: Any = None) -> Iterator[str]:
+        model = genai.GenerativeModel(model_name, generation_config=generation_config)
+        parts = []
+        for chunk in model.generate_content(prompt, stream=True):
+            parts.append(chunk.text)
+            yield chunk.text
+        self._record(prompt, "".join(parts))
+
+
+class StandInError(Exception):
+    """Erreur injectée par le remplaçant local (même forme de message que l'API)."""
+
+
+# =====================================================
+# ========== SYNTHÈSE D'UN JSON CONFORME ==============
+# =====================================================
+
+def _template_from_prompt(prompt: str) -> Optional[Any]:
+    """Premier objet JSON décodable du prompt (les prompts GT contiennent la structure attendue)."""
+    decoder = json.JSONDecoder()
+    start = prompt.find("{")
+    while start != -1:
+        try:
+            obj, _ = decoder.raw_decode(prompt, start)
+            if isinstance(obj, dict) and obj:
+                return obj
+        except ValueError:
+            pass
+        start = prompt.find("{", start + 1)
+    return None
+
+
+def _fill_template(value: Any, rng: random.Random, path: str = "") -> Any:
+    if isinstance(value, dict):
+        return {k: _fill_template(v, rng, k) for k, v in value.items()}
+    if isinstance(value, list):
+        item = value[0] if value else ""
+        return [_fill_template(item, rng, path) for _ in range(rng.randint(1, 4))]
+    if isinstance(value, str):
+        return f"{path or 'valeur'} synthétique {rng.randint(1, 999)}"
+    return value
+
+
+def _from_json_schema(schema: dict, rng: random.Random, defs: dict, name: str = "") -> Any:
+    if "$ref" in schema:
+        return _from_json_schema(defs[schema["$ref"].split("/")[-1]], rng, defs, name)
+    kind = str(schema.get("type", "")).lower()
+    if kind == "object" or "properties" in schema:
+        return {k: _from_json_schema(v, rng, defs, k) for k, v in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_from_json_schema(schema.get("items", {}), rng, defs, name) for _ in range(rng.randint(1, 4))]
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if kind == "number":
+        return round(rng.random() * 100, 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return f"{name or 'valeur'} synthétique {rng.randint(1, 999)}"
+
+
+def _response_schema(generation_config: Any) -> Optional[dict]:
+    schema = None
+    if isinstance(generation_config, dict):
+        schema = generation_config.get("response_schema")
+    elif generation_config is not None:
+        schema = getattr(generation_config, "response_schema", None)
+    if isinstance(schema, type) and hasattr(schema, "model_json_schema"):
+        return schema.model_json_schema(by_alias=True)
+    return schema if isinstance(schema, dict) else None
+
+
+def synthesize_response(prompt: str, generation_config: Any = None, seed: Optional[int] = None) -> str:
+    """JSON plausible : d'après response_schema s'il existe, sinon d'après la structure du prompt."""
+    rng = random.Random(seed if seed is not None else replay_key(prompt))
+    schema = _response_schema(generation_config)
+    if schema:
+        data = _from_json_schema(schema, rng, schema.get("$defs", {}))
+    else:
+        data = _fill_template(_template_from_prompt(prompt) or {"texte": ""}, rng)
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+class StandInBackend(LLMBackend):
+    """Remplaçant local de Gemini : rejeu, synthèse, latence et erreurs configurables."""
+
+    name = "standin"
+
+    def __init__(self, replay_dir: Optional[str] = STANDIN_REPLAY_DIR, latency: float = STANDIN_LATENCY,
+                 latency_sigma: float = STANDIN_LATENCY_SIGMA, error_rate: float = STANDIN_ERROR_RATE,
+                 rate_limit_rate: float = STANDIN_429_RATE, seed: Optional[int] = None):
+        self.replay_dir = replay_dir
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            latency = self.latency * math.exp(self._rng.gauss(0, self.latency_sigma)) if self.latency > 0 else 0.0
+            return latency, self._rng.random()
+
+    def _maybe_fail(self, roll: float) -> None:
+        if roll < self.rate_limit_rate:
+            raise StandInError("429 Resource has been exhausted (e.g. check quota). Please retry in 1.0s")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise StandInError("500 Internal error injected by stand-in backend")
+
+    def _response(self, prompt: str, generation_config: Any) -> str:
+        if self.replay_dir:
+            path = os.path.join(self.replay_dir, replay_key(prompt) + ".txt")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        return synthesize_response(prompt, generation_config)
+
+    def generate(self, prompt: str, model_name: str, generation_config: Any = None) -> str:
+        latency, roll = self._draw()
+        time.sleep(latency)
+        self._maybe_fail(roll)
+        return self._response(prompt, generation_config)
+
+    def stream(self, prompt: str, model_name: str, generation_config: Any = None) -> Iterator[str]:
+        latency, roll = self._draw()
+        # ~30 % de la latence avant le premier morceau, le reste réparti sur le flux
+        time.sleep(latency * 0.3)
+        self._maybe_fail(roll)
+        text = self._response(prompt, generation_config)
+        size = max(1, math.ceil(len(text) / STANDIN_CHUNKS))
+        for i in range(0, len(text), size):
+            if i:
+                time.sleep(latency * 0.7 / STANDIN_CHUNKS)
+            yield text[i:i + size]
+
+
+_backend: Optional[LLMBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> LLMBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            kind = os.environ.get("GT_LLM_BACKEND", "gemini").lower()
+            _backend = StandInBackend() if kind == "standin" else GeminiBackend()
+        return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]) -> None:
+    """Remplace le backend du processus (None = retour à la sélection par GT_LLM_BACKEND)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,132 @@
+"""
+OCR parallèle des pages PDF scannées (PyMuPDF + Tesseract).
+
+Chaque page faible est isolée dans un mini-PDF d'une page (copie sans rendu,
+quasi gratuite), puis rendue et reconnue dans un processus du pool : on utilise
+tous les cœurs au lieu d'enchaîner les pages une par une.
+Le résultat est indexé par numéro de page, l'appelant garde donc l'ordre.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Optional, Tuple
+
+# --- Modules optionnels (Vérification des dépendances)
+try:
+    import fitz  # pymupdf
+except ImportError:
+    fitz = None
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+# Configuration (surchargeable par variables d'environnement sur le serveur)
+OCR_WORKERS = int(os.environ.get("GT_OCR_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+OCR_PAGE_TIMEOUT = float(os.environ.get("GT_OCR_PAGE_TIMEOUT", "60"))
+OCR_DPI = 300
+OCR_LANG = "fra"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Pool partagé par toutes les sessions (créé au premier besoin)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS)
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _ocr_single_page_pdf(page_pdf: bytes, dpi: int, lang: str, timeout: float) -> Tuple[str, float]:
+    """Rend la page unique du PDF et la passe à Tesseract (exécuté dans un worker)."""
+    start = time.perf_counter()
+    with fitz.open(stream=page_pdf, filetype="pdf") as doc:
+        pix = doc[0].get_pixmap(dpi=dpi)
+        # Pixels bruts → PIL directement, sans ré-encodage PNG intermédiaire
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    text = pytesseract.image_to_string(img, lang=lang, timeout=timeout)
+    return text, time.perf_counter() - start
+
+
+def _split_pages(pdf_bytes: bytes, page_indices: Iterable[int]) -> Dict[int, bytes]:
+    """Extrait chaque page demandée dans un PDF d'une seule page."""
+    pages = {}
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for i in page_indices:
+            single = fitz.open()
+            single.insert_pdf(doc, from_page=i, to_page=i)
+            pages[i] = single.tobytes()
+            single.close()
+    return pages
+
+
+def ocr_pdf_pages(pdf_bytes: bytes, page_indices: Iterable[int],
+                  workers: Optional[int] = None, page_timeout: Optional[float] = None,
+                  dpi: int = OCR_DPI, lang: str = OCR_LANG) -> Dict[int, Tuple[str, float]]:
+    """
+    OCR des pages `page_indices` (base 0) du PDF, en parallèle.
+    Retourne {index_page: (texte, secondes)}. Une page en échec ou hors délai renvoie ("", 0.0).
+    """
+    if fitz is None or pytesseract is None:
+        raise ImportError("Installe pymupdf et pytesseract : pip install pymupdf pytesseract pillow")
+
+    page_indices = list(page_indices)
+    if not page_indices:
+        return {}
+    workers = workers or OCR_WORKERS
+    page_timeout = page_timeout or OCR_PAGE_TIMEOUT
+    page_pdfs = _split_pages(pdf_bytes, page_indices)
+    results = {i: ("", 0.0) for i in page_indices}
+
+    # Une seule page ou un seul worker : pas la peine de payer le coût du pool
+    if workers <= 1 or len(page_indices) == 1:
+        for i in page_indices:
+            try:
+                results[i] = _ocr_single_page_pdf(page_pdfs[i], dpi, lang, page_timeout)
+            except Exception:
+                pass
+        return results
+
+    pool = _get_pool() if workers == OCR_WORKERS else ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(_ocr_single_page_pdf, page_pdfs[i], dpi, lang, page_timeout): i
+                   for i in page_indices}
+        # Tesseract est tué au bout de page_timeout ; on borne aussi l'attente globale
+        # (rendu compris) au nombre de "vagues" de pages que le pool doit traiter.
+        waves = -(-len(page_indices) // workers)
+        deadline = time.monotonic() + waves * (page_timeout + 10)
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    results[futures[fut]] = fut.result()
+                except BrokenProcessPool:
+                    _reset_pool()
+                except Exception:
+                    pass
+        for fut in pending:
+            fut.cancel()
+    finally:
+        if pool is not _pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+    return results
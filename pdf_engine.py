@@ -0,0 +1,159 @@
+"""
+Extraction PDF en une seule passe, page par page.
+
+Le document est ouvert UNE fois ; pour chaque page on prend la méthode la moins
+chère qui donne assez de texte :
+    1. texte natif   (quasi gratuit)
+    2. passe tableaux (CV mis en page dans des grilles)
+    3. OCR           (pages scannées, regroupées et parallélisées via ocr.py)
+La méthode retenue et le temps passé sont notés sur chaque page.
+"""
+import io
+import time
+from dataclasses import dataclass
+from typing import Iterator, List
+
+# --- Modules optionnels (Vérification des dépendances)
+try:
+    import fitz  # pymupdf
+except ImportError:
+    fitz = None
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+from ocr import ocr_pdf_pages, pytesseract
+
+# En dessous de ce nombre de caractères, une page est considérée comme "faible"
+MIN_PAGE_CHARS = 50
+
+METHOD_NATIVE = "native"
+METHOD_TABLES = "tables"
+METHOD_OCR = "ocr"
+METHOD_EMPTY = "empty"
+
+OCR_AVAILABLE = fitz is not None and pytesseract is not None
+
+
+@dataclass
+class PageText:
+    index: int
+    text: str
+    method: str
+    seconds: float = 0.0
+
+
+def _rows_to_text(rows) -> str:
+    lines = []
+    for row in rows:
+        cells = [(c or "").replace("\n", " ").strip() for c in row]
+        if any(cells):
+            lines.append(" | ".join(cells))
+    return "\n".join(lines)
+
+
+def _is_strong(text: str) -> bool:
+    return len(text.strip()) > MIN_PAGE_CHARS
+
+
+def _iter_with_fitz(pdf_bytes: bytes, ocr: bool) -> Iterator[PageText]:
+    weak = {}
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for i, page in enumerate(doc):
+            start = time.perf_counter()
+            native = page.get_text("text")
+            if _is_strong(native):
+                yield PageText(i, native, METHOD_NATIVE, time.perf_counter() - start)
+                continue
+            # Passe tableaux : uniquement sur les pages faibles
+            table_text = ""
+            if hasattr(page, "find_tables"):
+                try:
+                    table_text = "\n".join(_rows_to_text(t.extract()) for t in page.find_tables().tables)
+                except Exception:
+                    table_text = ""
+            combined = "\n".join(t for t in (native.strip(), table_text) if t)
+            elapsed = time.perf_counter() - start
+            if _is_strong(combined):
+                yield PageText(i, combined, METHOD_TABLES, elapsed)
+            else:
+                weak[i] = PageText(i, combined, METHOD_EMPTY, elapsed)
+
+    # Pages scannées : un seul lot OCR parallèle, rendues après les pages natives
+    ocr_results = ocr_pdf_pages(pdf_bytes, list(weak)) if (ocr and weak and OCR_AVAILABLE) else {}
+    for i, page in weak.items():
+        ocr_text, ocr_seconds = ocr_results.get(i, ("", 0.0))
+        if ocr_text.strip():
+            yield PageText(i, ocr_text, METHOD_OCR, page.seconds + ocr_seconds)
+        else:
+            yield page
+
+
+def _iter_with_pdfplumber(pdf_bytes: bytes) -> Iterator[PageText]:
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for i, page in enumerate(pdf.pages):
+            start = time.perf_counter()
+            native = page.extract_text() or ""
+            if _is_strong(native):
+                yield PageText(i, native, METHOD_NATIVE, time.perf_counter() - start)
+                continue
+            table_text = "\n".join(_rows_to_text(t) for t in page.extract_tables())
+            combined = "\n".join(t for t in (native.strip(), table_text) if t)
+            method = METHOD_TABLES if _is_strong(combined) else METHOD_EMPTY
+            yield PageText(i, combined, method, time.perf_counter() - start)
+
+
+def _iter_with_pypdf(pdf_bytes: bytes) -> Iterator[PageText]:
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    for i, page in enumerate(reader.pages):
+        start = time.perf_counter()
+        t = page.extract_text() or ""
+        yield PageText(i, t, METHOD_NATIVE if t.strip() else METHOD_EMPTY, time.perf_counter() - start)
+
+
+def iter_pdf_pages(pdf_bytes: bytes, ocr: bool = True) -> Iterator[PageText]:
+    """
+    Génère les pages au fur et à mesure (les pages OCR arrivent en dernier,
+    chacune porte son index). Les autres bibliothèques ne servent que si PyMuPDF
+    est absent ou n'arrive pas à ouvrir le fichier.
+    """
+    backends = []
+    if fitz is not None:
+        backends.append(lambda b: _iter_with_fitz(b, ocr))
+    if pdfplumber is not None:
+        backends.append(_iter_with_pdfplumber)
+    if PdfReader is not None:
+        backends.append(_iter_with_pypdf)
+    if not backends:
+        raise ImportError("Installe pymupdf (recommandé) : pip install pymupdf")
+
+    last_error = None
+    for backend in backends:
+        yielded = False
+        try:
+            for page in backend(pdf_bytes):
+                yielded = True
+                yield page
+            return
+        except Exception as e:
+            # Fichier illisible pour ce moteur → moteur suivant, sauf si des pages sont déjà parties
+            if yielded:
+                raise
+            last_error = e
+    raise last_error
+
+
+def extract_pdf_pages(pdf_bytes: bytes, ocr: bool = True) -> List[PageText]:
+    """Toutes les pages, dans l'ordre du document."""
+    return sorted(iter_pdf_pages(pdf_bytes, ocr), key=lambda p: p.index)
+
+
+def pages_to_text(pages: List[PageText]) -> str:
+    return "\n".join(p.text.strip() for p in pages if p.text.strip())
@@ -0,0 +1,229 @@
+"""
+Génération PPTX en lot (toute l'équipe d'une offre) dans un pool de processus.
+
+Le rendu python-pptx est du pur calcul Python : des threads se gêneraient (GIL),
+on passe donc par des processus, lancés par forkserver (jamais fork depuis le serveur
+Streamlit multi-thread). Le pool est créé une fois par template puis réutilisé d'un lot
+à l'autre ; chaque worker charge le template (octets + plan, template_plan.py) dès son
+démarrage et le garde en mémoire. Les PPTX produits sont
+écrits dans un seul ZIP au fur et à mesure qu'ils arrivent.
+
+La fonction de rendu doit être définie au niveau module (picklable) :
+    render(payload) -> octets du PPTX
+
+generate_batch() est l'écran commun aux apps (app_powerpoint, app2) : analyse des CV
+dans des threads, rendu dans le pool, barre de progression et tableau des temps.
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import streamlit as st
+
+from template_plan import template_bytes
+
+RENDER_WORKERS = int(os.environ.get("GT_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+BATCH_ANALYSIS_WORKERS = 4  # appels Gemini simultanés pendant l'analyse d'un lot
+
+
+@dataclass
+class RenderResult:
+    name: str                  # nom du fichier dans le ZIP
+    data: Optional[bytes]      # None si le rendu a échoué
+    seconds: float             # temps de rendu dans le worker
+    error: str = ""
+
+
+def _warm(template_path: str) -> None:
+    # Initialisation du worker : template lu et planifié une fois pour toute sa durée de vie
+    template_bytes(template_path)
+
+
+def _render(render: Callable[[Any], bytes], name: str, payload: Any) -> RenderResult:
+    start = time.perf_counter()
+    try:
+        data = render(payload)
+        return RenderResult(name, data, time.perf_counter() - start)
+    except Exception as e:
+        return RenderResult(name, None, time.perf_counter() - start, str(e))
+
+
+_pools: Dict[str, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+# Modules chargés une fois dans le serveur forkserver : chaque worker en hérite déjà importés.
+# Pas de '__main__' : le script Streamlit (main.py) ne doit pas être ré-exécuté dans les workers.
+_FORKSERVER_PRELOAD = ["template_plan", "pptx_fill", "pptx_media", "pptx_optimize"]
+
+
+def _context():
+    # Pas de fork direct : le serveur Streamlit a de nombreux threads, un enfant forké pourrait
+    # hériter d'un verrou tenu (logging, DiskCache, limiteur) et se bloquer. forkserver part d'un
+    # processus neuf à un seul thread ; spawn sinon (Windows). _warm recharge le template.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(_FORKSERVER_PRELOAD)
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+@contextmanager
+def _without_main_script():
+    """
+    Sous Streamlit, __main__ est main.py (toute l'interface, sans garde __name__) : un worker
+    spawn/forkserver le ré-exécuterait au démarrage. Les workers étant lancés dans submit(),
+    __main__ est remplacé par un module vide le temps des soumissions.
+    """
+    saved = sys.modules.get("__main__")
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = saved
+
+
+def get_pool(template_path: str, workers: int = RENDER_WORKERS) -> ProcessPoolExecutor:
+    """Pool du template, créé au premier lot puis réutilisé (workers déjà chauds)."""
+    with _pools_lock:
+        pool = _pools.get(template_path)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=max(1, workers), mp_context=_context(),
+                                       initializer=_warm, initargs=(template_path,))
+            _pools[template_path] = pool
+        return pool
+
+
+def _drop_pool(template_path: str) -> None:
+    with _pools_lock:
+        pool = _pools.pop(template_path, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_batch(render: Callable[[Any], bytes], jobs: Iterable[Tuple[str, Any]],
+                 template_path: str, workers: int = RENDER_WORKERS) -> Iterator[RenderResult]:
+    """Rend chaque (nom, payload) dans le pool ; les résultats arrivent dans l'ordre de fin."""
+    jobs = list(jobs)
+    with _without_main_script():
+        try:
+            pool = get_pool(template_path, workers)
+            futures = {pool.submit(_render, render, name, payload): name for name, payload in jobs}
+        except BrokenProcessPool:
+            # Worker tué (mémoire…) lors d'un lot précédent : on repart d'un pool neuf
+            _drop_pool(template_path)
+            pool = get_pool(template_path, workers)
+            futures = {pool.submit(_render, render, name, payload): name for name, payload in jobs}
+    for fut in as_completed(futures):
+        try:
+            yield fut.result()
+        except BrokenProcessPool as e:
+            _drop_pool(template_path)  # le prochain lot recrée le pool
+            yield RenderResult(futures[fut], None, 0.0, f"Worker interrompu : {e}")
+
+
+def _unique(name: str, used: set) -> str:
+    base, ext = os.path.splitext(name)
+    candidate, n = name, 2
+    while candidate in used:
+        candidate = f"{base}_{n}{ext}"
+        n += 1
+    used.add(candidate)
+    return candidate
+
+
+def zip_results(results: Iterable[RenderResult],
+                on_result: Optional[Callable[[RenderResult], None]] = None) -> bytes:
+    """
+    Écrit chaque PPTX dans le ZIP dès qu'il est prêt (on_result est appelé à chaque fois).
+    Les PPTX sont déjà compressés : stockés tels quels (ZIP_STORED), sans recompression.
+    """
+    buffer = BytesIO()
+    used = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as zf:
+        for result in results:
+            if result.data is not None:
+                result.name = _unique(result.name, used)
+                zf.writestr(result.name, result.data)
+            if on_result:
+                on_result(result)
+    return buffer.getvalue()
+
+
+# =====================================================
+# ========== ÉCRAN DE GÉNÉRATION EN LOT ===============
+# =====================================================
+
+def _timed_analysis(analyse: Callable[[Any], Any], file) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    return analyse(file), time.perf_counter() - start
+
+
+def generate_batch(files: Sequence[Any], analyse: Callable[[Any], Any], render: Callable[[Any], bytes],
+                   template_path: str, output_name: Callable[[Any], str],
+                   job: Callable[[Any], Any] = lambda data: data) -> Tuple[bytes, str]:
+    """
+    Analyse tous les CV téléversés (threads, aucun appel Streamlit dans `analyse`), puis les
+    rend dans le pool de processus ; chaque PPTX est ajouté au ZIP dès qu'il est prêt et le
+    tableau des temps est mis à jour en direct.
+        analyse(fichier) -> données ; job(données) -> payload de render ;
+        output_name(données) -> nom du PPTX dans le ZIP (doublons suffixés _2, _3…).
+    Retourne (octets du ZIP, résumé).
+    """
+    # Lignes indexées par position du fichier : deux téléversements au même nom restent distincts
+    rows = [{"CV": f.name, "Statut": "⏳ Analyse", "Analyse (s)": None, "Rendu (s)": None, "Taille (Ko)": None}
+            for f in files]
+    progress = st.progress(0.0, text="Analyse des CV…")
+    table = st.empty()
+
+    def show():
+        table.dataframe(rows, hide_index=True, use_container_width=True)
+
+    show()
+    start = time.perf_counter()
+    jobs, sources, used = [], {}, set()
+    with ThreadPoolExecutor(max_workers=BATCH_ANALYSIS_WORKERS) as pool:
+        futures = {pool.submit(_timed_analysis, analyse, f): i for i, f in enumerate(files)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            row = rows[futures[fut]]
+            try:
+                data, seconds = fut.result()
+            except Exception as e:
+                row["Statut"] = f"❌ Analyse : {e}"
+            else:
+                name = _unique(output_name(data), used)
+                jobs.append((name, job(data)))
+                sources[name] = futures[fut]
+                row.update({"Statut": "⏳ Rendu", "Analyse (s)": round(seconds, 1)})
+            progress.progress(done / len(files) / 2, text=f"Analyse : {done}/{len(files)}")
+            show()
+
+    rendered = []
+
+    def on_result(result: RenderResult):
+        row = rows[sources[result.name]]
+        row["Rendu (s)"] = round(result.seconds, 2)
+        if result.data is None:
+            row["Statut"] = f"❌ Rendu : {result.error}"
+        else:
+            row.update({"Statut": "✅ Terminé", "Taille (Ko)": round(len(result.data) / 1024)})
+        rendered.append(result)
+        progress.progress(0.5 + len(rendered) / max(len(jobs), 1) / 2, text=f"Rendu : {len(rendered)}/{len(jobs)}")
+        show()
+
+    archive = zip_results(render_batch(render, jobs, template_path), on_result)
+    progress.progress(1.0, text="Génération en lot terminée")
+    ok = sum(r.data is not None for r in rendered)
+    summary = (f"{ok}/{len(files)} PPTX en {time.perf_counter() - start:.1f} s "
+               f"(rendu cumulé {sum(r.seconds for r in rendered):.1f} s sur {RENDER_WORKERS} processus)")
+    return archive, summary
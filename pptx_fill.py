@@ -0,0 +1,224 @@
+"""
+Remplissage XML direct des tableaux et zones de texte PPTX (app_powerpoint).
+
+python-pptx crée un objet Python par cellule, paragraphe et run, et chaque réglage
+de police (nom, taille, couleur, gras) réécrit le XML. Sur un CV de 60+ expériences,
+ce formatage run par run coûtait plusieurs secondes. Ici le formatage est préparé
+UNE fois dans une ligne (ou un paragraphe) prototype :
+    - pPr du paragraphe (niveau 0, retraits nuls, alignement) ;
+    - lstStyle de la cellule (valeurs par défaut héritées par les paragraphes) ;
+    - rPr du run, recopié tel quel (certains lecteurs ignorent lstStyle dans les tableaux) ;
+    - fond de cellule et hauteur de ligne.
+Chaque ligne de données est une copie du prototype dans laquelle on ne pose que le texte.
+
+clone_slide() duplique une slide (pagination des expériences/projets) avec ses
+relations : images, liens et médias restent valides dans la copie.
+"""
+import re
+from copy import deepcopy
+from typing import Iterable, List, Optional, Sequence, Union
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.xmlchemy import OxmlElement
+
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+# Caractères de contrôle refusés par XML (python-pptx les échappe, on les retire)
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+CellValue = Union[str, Sequence[str]]  # texte (les \n donnent des paragraphes) ou liste de paragraphes
+
+
+def _a(tag: str) -> str:
+    return f"{{{A_NS}}}{tag}"
+
+
+def _rgb(color) -> str:
+    return str(color) if color is not None else "000000"
+
+
+def run_properties(font_name: str, size_pt: float, color, bold: bool = False, tag: str = "rPr"):
+    """<a:rPr> (ou <a:defRPr>, <a:endParaRPr>) : police, taille, couleur RGB, gras."""
+    rpr = OxmlElement(f"a:{tag}")
+    if tag != "defRPr":
+        rpr.set("lang", "fr-FR")
+    rpr.set("sz", str(int(round(size_pt * 100))))
+    rpr.set("b", "1" if bold else "0")
+    fill = etree.SubElement(rpr, _a("solidFill"))
+    etree.SubElement(fill, _a("srgbClr")).set("val", _rgb(color))
+    etree.SubElement(rpr, _a("latin")).set("typeface", font_name)
+    return rpr
+
+
+def _with_tag(rpr, tag: str):
+    el = deepcopy(rpr)
+    el.tag = _a(tag)
+    if tag == "defRPr":
+        el.attrib.pop("lang", None)
+    return el
+
+
+class ParagraphPrototype:
+    """Paragraphe pré-formaté : pPr + rPr préparés une fois, recopiés pour chaque ligne."""
+
+    def __init__(self, rpr, ppr=None, align: Optional[str] = None):
+        self.rpr = rpr
+        ppr = deepcopy(ppr) if ppr is not None else OxmlElement("a:pPr")
+        ppr.tag = _a("pPr")
+        ppr.set("lvl", "0")
+        ppr.set("marL", "0")
+        ppr.set("indent", "0")
+        if align:
+            ppr.set("algn", align)
+        self.ppr = ppr
+        self.end = _with_tag(rpr, "endParaRPr")
+
+    def build(self, text: str = ""):
+        p = OxmlElement("a:p")
+        p.append(deepcopy(self.ppr))
+        if text:
+            r = etree.SubElement(p, _a("r"))
+            r.append(deepcopy(self.rpr))
+            etree.SubElement(r, _a("t")).text = _CONTROL_CHARS.sub("", text)
+        p.append(deepcopy(self.end))
+        return p
+
+    def list_style(self):
+        """<a:lstStyle> dont le niveau 1 reprend ce formatage (hérité par les paragraphes)."""
+        lst = OxmlElement("a:lstStyle")
+        lvl1 = etree.SubElement(lst, _a("lvl1pPr"))
+        for key in ("marL", "indent", "algn"):
+            if key in self.ppr.attrib:
+                lvl1.set(key, self.ppr.get(key))
+        lvl1.append(_with_tag(self.rpr, "defRPr"))
+        return lst
+
+
+def append_paragraphs(txBody, proto: ParagraphPrototype, lines: Iterable[str]) -> None:
+    """Ajoute un paragraphe formaté par ligne à la fin d'un <a:txBody>."""
+    for line in lines:
+        txBody.append(proto.build(line))
+
+
+def _paragraphs(value: CellValue) -> List[str]:
+    if value is None:
+        return [""]
+    if isinstance(value, str):
+        return value.split("\n")
+    return list(value) or [""]
+
+
+class RowPrototype:
+    """
+    Ligne de tableau pré-formatée, copiée depuis la ligne d'en-tête (bordures, marges,
+    pPr d'origine) : fond, hauteur et police sont posés une seule fois.
+    """
+
+    def __init__(self, table, height: int, fill_color, font_name: str, size_pt: float, color, bold: bool = False):
+        tbl = table._tbl
+        if not tbl.tr_lst:
+            raise IndexError("Tableau corrompu : Impossible de trouver une ligne modèle.")
+        tr = deepcopy(tbl.tr_lst[0])
+        tr.set("h", str(int(height)))
+        rpr = run_properties(font_name, size_pt, color, bold)
+        self.paragraphs = []
+        for tc in tr.tc_lst:
+            txBody = tc.get_or_add_txBody()
+            first = txBody.find(_a("p"))
+            proto = ParagraphPrototype(rpr, first.find(_a("pPr")) if first is not None else None)
+            for child in list(txBody):
+                if child.tag in (_a("p"), _a("lstStyle")):
+                    txBody.remove(child)
+            body_pr = txBody.find(_a("bodyPr"))
+            if body_pr is not None:
+                body_pr.addnext(proto.list_style())
+            else:
+                txBody.insert(0, proto.list_style())
+            self._set_fill(tc.get_or_add_tcPr(), fill_color)
+            self.paragraphs.append(proto)
+        self.tr = tr
+
+    @staticmethod
+    def _set_fill(tcPr, color) -> None:
+        # Un seul remplissage dans tcPr, après bordures et cell3D (ordre du schéma)
+        for tag in ("noFill", "solidFill", "gradFill", "blipFill", "pattFill", "grpFill"):
+            for el in tcPr.findall(_a(tag)):
+                tcPr.remove(el)
+        fill = OxmlElement("a:solidFill")
+        etree.SubElement(fill, _a("srgbClr")).set("val", _rgb(color))
+        anchor = tcPr.find(_a("headers"))
+        if anchor is None:
+            anchor = tcPr.find(_a("extLst"))
+        if anchor is not None:
+            anchor.addprevious(fill)
+        else:
+            tcPr.append(fill)
+
+    def build(self, values: Sequence[CellValue]):
+        tr = deepcopy(self.tr)
+        for tc, proto, value in zip(tr.tc_lst, self.paragraphs, list(values) + [""] * len(self.paragraphs)):
+            append_paragraphs(tc.txBody, proto, _paragraphs(value))
+        return tr
+
+
+def clear_rows(table, keep: int = 1) -> None:
+    """Supprime toutes les lignes après les `keep` premières, en un seul passage."""
+    tbl = table._tbl
+    for tr in tbl.tr_lst[keep:]:
+        tbl.remove(tr)
+
+
+def fill_table(table, prototype: RowPrototype, rows: Iterable[Sequence[CellValue]], keep: int = 1) -> None:
+    """Remplace les lignes de données du tableau par `rows`, formatées d'après `prototype`."""
+    clear_rows(table, keep)
+    tbl = table._tbl
+    for values in rows:
+        tbl.append(prototype.build(values))
+
+
+# =====================================================
+# ========== CLONAGE DE SLIDES =======================
+# =====================================================
+
+# Relations propres à chaque slide : la copie a déjà son layout, et pas de notes
+_SKIPPED_RELS = (RT.SLIDE_LAYOUT, RT.NOTES_SLIDE)
+
+
+def clone_slide(prs, slide, after: Optional[int] = None):
+    """
+    Copie complète de `slide` (formes, fond, transitions) avec ses relations : les
+    images et médias sont partagés avec la source (aucune copie des fichiers), les
+    rId de la copie sont renumérotés. La copie est insérée après la slide d'index
+    `after` (à la fin par défaut).
+    """
+    rId, new = prs.part.add_slide(slide.slide_layout)  # slide vide : pas de placeholders du layout
+
+    src_part, new_part = slide.part, new.part
+    rids = {}
+    for key, rel in src_part.rels.items():
+        if rel.reltype in _SKIPPED_RELS:
+            continue
+        if rel.is_external:
+            rids[key] = new_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        else:
+            rids[key] = new_part.relate_to(rel.target_part, rel.reltype)
+
+    sld = new._element
+    for child in list(sld):
+        sld.remove(child)
+    for child in slide._element:
+        sld.append(deepcopy(child))
+    if rids:
+        # Seuls les attributs r:* (r:embed, r:id, r:link…) désignent des relations
+        for attr in sld.xpath(".//@r:*"):
+            if attr in rids:
+                attr.getparent().set(attr.attrname, rids[attr])
+
+    sld_id_lst = prs.slides._sldIdLst
+    sld_id_lst.add_sldId(rId)
+    if after is not None:
+        sld_id = sld_id_lst[-1]
+        sld_id_lst.remove(sld_id)
+        sld_id_lst.insert(after + 1, sld_id)
+    return new
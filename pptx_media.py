@@ -0,0 +1,156 @@
+"""
+Préparation des images insérées dans les PPTX générés (logos, diplômes).
+
+Une image téléversée (souvent plusieurs Mo) est ramenée à sa taille d'affichage
+dans la slide à TARGET_DPI, puis ré-encodée :
+    - PNG optimisé pour les images à transparence ou à peu de couleurs (logos) ;
+    - JPEG progressif pour les photos et scans.
+Si le résultat n'est pas plus léger, les octets d'origine sont gardés. Le résultat
+est mis en cache par hash du contenu + taille cible : la même image insérée dans
+plusieurs CV (génération en lot) n'est traitée qu'une fois, et donne exactement
+les mêmes octets — python-pptx la stocke alors dans une seule partie média.
+
+prepare_media() accepte aussi un PDF (diplômes scannés) : la première page est
+rendue par PyMuPDF directement à la taille d'affichage, puis traitée comme une image.
+"""
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    import fitz  # pymupdf
+except ImportError:
+    fitz = None
+
+from cv_cache import DiskCache, hash_bytes
+
+# 220 ppp : résolution « impression » de PowerPoint (Compresser les images)
+TARGET_DPI = int(os.environ.get("GT_MEDIA_DPI", "220"))
+JPEG_QUALITY = 85
+PNG_MAX_COLORS = 256  # en dessous : dessin/logo → PNG (pas d'artefacts JPEG)
+EMU_PER_INCH = 914400
+
+# À incrémenter si l'encodage change (invalide les images préparées)
+MEDIA_VERSION = "1"
+
+_CACHE = DiskCache("media", max_bytes=100 * 1024 * 1024)
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    original_size: int   # octets téléversés
+    size: int            # octets insérés dans le PPTX
+
+
+def _target_pixels(img, width_emu: Optional[int], height_emu: Optional[int], dpi: int):
+    """Taille en pixels à l'affichage (proportions conservées), jamais plus grande que l'original."""
+    w, h = img.size
+    scales = []
+    if width_emu:
+        scales.append(width_emu / EMU_PER_INCH * dpi / w)
+    if height_emu:
+        scales.append(height_emu / EMU_PER_INCH * dpi / h)
+    scale = min(scales) if scales else 1.0
+    if scale >= 1.0:
+        return None
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def _has_alpha(img) -> bool:
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _encode(img) -> bytes:
+    out = BytesIO()
+    if _has_alpha(img) or img.getcolors(PNG_MAX_COLORS) is not None:
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA" if _has_alpha(img) else "RGB")
+        img.save(out, format="PNG", optimize=True)
+    else:
+        if img.mode != "RGB":
+            img = img.convert("RGB")  # CMYK, L;16…
+        img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def prepare_image(data: bytes, width_emu: Optional[int] = None, height_emu: Optional[int] = None,
+                  dpi: int = TARGET_DPI) -> PreparedImage:
+    """Image réduite à sa taille d'affichage (EMU) et ré-encodée ; octets d'origine si Pillow manque ou échoue."""
+    if Image is None:
+        return PreparedImage(data, len(data), len(data))
+
+    key = f"{hash_bytes(data)}:{width_emu}:{height_emu}:{dpi}:{MEDIA_VERSION}"
+    cached = _CACHE.get(key)
+    if cached is not None:
+        return PreparedImage(cached, len(data), len(cached))
+
+    try:
+        with Image.open(BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            target = _target_pixels(img, width_emu, height_emu, dpi)
+            if target:
+                if img.mode == "P":  # palette : rééchantillonnage de qualité en couleurs pleines
+                    img = img.convert("RGBA" if _has_alpha(img) else "RGB")
+                img = img.resize(target, Image.LANCZOS)
+            encoded = _encode(img)
+    except Exception:
+        return PreparedImage(data, len(data), len(data))  # format non reconnu : inséré tel quel
+
+    if len(encoded) >= len(data):
+        encoded = data  # déjà légère : on garde l'original
+    _CACHE.set(key, encoded)
+    return PreparedImage(encoded, len(data), len(encoded))
+
+
+def is_pdf(data: bytes) -> bool:
+    return data[:5] == b"%PDF-"
+
+
+def _rasterize_pdf(data: bytes, width_emu: Optional[int], height_emu: Optional[int], dpi: int) -> bytes:
+    """Première page du PDF en PNG, rendue à la taille d'affichage (pas de rendu pleine page à 300 ppp)."""
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        if doc.page_count == 0:
+            raise ValueError("PDF sans page")
+        page = doc[0]
+        # Zoom = pixels voulus / points de la page (72 pt par pouce)
+        zooms = []
+        if width_emu:
+            zooms.append(width_emu / EMU_PER_INCH * dpi / page.rect.width)
+        if height_emu:
+            zooms.append(height_emu / EMU_PER_INCH * dpi / page.rect.height)
+        zoom = min(zooms) if zooms else dpi / 72
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pix.tobytes("png")
+
+
+def prepare_media(data: bytes, width_emu: Optional[int] = None, height_emu: Optional[int] = None,
+                  dpi: int = TARGET_DPI) -> PreparedImage:
+    """
+    Comme prepare_image, mais un PDF est d'abord rasterisé (première page).
+    Lève ValueError si le PDF ne peut pas être rendu : contrairement à une image, il
+    ne peut pas être inséré tel quel.
+    """
+    if not is_pdf(data):
+        return prepare_image(data, width_emu, height_emu, dpi)
+    if fitz is None:
+        raise ValueError("PyMuPDF (fitz) n'est pas installé : PDF non converti")
+
+    key = f"pdf:{hash_bytes(data)}:{width_emu}:{height_emu}:{dpi}:{MEDIA_VERSION}"
+    cached = _CACHE.get(key)
+    if cached is not None:
+        return PreparedImage(cached, len(data), len(cached))
+
+    try:
+        png = _rasterize_pdf(data, width_emu, height_emu, dpi)
+    except Exception as e:
+        raise ValueError(f"PDF illisible : {e}") from e
+    prepared = prepare_image(png, width_emu, height_emu, dpi)
+    _CACHE.set(key, prepared.data)
+    return PreparedImage(prepared.data, len(data), prepared.size)
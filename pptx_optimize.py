@@ -0,0 +1,109 @@
+"""
+Allègement des PPTX générés avant téléchargement.
+
+Les CV partent du template complet (tous les layouts et masters, historique de
+révisions, miniature). Avant la sauvegarde, prune_presentation() retire :
+    - les layouts utilisés par aucune slide, puis les masters restés sans layout ;
+    - les relations image/média/lien qu'aucun attribut r:* du XML ne désigne
+      (formes supprimées pendant le remplissage) ;
+    - l'historique des modifications (changesInfo) et la miniature du template.
+python-pptx n'écrit que les parties encore atteignables : layouts, médias orphelins
+et thèmes inutiles disparaissent donc du fichier. save_pptx() recompresse ensuite
+le XML au niveau maximal, les images déjà compressées étant stockées telles quelles.
+
+Désactivable avec GT_OPTIMIZE_DECKS=0.
+"""
+import os
+import zipfile
+import zlib
+from io import BytesIO
+from typing import Dict
+
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+OPTIMIZE_DECKS = os.environ.get("GT_OPTIMIZE_DECKS", "1") != "0"
+
+# Relations qui ne valent que si le XML de la partie y fait référence
+_REFERENCED_RELS = (RT.IMAGE, RT.MEDIA, RT.VIDEO, RT.AUDIO, RT.HYPERLINK)
+CHANGES_INFO_RT = "http://schemas.microsoft.com/office/2016/11/relationships/changesInfo"
+
+# Formats déjà compressés : stockés tels quels sauf si le deflate gagne vraiment (PNG non optimisés)
+_COMPRESSED_EXTENSIONS = (".jpeg", ".jpg", ".png", ".gif", ".wdp", ".mp3", ".m4a", ".mp4")
+
+
+def _drop_unused_layouts(prs) -> Dict[str, int]:
+    layouts = masters = 0
+    sld_master_id_lst = prs.part._element.sldMasterIdLst
+    for master in list(prs.slide_masters):
+        for layout in list(master.slide_layouts):
+            if not layout.used_by_slides:
+                master.slide_layouts.remove(layout)
+                layouts += 1
+        if len(master.slide_layouts) == 0 and len(prs.slide_masters) > 1:
+            for sld_master_id in list(sld_master_id_lst):
+                if prs.part.related_part(sld_master_id.rId) is master.part:
+                    sld_master_id_lst.remove(sld_master_id)
+                    prs.part.drop_rel(sld_master_id.rId)
+                    masters += 1
+    return {"layouts": layouts, "masters": masters}
+
+
+def _drop_unreferenced_rels(prs) -> int:
+    dropped = 0
+    for part in list(prs.part.package.iter_parts()):
+        element = getattr(part, "_element", None)
+        if element is None:
+            continue
+        referenced = set(element.xpath(".//@r:*"))
+        for rId, rel in list(part.rels.items()):
+            if rel.reltype in _REFERENCED_RELS and rId not in referenced:
+                part.rels.pop(rId)
+                dropped += 1
+    return dropped
+
+
+def _drop_rels_of_type(rels, reltype: str) -> int:
+    rids = [rId for rId, rel in rels.items() if rel.reltype == reltype]
+    for rId in rids:
+        rels.pop(rId)
+    return len(rids)
+
+
+def prune_presentation(prs) -> Dict[str, int]:
+    """Retire ce qui ne sert à aucune slide ; retourne le nombre d'éléments retirés par catégorie."""
+    removed = _drop_unused_layouts(prs)
+    removed["relations"] = _drop_unreferenced_rels(prs)
+    removed["historique"] = _drop_rels_of_type(prs.part.rels, CHANGES_INFO_RT)
+    removed["miniature"] = _drop_rels_of_type(prs.part.package._rels, RT.THUMBNAIL)
+    return removed
+
+
+def recompress(data: bytes) -> bytes:
+    """Réécrit l'archive : XML dégonflé au niveau 9, images stockées si le deflate n'y gagne pas."""
+    out = BytesIO()
+    with zipfile.ZipFile(BytesIO(data)) as src, zipfile.ZipFile(out, "w") as dst:
+        for info in src.infolist():
+            entry = zipfile.ZipInfo(info.filename, info.date_time)
+            blob = src.read(info)
+            stored = (info.filename.lower().endswith(_COMPRESSED_EXTENSIONS)
+                      and len(zlib.compress(blob, 9)) > len(blob) * 0.95)
+            if stored:
+                dst.writestr(entry, blob, compress_type=zipfile.ZIP_STORED)
+            else:
+                dst.writestr(entry, blob, compress_type=zipfile.ZIP_DEFLATED, compresslevel=9)
+    return out.getvalue()
+
+
+def save_pptx(prs, optimize: bool = OPTIMIZE_DECKS) -> bytes:
+    """Sauvegarde `prs` en octets, allégé (prune + recompression) si `optimize`."""
+    if optimize:
+        prune_presentation(prs)
+    out = BytesIO()
+    prs.save(out)
+    return recompress(out.getvalue()) if optimize else out.getvalue()
+
+
+def optimize_pptx(data: bytes) -> bytes:
+    """Passe d'allègement sur un PPTX déjà sauvegardé."""
+    return save_pptx(Presentation(BytesIO(data)), optimize=True)
@@ -0,0 +1,147 @@
+"""
+Limiteur de débit côté client pour Gemini (partagé par toutes les sessions du processus).
+
+- deux seaux à jetons par modèle : requêtes/minute et tokens/minute ;
+- sur une erreur 429 / quota : pause commune (on respecte le délai proposé par
+  l'API s'il y en a un), backoff exponentiel avec jitter, et baisse du débit
+  autorisé (qui remonte doucement à chaque succès). On reste ainsi juste sous le
+  quota au lieu d'échouer en boucle.
+"""
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+GEMINI_RPM = float(os.environ.get("GT_GEMINI_RPM", "10"))
+GEMINI_TPM = float(os.environ.get("GT_GEMINI_TPM", "250000"))
+MAX_RETRIES = int(os.environ.get("GT_GEMINI_MAX_RETRIES", "5"))
+BACKOFF_BASE = 2.0   # secondes
+BACKOFF_CAP = 60.0   # secondes
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe ; le débit peut être ajusté à chaud."""
+
+    def __init__(self, per_minute: float):
+        self.max_rate = per_minute
+        self.rate = per_minute
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        if now > self.paused_until:
+            start = max(self.updated, self.paused_until)
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate / 60.0)
+        self.updated = now
+
+    def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)  # une requête énorme ne doit pas bloquer à vie
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    delay = (amount - self.tokens) * 60.0 / self.rate
+                self._cond.wait(timeout=max(delay, 0.01))
+
+    def pause(self, seconds: float) -> None:
+        """Vide le seau et bloque tout le monde pendant `seconds`."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = 0.0
+            self.paused_until = max(self.paused_until, now + seconds)
+            self._cond.notify_all()
+
+    def slow_down(self, factor: float = 0.7) -> None:
+        with self._cond:
+            self.rate = max(self.max_rate * 0.1, self.rate * factor)
+
+    def recover(self, step_ratio: float = 0.05) -> None:
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * step_ratio)
+
+
+class RateLimiter:
+    """Requêtes/minute + tokens/minute pour un modèle donné."""
+
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def acquire(self, tokens: int) -> None:
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
+
+    def on_rate_limited(self, delay: float) -> None:
+        for bucket in (self.requests, self.tokens):
+            bucket.pause(delay)
+            bucket.slow_down()
+
+    def on_success(self) -> None:
+        self.requests.recover()
+        self.tokens.recover()
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(model_name: str) -> RateLimiter:
+    with _limiters_lock:
+        if model_name not in _limiters:
+            _limiters[model_name] = RateLimiter()
+        return _limiters[model_name]
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    if type(exc).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    msg = str(exc).lower()
+    return "429" in msg or "quota" in msg or "resource exhausted" in msg or "rate limit" in msg
+
+
+def parse_retry_after(exc: Exception) -> Optional[float]:
+    """Délai suggéré par l'API (« retry in 17.5s », retry_delay { seconds: 17 }, en-tête Retry-After)."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+    msg = str(exc)
+    for pattern in (r"retry in ([\d.]+)\s*s", r"retry_delay\s*\{\s*seconds:\s*(\d+)", r"retry after ([\d.]+)"):
+        m = re.search(pattern, msg, re.IGNORECASE)
+        if m:
+            return float(m.group(1))
+    return None
+
+
+def call_with_backoff(fn: Callable[[], T], limiter: RateLimiter, tokens: int,
+                      max_retries: int = MAX_RETRIES) -> T:
+    """Appelle fn() sous le limiteur ; les erreurs 429 sont retentées automatiquement."""
+    for attempt in range(max_retries + 1):
+        limiter.acquire(tokens)
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == max_retries:
+                raise
+            backoff = random.uniform(0.5, 1.0) * min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+            limiter.on_rate_limited(max(parse_retry_after(e) or 0.0, backoff))
+            continue
+        limiter.on_success()
+        return result
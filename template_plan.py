@@ -0,0 +1,135 @@
+"""
+Plan de rendu précompilé du template PPTX (app_powerpoint).
+
+Le template est analysé UNE fois : on note, pour chaque placeholder (NOM, POSTE,
+PROFIL…), le tableau des expériences et les slides projets, l'index de la slide et
+le shape_id de la forme. Le plan est mis en cache par hash du fichier template
+(mémoire + disque) ; les octets du template restent en mémoire. Chaque génération
+recharge le template depuis ces octets et va directement aux formes à remplir,
+sans re-parcourir tous les textes.
+"""
+import json
+import os
+import threading
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from pptx import Presentation
+
+from cv_cache import DiskCache, hash_bytes
+
+# À incrémenter si la détection des placeholders/tableaux change (invalide les plans)
+PLAN_VERSION = "1"
+
+PLACEHOLDER_KEYS = {
+    "NOM": ["NOM"],
+    "POSTE": ["POSTE"],
+    "DOMAINE D’EXPERTISE SPECIFIQUE": ["DOMAINE D’EXPERTISE SPECIFIQUE", "DOMAINE D'EXPERTISE SPECIFIQUE", "DOMAINE D EXPERTISE SPECIFIQUE"],
+    "FORMATION": ["FORMATION"],
+    "PROFIL": ["PROFIL"],
+    "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES": ["CERTIFICATIONS PROFESSIONNELLES PERTINENTES", "CERTIFICATIONS_PROFESSIONNELLES_PERTINENTES", "CERTIFICATIONS"],
+    "REFERENCES_PERTINENTES": ["REFERENCES PERTINENTES", "REFERENCES_PERTINENTES", "REFERENCES"],
+}
+EXPERIENCE_HEADERS = ["société", "company", "poste", "période", "emploi"]
+PROJECT_HEADERS = ["organisation", "country", "pays", "résumé", "summary"]
+
+_PLANS = DiskCache("template_plans", max_bytes=5 * 1024 * 1024)
+
+ShapeRef = Tuple[int, int]  # (index de la slide, shape_id)
+
+
+def compile_plan(prs) -> Dict[str, Any]:
+    """Parcourt le template une fois et retourne le plan (sérialisable en JSON)."""
+    placeholders: Dict[str, List[ShapeRef]] = {}
+    experience: Optional[ShapeRef] = None
+    projects: List[int] = []
+    variants = {key: [v.upper() for v in vs] for key, vs in PLACEHOLDER_KEYS.items()}
+
+    for slide_idx, slide in enumerate(prs.slides):
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                txt = shape.text_frame.text.upper().replace("_", " ")
+                for key, vs in variants.items():
+                    if any(v in txt for v in vs):
+                        placeholders.setdefault(key, []).append((slide_idx, shape.shape_id))
+            if shape.has_table:
+                if not shape.table.rows or not shape.table.rows[0].cells:
+                    continue
+                header = " ".join(c.text.lower() for c in shape.table.rows[0].cells)
+                if any(k in header for k in EXPERIENCE_HEADERS) and experience is None:
+                    experience = (slide_idx, shape.shape_id)
+                if any(k in header for k in PROJECT_HEADERS) and slide_idx not in projects:
+                    projects.append(slide_idx)
+
+    return {"version": PLAN_VERSION, "placeholders": placeholders, "experience": experience, "projects": projects}
+
+
+class _Template:
+    def __init__(self, stamp, data: bytes, plan: Dict[str, Any]):
+        self.stamp = stamp
+        self.data = data
+        self.plan = plan
+
+
+_templates: Dict[str, _Template] = {}
+_lock = threading.Lock()
+
+
+def _load(template_path: str) -> _Template:
+    """Octets + plan du template ; relu seulement si le fichier a changé (taille/date), replanifié si son hash change."""
+    info = os.stat(template_path)
+    stamp = (info.st_size, info.st_mtime_ns)
+    with _lock:
+        cached = _templates.get(template_path)
+        if cached and cached.stamp == stamp:
+            return cached
+
+    with open(template_path, "rb") as f:
+        data = f.read()
+    key = f"{hash_bytes(data)}:{PLAN_VERSION}"
+    if cached and cached.plan.get("hash") == key:
+        plan = cached.plan  # fichier touché mais contenu identique
+    else:
+        raw = _PLANS.get_text(key)
+        if raw is not None:
+            plan = json.loads(raw)
+        else:
+            plan = compile_plan(Presentation(BytesIO(data)))
+            plan["hash"] = key
+            _PLANS.set_text(key, json.dumps(plan))
+
+    template = _Template(stamp, data, plan)
+    with _lock:
+        _templates[template_path] = template
+    return template
+
+
+def template_bytes(template_path: str) -> bytes:
+    return _load(template_path).data
+
+
+def load_template(template_path: str):
+    """
+    Nouvelle Presentation du template et formes résolues par le plan :
+    (placeholders {clé: [formes]}, slide expériences, tableau expériences, slides projets, prs).
+    """
+    template = _load(template_path)
+    plan = template.plan
+    prs = Presentation(BytesIO(template.data))
+    slides = list(prs.slides)
+
+    by_id: Dict[int, Dict[int, Any]] = {}
+
+    def shape(ref):
+        slide_idx, shape_id = ref
+        if slide_idx not in by_id:
+            by_id[slide_idx] = {s.shape_id: s for s in slides[slide_idx].shapes}
+        return by_id[slide_idx][shape_id]
+
+    placeholders = {key: [shape(ref) for ref in refs] for key, refs in plan["placeholders"].items()}
+    exp_slide = exp_table = None
+    if plan["experience"]:
+        exp_slide = slides[plan["experience"][0]]
+        exp_table = shape(plan["experience"]).table
+    proj_slides = [slides[i] for i in plan["projects"]]
+    return placeholders, exp_slide, exp_table, proj_slides, prs
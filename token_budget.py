@@ -0,0 +1,283 @@
+"""
+Compression du texte d'un CV avant envoi au LLM (remplace les coupes text[:40000]).
+
+Étapes :
+    1. espaces normalisés, lignes vides fusionnées
+    2. suppression du bruit (numéros de page, marqueurs, lignes de ponctuation)
+    3. suppression des en-têtes/pieds de page : lignes répétées à la même place en haut
+       ou en bas de (presque) chaque page — les pages sont séparées par PAGE_BREAK dans
+       ingestion.IngestionResult.text
+    4. découpage en sections (profil, expériences, projets, formation…)
+    5. si le texte dépasse le budget : chaque section reçoit une part du budget
+       selon sa priorité, on coupe en fin de ligne et on l'indique au modèle
+       → plus de queue de CV perdue en silence.
+"""
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List
+
+from ingestion import PAGE_BREAK
+
+# Approximation Gemini : ~4 caractères par token (texte français)
+CHARS_PER_TOKEN = 4
+DEFAULT_MAX_TOKENS = int(os.environ.get("GT_PROMPT_TOKEN_BUDGET", "12000"))
+
+# Section → (motifs de titre, priorité). Plus la priorité est haute, plus la section est protégée.
+SECTION_PATTERNS = {
+    "identite": (r"informations? personnelles|[ée]tat civil|coordonn[ée]es|contact", 5),
+    "profil": (r"profil|r[ée]sum[ée]|summary|about|objectif|pr[ée]sentation", 5),
+    "experience": (r"exp[ée]riences?( professionnelles?)?|parcours|work experience|employment|emplois?", 4),
+    "projets": (r"projets?|missions?|r[ée]f[ée]rences?|r[ée]alisations?|projects?|assignments?", 4),
+    "formation": (r"formations?|[ée]ducation|dipl[ôo]mes?|[ée]tudes|cursus|education", 3),
+    "certifications": (r"certifications?|certificats?|accr[ée]ditations?", 3),
+    "competences": (r"comp[ée]tences?|domaines?|expertises?|skills?|outils|secteurs?", 2),
+    "langues": (r"langues?|languages?", 2),
+    "divers": (r"centres? d'int[ée]r[êe]ts?|loisirs|hobbies|int[ée]r[êe]ts|divers|publications?", 1),
+}
+DEFAULT_PRIORITY = 2
+
+_HEADING_RES = {
+    name: re.compile(rf"^\W*({pattern})\b", re.IGNORECASE)
+    for name, (pattern, _) in SECTION_PATTERNS.items()
+}
+
+_BOILERPLATE_RES = [
+    re.compile(r"^\W*page\s*\d+(\s*(/|sur|of)\s*\d+)?\W*$", re.IGNORECASE),
+    re.compile(r"^\W*\d+\s*(/|sur|of)\s*\d+\W*$", re.IGNORECASE),
+    re.compile(r"^-+\s*(nouvelle page|fin de tableau.*|contenu de tableau.*)\s*-+$", re.IGNORECASE),
+    re.compile(r"^\W*curriculum\s+vit(a|æ)e?\W*$", re.IGNORECASE),
+    re.compile(r"^[\W_]+$"),  # uniquement de la ponctuation / des traits
+]
+
+
+@dataclass
+class Section:
+    name: str
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def priority(self) -> int:
+        return SECTION_PATTERNS.get(self.name, (None, DEFAULT_PRIORITY))[1]
+
+    @property
+    def chars(self) -> int:
+        return sum(len(l) + 1 for l in self.lines)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clean_lines(text: str) -> List[str]:
+    lines = []
+    for raw in text.splitlines():
+        line = re.sub(r"[ \t ]+", " ", raw).strip()
+        if not line:
+            if lines and lines[-1] != "":
+                lines.append("")
+            continue
+        if any(r.match(line) for r in _BOILERPLATE_RES):
+            continue
+        lines.append(line)
+    return lines
+
+
+def _margins(page: List[str], margin: int) -> dict:
+    """Index → position (« haut 0 », « bas 1 »…) des `margin` premières et dernières lignes non vides."""
+    content = [i for i, l in enumerate(page) if l]
+    positions = {i: ("bas", k) for k, i in enumerate(reversed(content[-margin:]))}
+    positions.update({i: ("haut", k) for k, i in enumerate(content[:margin])})
+    return positions
+
+
+def _drop_repeated(pages: List[List[str]], margin: int = 2, min_share: float = 0.8) -> List[List[str]]:
+    """
+    Retire les en-têtes/pieds de page : lignes revenant à la même position (parmi les
+    `margin` premières ou dernières lignes) sur au moins `min_share` des pages. Une
+    ligne répétée dans le corps (ex. « Poste : … » sous chaque projet) est gardée ;
+    la première occurrence d'un en-tête aussi.
+    """
+    if len(pages) < 2:
+        return pages
+    margins = [_margins(page, margin) for page in pages]
+    counts = Counter()
+    for page, edge in zip(pages, margins):
+        counts.update({(page[i], pos) for i, pos in edge.items()})
+    threshold = max(2, math.ceil(min_share * len(pages)))
+    repeated = {key for key, n in counts.items() if n >= threshold}
+    if not repeated:
+        return pages
+    seen = set()
+    out = []
+    for page, edge in zip(pages, margins):
+        kept = []
+        for i, l in enumerate(page):
+            if i in edge and (l, edge[i]) in repeated:
+                if l in seen:
+                    continue
+                seen.add(l)
+            kept.append(l)
+        out.append(kept)
+    return out
+
+
+def _join_pages(pages: List[List[str]]) -> List[str]:
+    lines = []
+    for page in pages:
+        for l in page:
+            if l or (lines and lines[-1] != ""):
+                lines.append(l)
+    return lines
+
+
+def _prepare_lines(text: str) -> List[str]:
+    """Lignes nettoyées, sans en-têtes ni pieds de page répétés."""
+    pages = [_clean_lines(page) for page in text.split(PAGE_BREAK)]
+    return _join_pages(_drop_repeated(pages))
+
+
+def _heading_name(line: str):
+    """Nom de section si la ligne ressemble à un titre (court, sans contenu après ':')."""
+    if len(line) > 60 or re.search(r"\d", line):
+        return None
+    head, _, rest = line.partition(":")
+    if rest.strip() or (not line.isupper() and len(head.split()) > 5):
+        return None
+    for name, regex in _HEADING_RES.items():
+        if regex.match(line):
+            return name
+    return None
+
+
+def detect_sections(lines: List[str]) -> List[Section]:
+    sections = [Section("entete")]
+    for line in lines:
+        name = _heading_name(line)
+        if name:
+            sections.append(Section(name, [line]))
+        else:
+            sections[-1].lines.append(line)
+    return [s for s in sections if any(l for l in s.lines)]
+
+
+def _allocate(sections: List[Section], budget_chars: int) -> List[int]:
+    """Répartit le budget par priorité ; ce qu'une petite section n'utilise pas est redistribué."""
+    alloc = [0] * len(sections)
+    remaining = budget_chars
+    open_idx = [i for i, s in enumerate(sections) if s.chars > 0]
+    while open_idx and remaining > 0:
+        weight = sum(sections[i].priority for i in open_idx)
+        satisfied = []
+        for i in open_idx:
+            share = remaining * sections[i].priority // weight
+            if sections[i].chars - alloc[i] <= share:
+                satisfied.append(i)
+        if not satisfied:
+            for i in open_idx:
+                alloc[i] += remaining * sections[i].priority // weight
+            break
+        for i in satisfied:
+            remaining -= sections[i].chars - alloc[i]
+            alloc[i] = sections[i].chars
+            open_idx.remove(i)
+    return alloc
+
+
+def _truncate(section: Section, max_chars: int) -> List[str]:
+    kept, used = [], 0
+    for line in section.lines:
+        if used + len(line) + 1 > max_chars:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    omitted = len([l for l in section.lines[len(kept):] if l])
+    if omitted:
+        kept.append(f"[… {omitted} lignes omises dans cette section]")
+    return kept
+
+
+def compress_cv_text(text: str, max_tokens: int = DEFAULT_MAX_TOKENS) -> str:
+    """Texte du CV nettoyé et tenu dans `max_tokens` (estimation), section par section."""
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    lines = _prepare_lines(text)
+    cleaned = "\n".join(lines).strip()
+    if len(cleaned) <= budget_chars:
+        return cleaned
+
+    sections = detect_sections(lines)
+    # On garde une marge pour les marqueurs "[… lignes omises]"
+    alloc = _allocate(sections, budget_chars - 60 * len(sections))
+    out = []
+    for section, max_chars in zip(sections, alloc):
+        if max_chars >= section.chars:
+            out.extend(section.lines)
+        else:
+            out.extend(_truncate(section, max_chars))
+    return "\n".join(out).strip()
+
+
+def split_into_chunks(text: str, max_tokens: int = DEFAULT_MAX_TOKENS, context_chars: int = 600) -> List[str]:
+    """
+    Découpe un CV trop long en morceaux d'au plus `max_tokens`, sur les frontières de
+    sections (une section trop longue est coupée en fin de ligne). Les morceaux suivants
+    reprennent le début de l'en-tête (nom, poste) pour que le modèle garde le contexte.
+    Un texte qui tient dans le budget donne un seul morceau.
+    """
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    lines = _prepare_lines(text)
+    if sum(len(l) + 1 for l in lines) <= budget_chars:
+        return ["\n".join(lines).strip()]
+
+    sections = detect_sections(lines)
+    context = []
+    if sections and sections[0].name == "entete":
+        for line in sections[0].lines:
+            if sum(len(l) + 1 for l in context) + len(line) > context_chars:
+                break
+            context.append(line)
+    header = ["[En-tête du CV, rappelé pour contexte]"] + context + ["[Suite du CV]"] if context else []
+    room = budget_chars - sum(len(l) + 1 for l in header)
+
+    chunks, current, used = [], [], 0
+    for section in sections:
+        split = section.chars > room
+        # Section trop longue : ligne par ligne ; sinon d'un bloc
+        blocks = [[line] for line in section.lines] if split else [section.lines]
+        for idx, block in enumerate(blocks):
+            size = sum(len(l) + 1 for l in block)
+            if current and used + size > room:
+                chunks.append(current)
+                current, used = [], 0
+                if split and section.name != "entete" and idx != 0:
+                    # Section coupée : on rappelle son titre pour que le modèle sache où il est
+                    current.append(f"{section.lines[0]} (suite)")
+                    used += len(current[0]) + 1
+            current.extend(block)
+            used += size
+    if current:
+        chunks.append(current)
+    return ["\n".join((header if i else []) + c).strip() for i, c in enumerate(chunks)]
+
+
+def select_sections(text: str, names: List[str], context_chars: int = 600) -> str:
+    """
+    Extrait du CV limité aux sections `names` (plus le début de l'en-tête pour le contexte).
+    Si aucune de ces sections n'est reconnue, renvoie tout le texte nettoyé.
+    """
+    lines = _prepare_lines(text)
+    sections = detect_sections(lines)
+    picked = [s for s in sections if s.name in names and s.name != "entete"]
+    if not picked:
+        return "\n".join(lines).strip()
+    out = []
+    if sections[0].name == "entete":
+        for line in sections[0].lines:
+            if sum(len(l) + 1 for l in out) + len(line) > context_chars:
+                break
+            out.append(line)
+    for section in picked:
+        out.extend(section.lines)
+    return "\n".join(out).strip()